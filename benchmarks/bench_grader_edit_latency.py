@@ -0,0 +1,71 @@
+"""
+Edit latency of the assignment grader window.
+
+Times single-cell edits (which update the cached totals of the edited row) against a
+full rebuild of every row total, on a class of 500 students x 50 questions by default.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_grader_edit_latency --students 500 --questions 50
+"""
+
+import argparse
+import os
+import statistics
+import time
+from random import Random
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PySide6 import QtWidgets
+
+from gradebook.database.models import Assignment
+from benchmarks.common import seed_class, temporary_database, timed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--students", type=int, default=500)
+    parser.add_argument("--questions", type=int, default=50)
+    parser.add_argument("--edits", type=int, default=200)
+    args = parser.parse_args()
+
+    app = QtWidgets.QApplication.instance() or QtWidgets.QApplication([])
+
+    # imported after the application exists
+    from gradebook.views.table_view_window.assignment_grader_window import (
+        AssignmentGraderWindow,
+    )
+
+    with temporary_database("desktop"):
+        cls = seed_class(args.students, 1, args.questions)
+        assignment = Assignment.select().first()
+
+        window = AssignmentGraderWindow()
+        open_ms = timed(window.set_assignment_data, assignment, cls)
+        model = window.data_model
+
+        rng = Random(0)
+        latencies = []
+        for _ in range(args.edits):
+            index = model.index(
+                rng.randrange(args.students), 3 + rng.randrange(args.questions)
+            )
+            value = str(rng.randint(0, 10))
+            start = time.perf_counter()
+            model.setData(index, value)
+            latencies.append((time.perf_counter() - start) * 1000)
+
+        full_ms = timed(window.sum_totals, repeat=5)
+
+    latencies.sort()
+    print(f"{args.students} students x {args.questions} questions")
+    print(f"open dialog:                {open_ms:10.2f} ms")
+    print(f"single edit (median):       {statistics.median(latencies):10.3f} ms")
+    print(f"single edit (p95):          {latencies[int(len(latencies) * 0.95)]:10.3f} ms")
+    print(f"full totals rebuild:        {full_ms:10.2f} ms")
+    del app
+
+
+if __name__ == "__main__":
+    main()
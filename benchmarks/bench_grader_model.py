@@ -0,0 +1,95 @@
+"""
+Open time and memory of the grader table model.
+
+Loads a synthetic students x questions grid into a QStandardItemModel (one item object
+per cell, the grader's previous model) and into TypedTableModel, each in a fresh
+subprocess so the resident memory growth of one does not hide the other.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_grader_model --students 500 --questions 50
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import time
+from random import Random
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+MODELS = ["standard", "typed"]
+
+
+def _rss_bytes() -> int:
+    with open("/proc/self/statm") as statm:
+        return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+
+
+def _rows(students: int, questions: int) -> list[list]:
+    rng = Random(0)
+    return [
+        [f"S{i:06d}", f"Last{i}", f"First{i}"]
+        + [float(rng.randint(0, 10)) for _ in range(questions)]
+        + [rng.randint(60, 3600), None]
+        for i in range(students)
+    ]
+
+
+def _measure(model_name: str, students: int, questions: int) -> None:
+    from PySide6 import QtGui, QtWidgets
+
+    app = QtWidgets.QApplication.instance() or QtWidgets.QApplication([])
+    from gradebook.views.table_view_window.typed_table_model import TypedTableModel
+
+    rows = _rows(students, questions)
+    before = _rss_bytes()
+    start = time.perf_counter()
+    if model_name == "standard":
+        model = QtGui.QStandardItemModel()
+        for r, row in enumerate(rows):
+            for c, value in enumerate(row):
+                model.setItem(r, c, QtGui.QStandardItem("" if value is None else str(value)))
+    else:
+        model = TypedTableModel()
+        numeric = range(3, len(rows[0]))
+        model.load(rows, numeric, [len(rows[0]) - 1])
+    elapsed = (time.perf_counter() - start) * 1000
+    grown = _rss_bytes() - before
+
+    print(f"{model_name:10s} open {elapsed:9.2f} ms   rss +{grown / 2**20:8.2f} MiB")
+    del model, app
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--students", type=int, default=500)
+    parser.add_argument("--questions", type=int, default=50)
+    parser.add_argument("--model", choices=MODELS, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.model:
+        _measure(args.model, args.students, args.questions)
+        return
+
+    print(f"{args.students} students x {args.questions} questions")
+    for model_name in MODELS:
+        subprocess.run(
+            [
+                sys.executable,
+                "-m",
+                "benchmarks.bench_grader_model",
+                "--students",
+                str(args.students),
+                "--questions",
+                str(args.questions),
+                "--model",
+                model_name,
+            ],
+            check=True,
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""
+Grading-save and grade-refresh timings under each SQLite profile.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_sqlite_profiles --students 200 --questions 10
+"""
+
+import argparse
+from random import Random
+
+from gradebook.database.models import SQLITE_PROFILES, Assignment, ClassRoster
+from gradebook.database.services import scoring
+from benchmarks.common import seed_class, temporary_database, timed
+
+
+def grading_save(class_id: int, assignment: Assignment, rng: Random) -> None:
+    """
+    Save a grading pass over one assignment the way the grader window does: about
+    half of the score cells and the time of every student changed, in one batch.
+    """
+    questions = [q.id for q in assignment.questions]
+    students = [
+        student_id
+        for (student_id,) in ClassRoster.select(ClassRoster.student)
+        .where(ClassRoster.class_ref == class_id)
+        .tuples()
+    ]
+    question_scores = [
+        (student_id, question_id, float(rng.randint(0, 10)))
+        for student_id in students
+        for question_id in questions
+        if rng.random() < 0.5
+    ]
+    times = {student_id: rng.randint(60, 3600) for student_id in students}
+    scoring.save_assignment_grades(class_id, assignment.id, question_scores, times)
+
+
+def grade_refresh(class_id: int) -> None:
+    """Recompute the Final grade tab data, bypassing the grade cache."""
+    scoring.build_grade_matrix(class_id)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--students", type=int, default=200)
+    parser.add_argument("--assignments", type=int, default=20)
+    parser.add_argument("--questions", type=int, default=10)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    print(
+        f"{args.students} students x {args.assignments} assignments x {args.questions} questions"
+    )
+    print(f"{'profile':<12}{'grading save (ms)':>20}{'grade refresh (ms)':>20}")
+    for profile in [None] + list(SQLITE_PROFILES):
+        with temporary_database(profile):
+            cls = seed_class(args.students, args.assignments, args.questions)
+            assignment = Assignment.select().first()
+            save_ms = timed(
+                grading_save, cls.id, assignment, Random(0), repeat=args.repeat
+            )
+            refresh_ms = timed(grade_refresh, cls.id, repeat=args.repeat)
+        print(f"{profile or 'default':<12}{save_ms:>20.1f}{refresh_ms:>20.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""
+Time to interactive when a class is opened in the main window.
+
+Compares fetching and refreshing every tab (the previous behaviour of
+MainWindow._refresh_tables) with loading only the tab that is shown, which is the
+Roster tab when a class is opened. Also reports the Grade tab on its own, since it is
+the most expensive tab to activate later.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_time_to_interactive --students 1000 --assignments 20
+"""
+
+import argparse
+import os
+import time
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PySide6 import QtWidgets
+
+from benchmarks.common import seed_class, temporary_database
+
+
+def _load(tabs, cls) -> float:
+    start = time.perf_counter()
+    for tab in tabs:
+        tab.on_fetch_data(cls)
+        tab.on_refresh_view()
+    QtWidgets.QApplication.processEvents()
+    return (time.perf_counter() - start) * 1000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--students", type=int, default=1000)
+    parser.add_argument("--assignments", type=int, default=20)
+    parser.add_argument("--questions", type=int, default=10)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    app = QtWidgets.QApplication.instance() or QtWidgets.QApplication([])
+
+    # imported after the application exists
+    from gradebook.views.main_window.main_window import MainWindow
+
+    with temporary_database("desktop"):
+        cls = seed_class(args.students, args.assignments, args.questions)
+        tabs = [tab_class() for tab_class in MainWindow._tabs]
+        roster, grade = tabs[0], tabs[-1]
+
+        eager = min(_load(tabs, cls) for _ in range(args.repeat))
+        lazy = min(_load([roster], cls) for _ in range(args.repeat))
+        grade_only = min(_load([grade], cls) for _ in range(args.repeat))
+
+    print(
+        f"{args.students} students, {args.assignments} assignments x "
+        f"{args.questions} questions"
+    )
+    print(f"all tabs (eager):           {eager:10.2f} ms")
+    print(f"current tab only (lazy):    {lazy:10.2f} ms")
+    print(f"grade tab activation:       {grade_only:10.2f} ms")
+    del app
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+import os
+import tempfile
+import time
+from contextlib import contextmanager
+from random import Random
+
+from gradebook.database.models import (
+    db,
+    init_db,
+    Assignment,
+    AssignmentCategoryWeight,
+    AssignmentQuestion,
+    Class,
+    ClassAssignment,
+    ClassRoster,
+    Student,
+    StudentAssignmentScore,
+    StudentQuestionScore,
+)
+
+
+@contextmanager
+def temporary_database(profile: str | None = None):
+    """
+    Initialize the database proxy against a fresh on-disk database for a benchmark run.
+
+    Args:
+        profile (str | None): SQLite profile passed to `init_db`
+    """
+    with tempfile.TemporaryDirectory() as directory:
+        init_db(
+            db_path=os.path.join(directory, "bench.db"),
+            create_tables=True,
+            profile=profile,
+        )
+        try:
+            yield
+        finally:
+            db.close()
+
+
+def seed_class(
+    students: int, assignments: int, questions: int, seed: int = 0
+) -> Class:
+    """
+    Create one class with a fully graded roster using bulk inserts.
+
+    Args:
+        students (int): number of enrolled students
+        assignments (int): number of assignments, spread over the categories
+        questions (int): questions per assignment
+        seed (int): random seed for the scores
+
+    Returns:
+        Class: the seeded class
+    """
+    rng = Random(seed)
+    categories = ["quiz", "homework", "test", "project", "final"]
+    with db.atomic():
+        cls = Class.create(name=f"Benchmark {seed}")
+        Student.insert_many(
+            [
+                {
+                    "student_number": f"B{seed}-{i:06d}",
+                    "first_name": f"First{i}",
+                    "last_name": f"Last{i}",
+                }
+                for i in range(students)
+            ]
+        ).execute()
+        student_ids = [
+            s.id
+            for s in Student.select(Student.id).where(
+                Student.student_number.startswith(f"B{seed}-")
+            )
+        ]
+        ClassRoster.insert_many(
+            [{"class_ref": cls.id, "student": sid} for sid in student_ids]
+        ).execute()
+        roster_ids = {
+            r.student_id: r.id
+            for r in ClassRoster.select().where(ClassRoster.class_ref == cls.id)
+        }
+
+        for a in range(assignments):
+            assignment = Assignment.create(
+                title=f"Assignment {a}", category=categories[a % len(categories)]
+            )
+            AssignmentQuestion.insert_many(
+                [
+                    {"assignment": assignment.id, "text": f"Q{q}", "point_value": 10}
+                    for q in range(questions)
+                ]
+            ).execute()
+            class_assignment = ClassAssignment.create(
+                class_ref=cls, assignment=assignment, total_points=10 * questions
+            )
+            question_ids = [q.id for q in assignment.questions]
+            rows = [
+                {
+                    "student": sid,
+                    "assignment_question": qid,
+                    "points_scored": rng.randint(0, 10),
+                }
+                for sid in student_ids
+                for qid in question_ids
+            ]
+            for i in range(0, len(rows), 300):
+                StudentQuestionScore.insert_many(rows[i : i + 300]).execute()
+            StudentAssignmentScore.insert_many(
+                [
+                    {
+                        "roster_entry": roster_ids[sid],
+                        "class_assignment": class_assignment.id,
+                        "total_score": 0,
+                        "total_time": 0,
+                    }
+                    for sid in student_ids
+                ]
+            ).execute()
+
+        for category in categories:
+            AssignmentCategoryWeight.create(
+                class_ref=cls, category=category, weight=1.0 / len(categories)
+            )
+    return cls
+
+
+def timed(function, *args, repeat: int = 1, **kwargs) -> float:
+    """
+    Best wall clock time of `repeat` calls, in milliseconds.
+    """
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function(*args, **kwargs)
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
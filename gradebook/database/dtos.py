@@ -1,8 +1,14 @@
 from dataclasses import dataclass
 from datetime import date
+from typing import Generic, TypeVar
 
+T = TypeVar("T")
 
-@dataclass
+# DTOs are slotted, large result lists are built from `.tuples()` rows without a
+# per-instance __dict__
+
+
+@dataclass(slots=True)
 class StudentDTO:
     id: int
     student_number: str
@@ -10,7 +16,7 @@ class StudentDTO:
     last_name: str
 
 
-@dataclass
+@dataclass(slots=True)
 class ClassDTO:
     id: int
     name: str
@@ -18,7 +24,7 @@ class ClassDTO:
     end_date: date | None
 
 
-@dataclass
+@dataclass(slots=True)
 class AssignmentQuestionDTO:
     id: int
     assignment_id: int
@@ -26,7 +32,7 @@ class AssignmentQuestionDTO:
     point_value: int
 
 
-@dataclass
+@dataclass(slots=True)
 class ClassAssignmentDTO:
     id: int
     class_id: int
@@ -34,7 +40,7 @@ class ClassAssignmentDTO:
     total_points: float
 
 
-@dataclass
+@dataclass(slots=True)
 class AssignmentCategoryWeightDTO:
     id: int
     class_id: int
@@ -42,7 +48,7 @@ class AssignmentCategoryWeightDTO:
     weight: float
 
 
-@dataclass
+@dataclass(slots=True)
 class StudentAssignmentScoreDTO:
     id: int
     roster_entry_id: int
@@ -51,7 +57,7 @@ class StudentAssignmentScoreDTO:
     total_time: int | None
 
 
-@dataclass
+@dataclass(slots=True)
 class StudentQuestionScoreDTO:
     id: int
     student_id: int
@@ -59,9 +65,59 @@ class StudentQuestionScoreDTO:
     points_scored: float
 
 
-@dataclass
+@dataclass(slots=True)
 class AssignmentDTO:
     id: int
     title: str
     category: str
     questions: list[AssignmentQuestionDTO]
+
+
+@dataclass(slots=True)
+class StudentGradeDTO:
+    roster_entry_id: int
+    student_id: int
+    student_number: str
+    first_name: str
+    last_name: str
+    points: dict[str, float]
+    possible: dict[str, float]
+    final_grade: float
+
+    def category_score(self, category: str) -> float:
+        """Percentage scored in a category, or the raw points if nothing is possible."""
+        points = self.points.get(category, 0.0)
+        possible = self.possible.get(category, 0.0)
+        return points if possible == 0 else points / possible * 100
+
+
+@dataclass(slots=True)
+class ClassGradeMatrixDTO:
+    class_id: int
+    weights: dict[str, float]
+    students: list[StudentGradeDTO]
+
+
+@dataclass(slots=True)
+class AssignmentScoreGridDTO:
+    class_id: int
+    assignment_id: int
+    students: list[StudentDTO]
+    questions: list[AssignmentQuestionDTO]
+    # scores[row][column] lines up with students[row] and questions[column],
+    # None marks a question the student has no recorded score for
+    scores: list[list[float | None]]
+    times: list[int | None]
+
+    @property
+    def question_ids(self) -> list[int]:
+        return [q.id for q in self.questions]
+
+
+@dataclass(slots=True)
+class PageDTO(Generic[T]):
+    items: list[T]
+    # opaque token that continues the listing after the last item, None on the last page
+    next_token: str | None
+    # rows in the whole listing, cached for a short while so it may lag other writers
+    total: int
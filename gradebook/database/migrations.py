@@ -0,0 +1,606 @@
+"""
+Versioned schema migrations for existing gradebook databases.
+
+The schema version is stored in SQLite's `PRAGMA user_version`. A brand new
+database is created from the current models and triggers and stamped with the
+latest version; an existing database is upgraded by applying every migration newer
+than its stored version, each inside its own transaction, followed by ANALYZE
+so the query planner picks up the new indexes.
+
+To add a migration, write a function taking `(database, migrator)` and append it
+to `MIGRATIONS` with the next version number. Migrations must be written against
+table and column names, not the current models, since the models keep changing.
+For the same reason the SQL of the triggers a migration installs is a frozen copy
+kept here; changing a trigger in `triggers` takes a new migration.
+"""
+
+from typing import Callable, NamedTuple
+from peewee import SqliteDatabase
+from playhouse.migrate import SqliteMigrator, make_index_name
+from gradebook.database.models import db, MODELS
+from gradebook.database.triggers import create_triggers
+
+
+class Migration(NamedTuple):
+    version: int
+    description: str
+    apply: Callable[[SqliteDatabase, SqliteMigrator], None]
+
+
+def _add_index(
+    database: SqliteDatabase,
+    migrator: SqliteMigrator,
+    table: str,
+    columns: tuple[str, ...],
+    unique: bool = False,
+) -> None:
+    """
+    Add an index unless a database created by `create_tables` already has it.
+    """
+    existing = {index.name for index in database.get_indexes(table)}
+    if make_index_name(table, columns) not in existing:
+        migrator.add_index(table, columns, unique).run()
+
+
+def _0001_score_lookup_indexes(
+    database: SqliteDatabase, migrator: SqliteMigrator
+) -> None:
+    """Covering indexes for score lookups and one aggregate row per roster entry and assignment."""
+    # Older databases may hold several aggregate rows for the same assignment,
+    # keep the newest so the unique index can be built
+    database.execute_sql(
+        """
+        DELETE FROM studentassignmentscore
+        WHERE id NOT IN (
+            SELECT MAX(id) FROM studentassignmentscore
+            GROUP BY roster_entry_id, class_assignment_id
+        )
+        """
+    )
+    _add_index(
+        database,
+        migrator,
+        "studentassignmentscore",
+        ("roster_entry_id", "class_assignment_id"),
+        unique=True,
+    )
+    _add_index(database, migrator, "assignment", ("category",))
+    _add_index(database, migrator, "classroster", ("student_id", "class_ref_id"))
+    _add_index(database, migrator, "classassignment", ("assignment_id", "class_ref_id"))
+
+
+# Frozen copy of the data version triggers as migration 2 installed them
+
+# SELECT of the class ids a row of a versioned table belongs to, {row} is NEW or OLD
+_V2_CLASSES_OF_ROW = {
+    "classroster": "SELECT {row}.class_ref_id AS class_id",
+    "classassignment": "SELECT {row}.class_ref_id AS class_id",
+    "assignmentcategoryweight": "SELECT {row}.class_ref_id AS class_id",
+    "studentassignmentscore": (
+        "SELECT class_ref_id AS class_id FROM classroster WHERE id = {row}.roster_entry_id"
+    ),
+    # a question score counts for every class that has the student and the assignment
+    "studentquestionscore": (
+        "SELECT cr.class_ref_id AS class_id FROM classroster cr"
+        " JOIN classassignment ca ON ca.class_ref_id = cr.class_ref_id"
+        " JOIN assignmentquestion aq ON aq.assignment_id = ca.assignment_id"
+        " WHERE cr.student_id = {row}.student_id AND aq.id = {row}.assignment_question_id"
+    ),
+}
+
+
+def _v2_data_version_trigger(table: str, event: str) -> str:
+    if event == "INSERT":
+        classes = _V2_CLASSES_OF_ROW[table].format(row="NEW")
+    elif event == "DELETE":
+        classes = _V2_CLASSES_OF_ROW[table].format(row="OLD")
+    else:
+        classes = (
+            _V2_CLASSES_OF_ROW[table].format(row="OLD")
+            + " UNION "
+            + _V2_CLASSES_OF_ROW[table].format(row="NEW")
+        )
+    # WHERE true keeps SQLite from reading ON CONFLICT as a join constraint
+    return f"""
+        CREATE TRIGGER IF NOT EXISTS dataversion_{table}_{event.lower()}
+        AFTER {event} ON {table}
+        BEGIN
+            INSERT INTO dataversion (class_id, table_name, version)
+            SELECT class_id, '{table}', 1 FROM ({classes}) WHERE true
+            ON CONFLICT (class_id, table_name) DO UPDATE SET version = version + 1;
+        END
+    """
+
+
+# Bump DataVersion for the classes touched by every write to a versioned table
+_V2_DATA_VERSION_TRIGGERS = [
+    _v2_data_version_trigger(table, event)
+    for table in _V2_CLASSES_OF_ROW
+    for event in ("INSERT", "UPDATE", "DELETE")
+]
+
+
+def _0002_data_versions(database: SqliteDatabase, migrator: SqliteMigrator) -> None:
+    """Per class change counters, kept up to date by triggers."""
+    database.execute_sql(
+        """
+        CREATE TABLE IF NOT EXISTS "dataversion" (
+            "id" INTEGER NOT NULL PRIMARY KEY,
+            "class_id" INTEGER NOT NULL,
+            "table_name" VARCHAR(255) NOT NULL,
+            "version" INTEGER NOT NULL
+        )
+        """
+    )
+    _add_index(database, migrator, "dataversion", ("class_id", "table_name"), unique=True)
+    create_triggers(database, _V2_DATA_VERSION_TRIGGERS)
+
+
+# Frozen copy of the aggregate triggers as migration 3 installed them
+
+# Assignment score rows a question score counts towards, {row} is NEW or OLD
+_V3_SCORES_OF_QUESTION_SCORE = """
+    SELECT sas.id FROM studentassignmentscore sas
+    JOIN classroster cr ON cr.id = sas.roster_entry_id
+    JOIN classassignment ca ON ca.id = sas.class_assignment_id
+    JOIN assignmentquestion aq ON aq.assignment_id = ca.assignment_id
+    WHERE cr.student_id = {row}.student_id AND aq.id = {row}.assignment_question_id
+"""
+
+# Sum of the question scores of an assignment score row, {row} is the row
+_V3_TOTAL_SCORE_SQL = """
+    SELECT COALESCE(SUM(sqs.points_scored), 0) FROM studentquestionscore sqs
+    JOIN assignmentquestion aq ON aq.id = sqs.assignment_question_id
+    JOIN classassignment ca ON ca.assignment_id = aq.assignment_id
+    JOIN classroster cr ON cr.student_id = sqs.student_id
+    WHERE ca.id = {row}.class_assignment_id AND cr.id = {row}.roster_entry_id
+"""
+
+# Sum of the question points of a class assignment row, {row} is the row
+_V3_TOTAL_POINTS_SQL = """
+    SELECT COALESCE(SUM(point_value), 0) FROM assignmentquestion
+    WHERE assignment_id = {row}.assignment_id
+"""
+
+
+def _v3_adjust_total_score(row: str, sign: str) -> str:
+    return f"""
+        UPDATE studentassignmentscore
+        SET total_score = total_score {sign} {row}.points_scored
+        WHERE id IN ({_V3_SCORES_OF_QUESTION_SCORE.format(row=row)});
+    """
+
+
+def _v3_adjust_total_points(row: str, sign: str) -> str:
+    return f"""
+        UPDATE classassignment
+        SET total_points = total_points {sign} {row}.point_value
+        WHERE assignment_id = {row}.assignment_id;
+    """
+
+
+# Keep StudentAssignmentScore.total_score equal to the sum of the student's question
+# scores for the assignment, and ClassAssignment.total_points equal to the sum of the
+# assignment's question points. Question writes apply the difference, new aggregate
+# rows are corrected to the full sum if they were inserted with another value. Rows
+# that drifted before the triggers existed are fixed by `services.scoring.repair_totals`.
+_V3_AGGREGATE_TRIGGERS = [
+    f"""
+    CREATE TRIGGER IF NOT EXISTS total_score_studentquestionscore_insert
+    AFTER INSERT ON studentquestionscore
+    BEGIN
+        {_v3_adjust_total_score("NEW", "+")}
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS total_score_studentquestionscore_update
+    AFTER UPDATE OF student_id, assignment_question_id, points_scored
+    ON studentquestionscore
+    WHEN OLD.points_scored IS NOT NEW.points_scored
+        OR OLD.student_id != NEW.student_id
+        OR OLD.assignment_question_id != NEW.assignment_question_id
+    BEGIN
+        {_v3_adjust_total_score("OLD", "-")}
+        {_v3_adjust_total_score("NEW", "+")}
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS total_score_studentquestionscore_delete
+    AFTER DELETE ON studentquestionscore
+    BEGIN
+        {_v3_adjust_total_score("OLD", "-")}
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS total_score_studentassignmentscore_insert
+    AFTER INSERT ON studentassignmentscore
+    BEGIN
+        UPDATE studentassignmentscore
+        SET total_score = ({_V3_TOTAL_SCORE_SQL.format(row="NEW")})
+        WHERE id = NEW.id AND total_score != ({_V3_TOTAL_SCORE_SQL.format(row="NEW")});
+    END
+    """,
+    # Deleting a question cascades to its scores after the question row is gone,
+    # when the delete trigger above can no longer find the assignment
+    """
+    CREATE TRIGGER IF NOT EXISTS total_score_assignmentquestion_delete
+    BEFORE DELETE ON assignmentquestion
+    BEGIN
+        UPDATE studentassignmentscore
+        SET total_score = total_score - (
+            SELECT COALESCE(SUM(sqs.points_scored), 0) FROM studentquestionscore sqs
+            JOIN classroster cr ON cr.student_id = sqs.student_id
+            WHERE sqs.assignment_question_id = OLD.id
+            AND cr.id = studentassignmentscore.roster_entry_id
+        )
+        WHERE class_assignment_id IN (
+            SELECT id FROM classassignment WHERE assignment_id = OLD.assignment_id
+        );
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS total_points_assignmentquestion_insert
+    AFTER INSERT ON assignmentquestion
+    BEGIN
+        {_v3_adjust_total_points("NEW", "+")}
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS total_points_assignmentquestion_update
+    AFTER UPDATE OF assignment_id, point_value ON assignmentquestion
+    WHEN OLD.point_value IS NOT NEW.point_value
+        OR OLD.assignment_id != NEW.assignment_id
+    BEGIN
+        {_v3_adjust_total_points("OLD", "-")}
+        {_v3_adjust_total_points("NEW", "+")}
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS total_points_assignmentquestion_delete
+    AFTER DELETE ON assignmentquestion
+    BEGIN
+        {_v3_adjust_total_points("OLD", "-")}
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS total_points_classassignment_insert
+    AFTER INSERT ON classassignment
+    BEGIN
+        UPDATE classassignment
+        SET total_points = ({_V3_TOTAL_POINTS_SQL.format(row="NEW")})
+        WHERE id = NEW.id AND total_points != ({_V3_TOTAL_POINTS_SQL.format(row="NEW")});
+    END
+    """,
+]
+
+
+def _0003_aggregate_triggers(database: SqliteDatabase, migrator: SqliteMigrator) -> None:
+    """
+    Triggers keeping assignment score totals and class assignment points in step.
+    Existing totals are left as they are, see `scoring.repair_totals`.
+    """
+    create_triggers(database, _V3_AGGREGATE_TRIGGERS)
+
+
+# Frozen copy of the rollup triggers as migration 4 installed them
+
+# Recompute the category rollups of the roster entries and categories matching
+# {where}, which can filter on `cr` (classroster) and `totals.category`. Points possible
+# are summed from ClassAssignment.total_points, kept up to date by the triggers above.
+_V4_ROLLUP_INSERT_SQL = """
+    INSERT INTO studentcategoryrollup
+        (roster_entry_id, category, points, possible, n_assignments)
+    SELECT cr.id, totals.category,
+        COALESCE((
+            SELECT SUM(sqs.points_scored) FROM studentquestionscore sqs
+            JOIN assignmentquestion aq ON aq.id = sqs.assignment_question_id
+            JOIN assignment a ON a.id = aq.assignment_id
+            JOIN classassignment ca ON ca.assignment_id = a.id
+            WHERE sqs.student_id = cr.student_id
+            AND ca.class_ref_id = cr.class_ref_id
+            AND a.category = totals.category
+        ), 0),
+        totals.possible, totals.n_assignments
+    FROM classroster cr
+    JOIN (
+        SELECT ca.class_ref_id, a.category,
+            SUM(ca.total_points) AS possible, COUNT(*) AS n_assignments
+        FROM classassignment ca JOIN assignment a ON a.id = ca.assignment_id
+        GROUP BY ca.class_ref_id, a.category
+    ) totals ON totals.class_ref_id = cr.class_ref_id
+    WHERE {where}
+    ON CONFLICT (roster_entry_id, category) DO UPDATE SET
+        points = excluded.points,
+        possible = excluded.possible,
+        n_assignments = excluded.n_assignments
+"""
+
+# Category of the assignment a class assignment or question row belongs to
+_V4_CATEGORY_OF_ROW = "(SELECT category FROM assignment WHERE id = {row}.assignment_id)"
+
+
+def _v4_adjust_rollup_points(row: str, sign: str) -> str:
+    return f"""
+        UPDATE studentcategoryrollup
+        SET points = points {sign} {row}.points_scored
+        WHERE id IN (
+            SELECT r.id FROM assignmentquestion aq
+            JOIN assignment a ON a.id = aq.assignment_id
+            JOIN classassignment ca ON ca.assignment_id = a.id
+            JOIN classroster cr ON cr.class_ref_id = ca.class_ref_id
+            JOIN studentcategoryrollup r
+                ON r.roster_entry_id = cr.id AND r.category = a.category
+            WHERE aq.id = {row}.assignment_question_id
+            AND cr.student_id = {row}.student_id
+        );
+    """
+
+
+def _v4_rebuild_class_category(row: str) -> str:
+    category = _V4_CATEGORY_OF_ROW.format(row=row)
+    return f"""
+        DELETE FROM studentcategoryrollup
+        WHERE category = {category} AND roster_entry_id IN (
+            SELECT id FROM classroster WHERE class_ref_id = {row}.class_ref_id
+        );
+        {_V4_ROLLUP_INSERT_SQL.format(
+            where=f"cr.class_ref_id = {row}.class_ref_id AND totals.category = {category}"
+        )};
+    """
+
+
+# Keep StudentCategoryRollup equal to what `_V4_ROLLUP_INSERT_SQL` would compute. Score
+# writes apply the difference to the points, changed assignment totals to the points
+# possible. Assigning or unassigning an assignment and enrolling a student recompute
+# the rows involved.
+_V4_ROLLUP_TRIGGERS = [
+    f"""
+    CREATE TRIGGER IF NOT EXISTS rollup_studentquestionscore_insert
+    AFTER INSERT ON studentquestionscore
+    BEGIN
+        {_v4_adjust_rollup_points("NEW", "+")}
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS rollup_studentquestionscore_update
+    AFTER UPDATE OF student_id, assignment_question_id, points_scored
+    ON studentquestionscore
+    WHEN OLD.points_scored IS NOT NEW.points_scored
+        OR OLD.student_id != NEW.student_id
+        OR OLD.assignment_question_id != NEW.assignment_question_id
+    BEGIN
+        {_v4_adjust_rollup_points("OLD", "-")}
+        {_v4_adjust_rollup_points("NEW", "+")}
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS rollup_studentquestionscore_delete
+    AFTER DELETE ON studentquestionscore
+    BEGIN
+        {_v4_adjust_rollup_points("OLD", "-")}
+    END
+    """,
+    # see total_score_assignmentquestion_delete
+    f"""
+    CREATE TRIGGER IF NOT EXISTS rollup_assignmentquestion_delete
+    BEFORE DELETE ON assignmentquestion
+    BEGIN
+        UPDATE studentcategoryrollup
+        SET points = points - (
+            SELECT COALESCE(SUM(sqs.points_scored), 0) FROM studentquestionscore sqs
+            JOIN classroster cr ON cr.student_id = sqs.student_id
+            WHERE sqs.assignment_question_id = OLD.id
+            AND cr.id = studentcategoryrollup.roster_entry_id
+        )
+        WHERE category = {_V4_CATEGORY_OF_ROW.format(row="OLD")}
+        AND roster_entry_id IN (
+            SELECT cr.id FROM classroster cr
+            JOIN classassignment ca ON ca.class_ref_id = cr.class_ref_id
+            WHERE ca.assignment_id = OLD.assignment_id
+        );
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS rollup_classassignment_update
+    AFTER UPDATE OF total_points ON classassignment
+    WHEN OLD.total_points IS NOT NEW.total_points
+    BEGIN
+        UPDATE studentcategoryrollup
+        SET possible = possible + NEW.total_points - OLD.total_points
+        WHERE category = {_V4_CATEGORY_OF_ROW.format(row="NEW")}
+        AND roster_entry_id IN (
+            SELECT id FROM classroster WHERE class_ref_id = NEW.class_ref_id
+        );
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS rollup_classassignment_insert
+    AFTER INSERT ON classassignment
+    BEGIN
+        {_v4_rebuild_class_category("NEW")}
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS rollup_classassignment_delete
+    AFTER DELETE ON classassignment
+    BEGIN
+        {_v4_rebuild_class_category("OLD")}
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS rollup_assignment_update
+    AFTER UPDATE OF category ON assignment
+    WHEN OLD.category IS NOT NEW.category
+    BEGIN
+        DELETE FROM studentcategoryrollup
+        WHERE category IN (OLD.category, NEW.category) AND roster_entry_id IN (
+            SELECT cr.id FROM classroster cr
+            JOIN classassignment ca ON ca.class_ref_id = cr.class_ref_id
+            WHERE ca.assignment_id = NEW.id
+        );
+        {_V4_ROLLUP_INSERT_SQL.format(
+            where="totals.category IN (OLD.category, NEW.category)"
+            " AND cr.class_ref_id IN"
+            " (SELECT class_ref_id FROM classassignment WHERE assignment_id = NEW.id)"
+        )};
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS rollup_classroster_insert
+    AFTER INSERT ON classroster
+    BEGIN
+        {_V4_ROLLUP_INSERT_SQL.format(where="cr.id = NEW.id")};
+    END
+    """,
+    # the foreign key cascades too, but only with PRAGMA foreign_keys on
+    """
+    CREATE TRIGGER IF NOT EXISTS rollup_classroster_delete
+    AFTER DELETE ON classroster
+    BEGIN
+        DELETE FROM studentcategoryrollup WHERE roster_entry_id = OLD.id;
+    END
+    """,
+]
+
+
+def _0004_category_rollups(database: SqliteDatabase, migrator: SqliteMigrator) -> None:
+    """Per student category totals, filled in once and then kept up to date by triggers."""
+    database.execute_sql(
+        """
+        CREATE TABLE IF NOT EXISTS "studentcategoryrollup" (
+            "id" INTEGER NOT NULL PRIMARY KEY,
+            "roster_entry_id" INTEGER NOT NULL,
+            "category" VARCHAR(255) NOT NULL,
+            "points" REAL NOT NULL,
+            "possible" REAL NOT NULL,
+            "n_assignments" INTEGER NOT NULL,
+            FOREIGN KEY ("roster_entry_id") REFERENCES "classroster" ("id") ON DELETE CASCADE
+        )
+        """
+    )
+    _add_index(
+        database,
+        migrator,
+        "studentcategoryrollup",
+        ("roster_entry_id", "category"),
+        unique=True,
+    )
+    create_triggers(database, _V4_ROLLUP_TRIGGERS)
+    database.execute_sql(_V4_ROLLUP_INSERT_SQL.format(where="true"))
+
+
+def _0005_student_name_indexes(
+    database: SqliteDatabase, migrator: SqliteMigrator
+) -> None:
+    """Indexes for student listings sorted by name."""
+    _add_index(database, migrator, "student", ("last_name", "first_name"))
+    _add_index(database, migrator, "student", ("first_name", "last_name"))
+
+
+def _0006_assignment_category_version(
+    database: SqliteDatabase, migrator: SqliteMigrator
+) -> None:
+    """Bump the class assignment counter of every class when an assignment changes category."""
+    database.execute_sql(
+        """
+        CREATE TRIGGER IF NOT EXISTS dataversion_assignment_update
+        AFTER UPDATE OF category ON assignment
+        WHEN OLD.category IS NOT NEW.category
+        BEGIN
+            INSERT INTO dataversion (class_id, table_name, version)
+            SELECT class_ref_id, 'classassignment', 1 FROM classassignment
+            WHERE assignment_id = NEW.id
+            ON CONFLICT (class_id, table_name) DO UPDATE SET version = version + 1;
+        END
+        """
+    )
+
+
+MIGRATIONS: list[Migration] = [
+    Migration(1, "score lookup indexes", _0001_score_lookup_indexes),
+    Migration(2, "data version counters", _0002_data_versions),
+    Migration(3, "aggregate triggers", _0003_aggregate_triggers),
+    Migration(4, "category rollups", _0004_category_rollups),
+    Migration(5, "student name indexes", _0005_student_name_indexes),
+    Migration(6, "assignment category version", _0006_assignment_category_version),
+]
+
+
+def latest_version() -> int:
+    """The schema version of a fully migrated database."""
+    return max((m.version for m in MIGRATIONS), default=0)
+
+
+def get_schema_version(database: SqliteDatabase | None = None) -> int:
+    """
+    Gets the schema version stored in the database.
+
+    Args:
+        database (SqliteDatabase | None): the database, defaults to the initialized proxy
+
+    Returns:
+        int: the stored version, 0 for a database that predates migrations
+    """
+    database = database or db.obj
+    return database.execute_sql("PRAGMA user_version").fetchone()[0]
+
+
+def _set_schema_version(database: SqliteDatabase, version: int) -> None:
+    # PRAGMA does not take bound parameters
+    database.execute_sql(f"PRAGMA user_version = {int(version)}")
+
+
+def pending_migrations(database: SqliteDatabase | None = None) -> list[Migration]:
+    """
+    Gets the migrations that have not been applied to the database yet.
+
+    Args:
+        database (SqliteDatabase | None): the database, defaults to the initialized proxy
+
+    Returns:
+        list[Migration]: pending migrations in the order they will be applied
+    """
+    database = database or db.obj
+    current = get_schema_version(database)
+    return sorted(
+        (m for m in MIGRATIONS if m.version > current), key=lambda m: m.version
+    )
+
+
+def run_migrations(database: SqliteDatabase | None = None) -> list[int]:
+    """
+    Creates or upgrades the schema of a database.
+
+    A database without any gradebook tables is created from the current models and
+    triggers and stamped with the latest version. Otherwise each pending migration is applied in
+    its own transaction, together with the version bump, and ANALYZE is run once
+    at the end.
+
+    Args:
+        database (SqliteDatabase | None): the database, defaults to the initialized proxy
+
+    Returns:
+        list[int]: the versions that were applied (empty for a new or current database)
+    """
+    database = database or db.obj
+
+    if not database.table_exists(MODELS[0]._meta.table_name):
+        with database.bind_ctx(MODELS), database.atomic():
+            database.create_tables(MODELS)
+            create_triggers(database)
+            _set_schema_version(database, latest_version())
+        return []
+
+    migrator = SqliteMigrator(database)
+    applied = []
+    for migration in pending_migrations(database):
+        # Each index is built inside the migration's transaction, so readers keep
+        # working and a failure leaves the database at the previous version
+        with database.atomic():
+            migration.apply(database, migrator)
+            _set_schema_version(database, migration.version)
+        applied.append(migration.version)
+
+    if applied:
+        database.execute_sql("ANALYZE")
+    return applied
@@ -20,37 +20,85 @@ from enum import Enum
 # Use a DatabaseProxy so tests and apps can initialize the real DB at runtime
 db = DatabaseProxy()
 
-
-def init_db(db_path: str | None = None, sqlite_uri: str | None = None, create_tables: bool = False):
+# Named SQLite pragma sets for `init_db`. cache_size is negative so it is read as KiB.
+SQLITE_PROFILES: dict[str, dict[str, int | str]] = {
+    # interactive app: WAL so grading saves don't block reads, durable at checkpoints
+    "desktop": {
+        "journal_mode": "wal",
+        "synchronous": "normal",
+        "cache_size": -32 * 1024,
+        "mmap_size": 64 * 1024 * 1024,
+        "temp_store": "memory",
+        "foreign_keys": 1,
+        "busy_timeout": 5000,
+    },
+    # seeding / imports: trade durability for write throughput
+    "bulk-load": {
+        "journal_mode": "wal",
+        "synchronous": "off",
+        "cache_size": -128 * 1024,
+        "mmap_size": 256 * 1024 * 1024,
+        "temp_store": "memory",
+        "foreign_keys": 1,
+        "busy_timeout": 30000,
+    },
+    # reporting over large gradebooks: big cache and mmap for aggregate queries
+    "read-heavy": {
+        "journal_mode": "wal",
+        "synchronous": "normal",
+        "cache_size": -64 * 1024,
+        "mmap_size": 512 * 1024 * 1024,
+        "temp_store": "memory",
+        "foreign_keys": 1,
+        "busy_timeout": 10000,
+    },
+}
+
+
+def init_db(
+    db_path: str | None = None,
+    sqlite_uri: str | None = None,
+    create_tables: bool = False,
+    profile: str | None = None,
+):
     """Initialize the database proxy.
 
     Provide either a file path (`db_path`) or a SQLite URI (`sqlite_uri`).
     If neither is provided, uses the `DB_PATH` env var or `gradebook.db`.
 
-    If `create_tables` is True, creates all tables after initializing.
+    `profile` selects one of `SQLITE_PROFILES` ("desktop", "bulk-load",
+    "read-heavy"); the pragmas are applied to every connection. If omitted,
+    SQLite's defaults are used.
+
+    If `create_tables` is True, creates all tables after initializing, or
+    upgrades an existing database by applying any pending migrations.
+
+    Raises:
+        ValueError: If `profile` is not a known profile name.
     """
+    if profile is not None and profile not in SQLITE_PROFILES:
+        raise ValueError(
+            f"Invalid profile '{profile}'. Allowed: {list(SQLITE_PROFILES)}"
+        )
+    pragmas = SQLITE_PROFILES[profile] if profile else None
+
     DB_PATH = db_path or os.getenv("DB_PATH", "gradebook.db")
     if sqlite_uri:
-        real_db = SqliteDatabase(sqlite_uri)
+        real_db = SqliteDatabase(sqlite_uri, pragmas=pragmas)
     else:
-        real_db = SqliteDatabase(DB_PATH)
+        real_db = SqliteDatabase(DB_PATH, pragmas=pragmas)
 
     db.initialize(real_db)
+    # cached grades are keyed by class id, which the new database reuses
+    from gradebook.database.services.scoring import grade_cache
+
+    grade_cache.invalidate()
     if create_tables:
-        real_db.connect()
-        real_db.create_tables(
-            [
-                Class,
-                Student,
-                ClassRoster,
-                Assignment,
-                AssignmentQuestion,
-                ClassAssignment,
-                StudentAssignmentScore,
-                AssignmentCategoryWeight,
-                StudentQuestionScore,
-            ]
-        )
+        # imported here, migrations depends on the models defined below
+        from gradebook.database.migrations import run_migrations
+
+        real_db.connect(reuse_if_open=True)
+        run_migrations(real_db)
 
 
 class BaseModel(Model):
@@ -77,6 +125,12 @@ class Student(BaseModel):
     first_name = CharField()
     last_name = CharField()
 
+    class Meta:
+        indexes = (
+            (("last_name", "first_name"), False),  # keyset pages sorted by name
+            (("first_name", "last_name"), False),
+        )
+
 
 class ClassRoster(BaseModel):
     """Link between a Class and a Student."""
@@ -86,7 +140,10 @@ class ClassRoster(BaseModel):
     student = ForeignKeyField(Student, backref="classes", on_delete="CASCADE")
 
     class Meta:
-        indexes = ((("class_ref", "student"), True),)  # unique constraint
+        indexes = (
+            (("class_ref", "student"), True),  # unique constraint
+            (("student", "class_ref"), False),  # student -> enrollments lookups
+        )
 
 
 class Assignment(BaseModel):
@@ -106,6 +163,9 @@ class Assignment(BaseModel):
 
     category = CharField(choices=[(c, c) for c in ASSIGNMENT_CATEGORIES])
 
+    class Meta:
+        indexes = ((("category",), False),)
+
 
 class Category(Enum):
     QUIZ = "quiz"
@@ -137,7 +197,10 @@ class ClassAssignment(BaseModel):
     total_points = FloatField(default=0.0)
 
     class Meta:
-        indexes = ((("class_ref", "assignment"), True),)
+        indexes = (
+            (("class_ref", "assignment"), True),
+            (("assignment", "class_ref"), False),  # assignment -> classes lookups
+        )
 
 
 class StudentAssignmentScore(BaseModel):
@@ -151,6 +214,9 @@ class StudentAssignmentScore(BaseModel):
     total_score = FloatField()
     total_time = IntegerField(null=True)  # in seconds, optional
 
+    class Meta:
+        indexes = ((("roster_entry", "class_assignment"), True),)
+
 
 class StudentQuestionScore(BaseModel):
     """Stores a student's score for each question."""
@@ -178,5 +244,65 @@ class AssignmentCategoryWeight(BaseModel):
         indexes = ((("class_ref", "category"), True),)
 
 
+class DataVersion(BaseModel):
+    """
+    Per class change counter of a table, bumped by triggers on every write to the
+    table that touches the class. See `gradebook.database.triggers`.
+    """
+
+    # the tables that are versioned
+    TABLES = (
+        "classroster",
+        "classassignment",
+        "studentquestionscore",
+        "studentassignmentscore",
+        "assignmentcategoryweight",
+    )
+
+    id = AutoField()
+    # not a foreign key, the counters of a deleted class are bumped while it is deleted
+    class_id = IntegerField()
+    table_name = CharField()
+    version = IntegerField(default=0)
+
+    class Meta:
+        indexes = ((("class_id", "table_name"), True),)
+
+
+class StudentCategoryRollup(BaseModel):
+    """
+    A student's running totals for one category of a class: the points scored, the
+    points possible and the number of assignments. Maintained by triggers on every
+    score, question, assignment and roster write, see `gradebook.database.triggers`.
+    """
+
+    id = AutoField()
+    roster_entry = ForeignKeyField(
+        ClassRoster, backref="category_rollups", on_delete="CASCADE"
+    )
+    category = CharField()
+    points = FloatField(default=0.0)
+    possible = FloatField(default=0.0)
+    n_assignments = IntegerField(default=0)
+
+    class Meta:
+        indexes = ((("roster_entry", "category"), True),)
+
+
+# Every table, in an order that satisfies foreign keys when creating
+MODELS = [
+    Class,
+    Student,
+    ClassRoster,
+    Assignment,
+    AssignmentQuestion,
+    ClassAssignment,
+    StudentAssignmentScore,
+    AssignmentCategoryWeight,
+    StudentQuestionScore,
+    DataVersion,
+    StudentCategoryRollup,
+]
+
 # NOTE: table creation is deliberatey not executed at import time.
 # Call `init_db(create_tables=True)` from application/test setup to create tables.
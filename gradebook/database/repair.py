@@ -0,0 +1,54 @@
+"""
+Repairs the derived score data of a gradebook database.
+
+Recomputes the stored assignment totals with `scoring.repair_totals` and the
+category rollups of every class with `scoring.rebuild_rollups`. Triggers keep both
+up to date, this is for databases written before the triggers existed or edited
+with them bypassed.
+
+Run from the repository root:
+
+    python -m gradebook.database.repair --db gradebook.db
+"""
+
+import argparse
+
+from gradebook.database.models import Class, init_db
+from gradebook.database.services import scoring
+
+
+def repair(class_id: int | None = None) -> tuple[int, int]:
+    """
+    Repairs the totals and rollups of one class or of every class.
+
+    Args:
+        class_id (int | None): the class to repair, None for every class
+
+    Returns:
+        tuple[int, int]: the number of totals corrected and of rollup rows rebuilt
+    """
+    totals = scoring.repair_totals(class_id)
+    if class_id is None:
+        class_ids = [row[0] for row in Class.select(Class.id).tuples()]
+    else:
+        class_ids = [class_id]
+    rollups = sum(scoring.rebuild_rollups(id_) for id_ in class_ids)
+    return totals, rollups
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument(
+        "--db", help="database file, defaults to the DB_PATH variable or gradebook.db"
+    )
+    parser.add_argument("--class-id", type=int, help="only repair this class")
+    args = parser.parse_args(argv)
+
+    # brings an older database up to date first, so the rollup table exists
+    init_db(db_path=args.db, profile="desktop", create_tables=True)
+    totals, rollups = repair(args.class_id)
+    print(f"Corrected {totals} totals, rebuilt {rollups} rollup rows.")
+
+
+if __name__ == "__main__":
+    main()
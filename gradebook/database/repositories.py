@@ -1,4 +1,5 @@
-from peewee import prefetch
+from collections.abc import Iterator
+from peewee import JOIN, Tuple, fn, prefetch, chunked
 from .models import (
     Assignment,
     AssignmentQuestion,
@@ -9,8 +10,10 @@ from .models import (
     StudentQuestionScore,
     StudentAssignmentScore,
     AssignmentCategoryWeight,
+    DataVersion,
 )
 from .dtos import (
+    AssignmentScoreGridDTO,
     StudentDTO,
     AssignmentDTO,
     AssignmentQuestionDTO,
@@ -22,6 +25,46 @@ from .dtos import (
 )
 
 
+# SQLite builds compiled before 3.32 allow 999 bound variables per statement, get-many
+# lookups bind at most this many values per IN (...)
+IN_CHUNK_SIZE = 999
+
+# Columns in DTO field order, so a `.tuples()` row unpacks straight into the DTO
+STUDENT_COLUMNS = (Student.id, Student.student_number, Student.first_name, Student.last_name)
+CLASS_COLUMNS = (Class.id, Class.name, Class.start_date, Class.end_date)
+QUESTION_COLUMNS = (
+    AssignmentQuestion.id,
+    AssignmentQuestion.assignment,
+    AssignmentQuestion.text,
+    AssignmentQuestion.point_value,
+)
+CLASS_ASSIGNMENT_COLUMNS = (
+    ClassAssignment.id,
+    ClassAssignment.class_ref,
+    ClassAssignment.assignment,
+    ClassAssignment.total_points,
+)
+CATEGORY_WEIGHT_COLUMNS = (
+    AssignmentCategoryWeight.id,
+    AssignmentCategoryWeight.class_ref,
+    AssignmentCategoryWeight.category,
+    AssignmentCategoryWeight.weight,
+)
+ASSIGNMENT_SCORE_COLUMNS = (
+    StudentAssignmentScore.id,
+    StudentAssignmentScore.roster_entry,
+    StudentAssignmentScore.class_assignment,
+    StudentAssignmentScore.total_score,
+    StudentAssignmentScore.total_time,
+)
+QUESTION_SCORE_COLUMNS = (
+    StudentQuestionScore.id,
+    StudentQuestionScore.student,
+    StudentQuestionScore.assignment_question,
+    StudentQuestionScore.points_scored,
+)
+
+
 def create_student_dto(student_number: str, first_name: str, last_name: str) -> StudentDTO:
     s = Student.create(student_number=student_number, first_name=first_name, last_name=last_name)
     return StudentDTO(id=s.id, student_number=s.student_number, first_name=s.first_name, last_name=s.last_name)
@@ -35,161 +78,285 @@ def get_student_by_number(student_number: str) -> Student | None:
     return Student.get_or_none(Student.student_number == student_number)
 
 
+def _chunks(values):
+    """Distinct values, in chunks small enough for one IN (...) each."""
+    return chunked(list(dict.fromkeys(values)), IN_CHUNK_SIZE)
+
+
+def _dtos_by_key(dto, columns, key, values) -> dict:
+    """
+    Fetches the rows whose `key` column is one of `values` as DTOs keyed by that column,
+    one query per chunk of values.
+    """
+    # Fields overload ==, so look the key up by identity rather than columns.index()
+    key_index = next(i for i, column in enumerate(columns) if column is key)
+    model = columns[0].model
+    result = {}
+    for chunk in _chunks(values):
+        for row in model.select(*columns).where(key.in_(chunk)).tuples():
+            result[row[key_index]] = dto(*row)
+    return result
+
+
+def get_students_dto_by_numbers(student_numbers) -> dict[str, StudentDTO]:
+    return _dtos_by_key(StudentDTO, STUDENT_COLUMNS, Student.student_number, student_numbers)
+
+
+def get_students_dto_many(student_ids) -> dict[int, StudentDTO]:
+    return _dtos_by_key(StudentDTO, STUDENT_COLUMNS, Student.id, student_ids)
+
+
+def get_classes_dto_many(class_ids) -> dict[int, ClassDTO]:
+    return _dtos_by_key(ClassDTO, CLASS_COLUMNS, Class.id, class_ids)
+
+
+def get_assignment_questions_dto_many(question_ids) -> dict[int, AssignmentQuestionDTO]:
+    return _dtos_by_key(
+        AssignmentQuestionDTO, QUESTION_COLUMNS, AssignmentQuestion.id, question_ids
+    )
+
+
+def count_students_in_classes(class_ids) -> dict[int, int]:
+    counts = dict.fromkeys(class_ids, 0)
+    for chunk in _chunks(class_ids):
+        counts.update(
+            ClassRoster.select(ClassRoster.class_ref, fn.COUNT(ClassRoster.id))
+            .where(ClassRoster.class_ref.in_(chunk))
+            .group_by(ClassRoster.class_ref)
+            .tuples()
+        )
+    return counts
+
+
 def get_student_by_number_dto(student_number: str) -> StudentDTO | None:
-    s = get_student_by_number(student_number)
-    if s is None:
-        return None
-    return StudentDTO(id=s.id, student_number=s.student_number, first_name=s.first_name, last_name=s.last_name)
+    row = (
+        Student.select(*STUDENT_COLUMNS)
+        .where(Student.student_number == student_number)
+        .tuples()
+        .first()
+    )
+    return None if row is None else StudentDTO(*row)
 
 
 def get_class_dto(class_id: int) -> ClassDTO | None:
-    cls = Class.get_or_none(Class.id == class_id)
-    if cls is None:
-        return None
-    return ClassDTO(
-        id=cls.id,
-        name=cls.name,
-        start_date=cls.start_date,
-        end_date=cls.end_date,
-    )
+    row = Class.select(*CLASS_COLUMNS).where(Class.id == class_id).tuples().first()
+    return None if row is None else ClassDTO(*row)
 
 
 def get_all_classes_dto() -> list[ClassDTO]:
-    return [
-        ClassDTO(
-            id=cls.id,
-            name=cls.name,
-            start_date=cls.start_date,
-            end_date=cls.end_date,
-        )
-        for cls in Class.select()
-    ]
+    return [ClassDTO(*row) for row in Class.select(*CLASS_COLUMNS).tuples()]
 
 
 def get_all_students_dto() -> list[StudentDTO]:
-    return [
-        StudentDTO(
-            id=s.id,
-            student_number=s.student_number,
-            first_name=s.first_name,
-            last_name=s.last_name,
-        )
-        for s in Student.select()
-    ]
+    return [StudentDTO(*row) for row in Student.select(*STUDENT_COLUMNS).tuples()]
 
 
 def get_students_for_class_dto(class_id: int) -> list[StudentDTO]:
     students = (
-        Student.select()
+        Student.select(*STUDENT_COLUMNS)
         .join(ClassRoster)
-        .join(Class)
-        .where(Class.id == class_id)
+        .where(ClassRoster.class_ref == class_id)
+        .tuples()
     )
-    return [
-        StudentDTO(
-            id=s.id,
-            student_number=s.student_number,
-            first_name=s.first_name,
-            last_name=s.last_name,
+    return [StudentDTO(*row) for row in students]
+
+
+# rows fetched per keyset query by the iter_* generators
+ITER_CHUNK_SIZE = 500
+
+
+def _iter_by_id(dto, query, key, chunk_size: int):
+    """
+    Yields `query`'s rows as DTOs in `key` order, `chunk_size` rows per query.
+
+    Each chunk restarts after the last key seen rather than using OFFSET, and rows are
+    read with `.iterator()` so peewee does not cache them. The query's first column
+    must hold the value of `key`.
+    """
+    after = None
+    while True:
+        chunk = query.order_by(key).limit(chunk_size)
+        if after is not None:
+            chunk = chunk.where(key > after)
+        n = 0
+        for row in chunk.tuples().iterator():
+            n += 1
+            yield dto(*row)
+        if n < chunk_size:
+            return
+        after = row[0]
+
+
+def iter_all_classes_dto(chunk_size: int = ITER_CHUNK_SIZE) -> Iterator[ClassDTO]:
+    return _iter_by_id(ClassDTO, Class.select(*CLASS_COLUMNS), Class.id, chunk_size)
+
+
+def iter_all_students_dto(chunk_size: int = ITER_CHUNK_SIZE) -> Iterator[StudentDTO]:
+    return _iter_by_id(StudentDTO, Student.select(*STUDENT_COLUMNS), Student.id, chunk_size)
+
+
+def iter_students_for_class_dto(
+    class_id: int, chunk_size: int = ITER_CHUNK_SIZE
+) -> Iterator[StudentDTO]:
+    students = (
+        Student.select(*STUDENT_COLUMNS)
+        .join(ClassRoster)
+        .where(ClassRoster.class_ref == class_id)
+    )
+    # keyed on the roster column so the (class_ref, student) index drives each chunk
+    return _iter_by_id(StudentDTO, students, ClassRoster.student, chunk_size)
+
+
+# keyset sort orders for student pages, each ends with the id so the key is unique
+STUDENT_SORT_KEYS: dict[str, tuple[str, ...]] = {
+    "student_number": ("student_number", "id"),
+    "last_name": ("last_name", "first_name", "id"),
+    "first_name": ("first_name", "last_name", "id"),
+}
+
+
+# keyset sort orders for class pages, each ends with the id so the key is unique
+CLASS_SORT_KEYS: dict[str, tuple[str, ...]] = {
+    "name": ("name", "id"),
+    "id": ("id",),
+}
+
+
+def _keyset_page(query, model, sort_key: tuple[str, ...], descending, after, limit):
+    """
+    Orders `query` by the `sort_key` columns of `model` and keeps the `limit` rows
+    that come right after the key `after`, or the first `limit` rows when it is None.
+    """
+    fields = [getattr(model, name) for name in sort_key]
+    if after is not None:
+        key = Tuple(*fields)
+        query = query.where(key < Tuple(*after) if descending else key > Tuple(*after))
+    return query.order_by(*[f.desc() if descending else f for f in fields]).limit(limit)
+
+
+def _students_query(class_id: int | None, search: str | None):
+    query = Student.select(*STUDENT_COLUMNS)
+    if class_id is not None:
+        query = query.join(ClassRoster).where(ClassRoster.class_ref == class_id)
+    if search:
+        query = query.where(
+            Student.student_number.contains(search)
+            | Student.last_name.contains(search)
+            | Student.first_name.contains(search)
         )
-        for s in students
-    ]
+    return query
+
+
+def list_students_dto(
+    class_id: int | None = None,
+    sort: str = "last_name",
+    descending: bool = False,
+    after: tuple | None = None,
+    limit: int = 200,
+    search: str | None = None,
+) -> list[StudentDTO]:
+    query = _keyset_page(
+        _students_query(class_id, search),
+        Student,
+        STUDENT_SORT_KEYS[sort],
+        descending,
+        after,
+        limit,
+    )
+    return [StudentDTO(*row) for row in query.tuples()]
+
+
+def count_students(class_id: int | None = None, search: str | None = None) -> int:
+    return _students_query(class_id, search).count()
+
+
+def _classes_query(search: str | None):
+    query = Class.select(*CLASS_COLUMNS)
+    if search:
+        query = query.where(Class.name.contains(search))
+    return query
+
+
+def list_classes_dto(
+    sort: str = "name",
+    descending: bool = False,
+    after: tuple | None = None,
+    limit: int = 200,
+    search: str | None = None,
+) -> list[ClassDTO]:
+    query = _keyset_page(
+        _classes_query(search), Class, CLASS_SORT_KEYS[sort], descending, after, limit
+    )
+    return [ClassDTO(*row) for row in query.tuples()]
+
+
+def count_classes(search: str | None = None) -> int:
+    return _classes_query(search).count()
 
 
 def get_classes_for_student_dto(student_id: int) -> list[ClassDTO]:
     classes = (
-        Class.select()
+        Class.select(*CLASS_COLUMNS)
         .join(ClassRoster)
         .where(ClassRoster.student == student_id)
+        .tuples()
     )
-    return [
-        ClassDTO(
-            id=cls.id,
-            name=cls.name,
-            start_date=cls.start_date,
-            end_date=cls.end_date,
-        )
-        for cls in classes
-    ]
+    return [ClassDTO(*row) for row in classes]
 
 
 def get_class_assignment_dto(class_assignment_id: int) -> ClassAssignmentDTO | None:
-    ca = ClassAssignment.get_or_none(ClassAssignment.id == class_assignment_id)
-    if ca is None:
-        return None
-    return ClassAssignmentDTO(
-        id=ca.id,
-        class_id=ca.class_ref.id,
-        assignment_id=ca.assignment.id,
-        total_points=ca.total_points,
+    row = (
+        ClassAssignment.select(*CLASS_ASSIGNMENT_COLUMNS)
+        .where(ClassAssignment.id == class_assignment_id)
+        .tuples()
+        .first()
     )
+    return None if row is None else ClassAssignmentDTO(*row)
 
 
 def get_student_assignment_score_dto(score_id: int) -> StudentAssignmentScoreDTO | None:
-    sas = StudentAssignmentScore.get_or_none(StudentAssignmentScore.id == score_id)
-    if sas is None:
-        return None
-    return StudentAssignmentScoreDTO(
-        id=sas.id,
-        roster_entry_id=sas.roster_entry.id,
-        class_assignment_id=sas.class_assignment.id,
-        total_score=sas.total_score,
-        total_time=sas.total_time,
+    row = (
+        StudentAssignmentScore.select(*ASSIGNMENT_SCORE_COLUMNS)
+        .where(StudentAssignmentScore.id == score_id)
+        .tuples()
+        .first()
     )
+    return None if row is None else StudentAssignmentScoreDTO(*row)
 
 
 def get_student_question_score_dto(score_id: int) -> StudentQuestionScoreDTO | None:
-    sqs = StudentQuestionScore.get_or_none(StudentQuestionScore.id == score_id)
-    if sqs is None:
-        return None
-    return StudentQuestionScoreDTO(
-        id=sqs.id,
-        student_id=sqs.student.id,
-        assignment_question_id=sqs.assignment_question.id,
-        points_scored=sqs.points_scored,
+    row = (
+        StudentQuestionScore.select(*QUESTION_SCORE_COLUMNS)
+        .where(StudentQuestionScore.id == score_id)
+        .tuples()
+        .first()
     )
+    return None if row is None else StudentQuestionScoreDTO(*row)
 
 
 def get_student_question_scores_for_assignment_dto(
     assignment_id: int, student_id: int
 ) -> list[StudentQuestionScoreDTO]:
     scores = (
-        StudentQuestionScore.select()
-        .join(Student, on=(StudentQuestionScore.student == Student.id))
-        .join(
-            AssignmentQuestion,
-            on=(StudentQuestionScore.assignment_question == AssignmentQuestion.id),
+        StudentQuestionScore.select(*QUESTION_SCORE_COLUMNS)
+        .join(AssignmentQuestion)
+        .where(
+            StudentQuestionScore.student == student_id,
+            AssignmentQuestion.assignment == assignment_id,
         )
-        .join(Assignment, on=(AssignmentQuestion.assignment == Assignment.id))
-        .where(Student.id == student_id, Assignment.id == assignment_id)
+        .tuples()
     )
-    return [
-        StudentQuestionScoreDTO(
-            id=sqs.id,
-            student_id=sqs.student.id,
-            assignment_question_id=sqs.assignment_question.id,
-            points_scored=sqs.points_scored,
-        )
-        for sqs in scores
-    ]
+    return [StudentQuestionScoreDTO(*row) for row in scores]
 
 
 def get_student_assignment_scores_for_student_dto(student_id: int) -> list[StudentAssignmentScoreDTO]:
     scores = (
-        StudentAssignmentScore.select()
+        StudentAssignmentScore.select(*ASSIGNMENT_SCORE_COLUMNS)
         .join(ClassRoster)
         .where(ClassRoster.student == student_id)
+        .tuples()
     )
-    return [
-        StudentAssignmentScoreDTO(
-            id=sas.id,
-            roster_entry_id=sas.roster_entry.id,
-            class_assignment_id=sas.class_assignment.id,
-            total_score=sas.total_score,
-            total_time=sas.total_time,
-        )
-        for sas in scores
-    ]
+    return [StudentAssignmentScoreDTO(*row) for row in scores]
 
 
 def get_class_by_id(class_id: int) -> Class | None:
@@ -208,34 +375,36 @@ def get_class_by_id(class_id: int) -> Class | None:
         for cls in classes
     ]
 
-def get_category_weight_dto(class_id: int, category: str) -> AssignmentCategoryWeightDTO | None:
-    obj = AssignmentCategoryWeight.get_or_none(
-        (AssignmentCategoryWeight.class_ref == class_id)
-        & (AssignmentCategoryWeight.category == category)
+def get_class_versions(class_id: int) -> dict[str, int]:
+    versions = dict.fromkeys(DataVersion.TABLES, 0)
+    versions.update(
+        DataVersion.select(DataVersion.table_name, DataVersion.version)
+        .where(DataVersion.class_id == class_id)
+        .tuples()
     )
-    if obj is None:
-        return None
-    return AssignmentCategoryWeightDTO(
-        id=obj.id,
-        class_id=obj.class_ref.id,
-        category=obj.category,
-        weight=obj.weight,
+    return versions
+
+
+def get_category_weight_dto(class_id: int, category: str) -> AssignmentCategoryWeightDTO | None:
+    row = (
+        AssignmentCategoryWeight.select(*CATEGORY_WEIGHT_COLUMNS)
+        .where(
+            (AssignmentCategoryWeight.class_ref == class_id)
+            & (AssignmentCategoryWeight.category == category)
+        )
+        .tuples()
+        .first()
     )
+    return None if row is None else AssignmentCategoryWeightDTO(*row)
 
 
 def get_category_weights_for_class_dto(class_id: int) -> list[AssignmentCategoryWeightDTO]:
-    weights = AssignmentCategoryWeight.select().where(
-        AssignmentCategoryWeight.class_ref == class_id
+    weights = (
+        AssignmentCategoryWeight.select(*CATEGORY_WEIGHT_COLUMNS)
+        .where(AssignmentCategoryWeight.class_ref == class_id)
+        .tuples()
     )
-    return [
-        AssignmentCategoryWeightDTO(
-            id=w.id,
-            class_id=w.class_ref.id,
-            category=w.category,
-            weight=w.weight,
-        )
-        for w in weights
-    ]
+    return [AssignmentCategoryWeightDTO(*row) for row in weights]
 
 def get_class_by_id(class_id: int) -> Class | None:
     """Return Class or None for the given id."""
@@ -256,51 +425,151 @@ def fetch_assignments_for_class(class_id: int, category: str | None = None):
 
 
 def get_assignment_question_dto(question_id: int) -> AssignmentQuestionDTO | None:
-    q = AssignmentQuestion.get_or_none(AssignmentQuestion.id == question_id)
-    if q is None:
-        return None
-    return AssignmentQuestionDTO(
-        id=q.id,
-        assignment_id=q.assignment.id,
-        text=q.text,
-        point_value=q.point_value,
+    row = (
+        AssignmentQuestion.select(*QUESTION_COLUMNS)
+        .where(AssignmentQuestion.id == question_id)
+        .tuples()
+        .first()
     )
+    return None if row is None else AssignmentQuestionDTO(*row)
 
 
 def get_questions_for_assignment_dto(assignment_id: int) -> list[AssignmentQuestionDTO]:
-    questions = AssignmentQuestion.select().where(AssignmentQuestion.assignment == assignment_id)
-    return [
-        AssignmentQuestionDTO(
-            id=q.id,
-            assignment_id=q.assignment.id,
-            text=q.text,
-            point_value=q.point_value,
+    questions = (
+        AssignmentQuestion.select(*QUESTION_COLUMNS)
+        .where(AssignmentQuestion.assignment == assignment_id)
+        .tuples()
+    )
+    return [AssignmentQuestionDTO(*row) for row in questions]
+
+
+def _assignments_with_questions(assignments) -> list[AssignmentDTO]:
+    """
+    Builds AssignmentDTOs with their questions from a query of Assignment rows, in two
+    queries however many assignments match: the assignments, then all their questions.
+    """
+    assignments = assignments.select(
+        Assignment.id, Assignment.title, Assignment.category
+    ).order_by(Assignment.id)
+    dtos = [AssignmentDTO(*row, questions=[]) for row in assignments.tuples()]
+    if not dtos:
+        return dtos
+
+    by_id = {a.id: a for a in dtos}
+    questions = (
+        AssignmentQuestion.select(*QUESTION_COLUMNS)
+        .where(
+            AssignmentQuestion.assignment.in_(
+                assignments.select(Assignment.id).order_by()
+            )
         )
-        for q in questions
-    ]
+        .order_by(AssignmentQuestion.id)
+        .tuples()
+    )
+    for row in questions:
+        by_id[row[1]].questions.append(AssignmentQuestionDTO(*row))
+    return dtos
 
 
 def get_assignment_dto(assignment_id: int) -> AssignmentDTO | None:
-    assignment = Assignment.get_or_none(Assignment.id == assignment_id)
-    if assignment is None:
-        return None
-    questions = get_questions_for_assignment_dto(assignment_id)
-    return AssignmentDTO(
-        id=assignment.id,
-        title=assignment.title,
-        category=assignment.category,
-        questions=questions,
+    assignments = _assignments_with_questions(
+        Assignment.select().where(Assignment.id == assignment_id)
     )
+    return assignments[0] if assignments else None
+
+
+def get_assignments_dto_many(assignment_ids) -> dict[int, AssignmentDTO]:
+    assignments = {}
+    for chunk in _chunks(assignment_ids):
+        for a in _assignments_with_questions(
+            Assignment.select().where(Assignment.id.in_(chunk))
+        ):
+            assignments[a.id] = a
+    return assignments
 
 
 def get_assignments_for_class_dto(class_id: int, category: str | None = None) -> list[AssignmentDTO]:
-    assignments = fetch_assignments_for_class(class_id, category)
-    return [
-        AssignmentDTO(
-            id=assignment.id,
-            title=assignment.title,
-            category=assignment.category,
-            questions=get_questions_for_assignment_dto(assignment.id),
-        )
-        for assignment in assignments
+    assignments = (
+        Assignment.select()
+        .join(ClassAssignment)
+        .where(ClassAssignment.class_ref == class_id)
+    )
+    if category:
+        assignments = assignments.where(Assignment.category == category)
+    return _assignments_with_questions(assignments)
+
+
+def get_assignment_score_grid_dto(class_id: int, assignment_id: int) -> AssignmentScoreGridDTO:
+    questions = [
+        AssignmentQuestionDTO(*row)
+        for row in AssignmentQuestion.select(*QUESTION_COLUMNS)
+        .where(AssignmentQuestion.assignment == assignment_id)
+        .order_by(AssignmentQuestion.id)
+        .tuples()
     ]
+
+    # roster with each student's time, missing score records leave the time as None
+    class_assignment = ClassAssignment.select(ClassAssignment.id).where(
+        (ClassAssignment.class_ref == class_id)
+        & (ClassAssignment.assignment == assignment_id)
+    )
+    roster = (
+        ClassRoster.select(
+            Student.id,
+            Student.student_number,
+            Student.first_name,
+            Student.last_name,
+            StudentAssignmentScore.total_time,
+        )
+        .join(Student)
+        .switch(ClassRoster)
+        .join(
+            StudentAssignmentScore,
+            JOIN.LEFT_OUTER,
+            on=(
+                (StudentAssignmentScore.roster_entry == ClassRoster.id)
+                & (StudentAssignmentScore.class_assignment.in_(class_assignment))
+            ),
+        )
+        .where(ClassRoster.class_ref == class_id)
+        .order_by(ClassRoster.id)
+        .tuples()
+    )
+    students = []
+    times = []
+    for sid, number, first, last, total_time in roster:
+        students.append(StudentDTO(sid, number, first, last))
+        times.append(total_time)
+
+    scores = (
+        StudentQuestionScore.select(
+            StudentQuestionScore.student,
+            StudentQuestionScore.assignment_question,
+            StudentQuestionScore.points_scored,
+        )
+        .join(AssignmentQuestion)
+        .switch(StudentQuestionScore)
+        .join(
+            ClassRoster,
+            on=(
+                (ClassRoster.student == StudentQuestionScore.student)
+                & (ClassRoster.class_ref == class_id)
+            ),
+        )
+        .where(AssignmentQuestion.assignment == assignment_id)
+        .tuples()
+    )
+    row_index = {s.id: r for r, s in enumerate(students)}
+    column_index = {q.id: c for c, q in enumerate(questions)}
+    grid: list[list[float | None]] = [[None] * len(questions) for _ in students]
+    for sid, qid, points in scores:
+        grid[row_index[sid]][column_index[qid]] = points
+
+    return AssignmentScoreGridDTO(
+        class_id=class_id,
+        assignment_id=assignment_id,
+        students=students,
+        questions=questions,
+        scores=grid,
+        times=times,
+    )
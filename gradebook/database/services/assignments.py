@@ -7,13 +7,14 @@ from gradebook.database.models import (
     ClassAssignment,
     Class,
 )
-from gradebook.database.models import db
 from peewee import IntegrityError
 from peewee import prefetch
-from gradebook.database.services import scoring
+from gradebook.database.services import events, scoring
 from gradebook.database.repositories import (
     fetch_assignments_for_class,
     get_assignment_dto as repo_get_assignment_dto,
+    get_assignments_dto_many as repo_get_assignments_dto_many,
+    get_assignment_questions_dto_many as repo_get_assignment_questions_dto_many,
     get_class_dto as repo_get_class_dto,
     get_assignment_question_dto as repo_get_assignment_question_dto,
     get_questions_for_assignment_dto as repo_get_questions_for_assignment_dto,
@@ -49,8 +50,9 @@ def create_assignment(
         )
 
     # create within a transaction to ensure questions and assignment persist together
-    with db.atomic():
+    with events.atomic():
         assignment = Assignment.create(title=title, category=category)
+        events.publish(events.AssignmentCreated(assignment.id))
         if not questions:
             return assignment
 
@@ -97,10 +99,14 @@ def assign_to_class(cls: "Class", assignment: Assignment) -> ClassAssignment:
 
     # This will raise IntegrityError if the class_ref/assignment combination already exists.
     # Create inside a transaction to ensure consistency
-    with db.atomic():
-        return ClassAssignment.create(
+    with events.atomic():
+        class_assignment = ClassAssignment.create(
             class_ref=cls, assignment=assignment, total_points=total_points
         )
+        events.publish(
+            events.AssignmentAssigned(class_assignment.class_ref_id, assignment.id)
+        )
+    return class_assignment
 
 
 def get_assignments_for_class(class_id: int, category: str = None) -> list[Assignment]:
@@ -122,6 +128,16 @@ def get_assignment_dto(assignment_id: int):
     return repo_get_assignment_dto(assignment_id)
 
 
+def get_assignments_dto_many(assignment_ids: list[int]):
+    """
+    Retrieve many assignment DTOs with their questions by ID, two queries per 999 ids.
+
+    Returns:
+        dict[int, AssignmentDTO]: Assignments keyed by ID. Unknown IDs are left out.
+    """
+    return repo_get_assignments_dto_many(assignment_ids)
+
+
 def get_assignments_for_class_dto(class_id: int, category: str = None):
     """Retrieve assignment DTOs for a class."""
     return repo_get_assignments_for_class_dto(class_id, category)
@@ -132,6 +148,16 @@ def get_assignment_question_dto(question_id: int):
     return repo_get_assignment_question_dto(question_id)
 
 
+def get_assignment_questions_dto_many(question_ids: list[int]):
+    """
+    Retrieve many assignment question DTOs by ID, one query per 999 ids.
+
+    Returns:
+        dict[int, AssignmentQuestionDTO]: Questions keyed by ID. Unknown IDs are left out.
+    """
+    return repo_get_assignment_questions_dto_many(question_ids)
+
+
 def get_questions_for_assignment_dto(assignment_id: int):
     """Retrieve question DTOs for an assignment."""
     return repo_get_questions_for_assignment_dto(assignment_id)
@@ -1,3 +1,4 @@
+from collections.abc import Iterator
 from typing import TYPE_CHECKING
 from peewee import IntegrityError
 from gradebook.database.models import Class, ClassRoster, Student
@@ -6,8 +7,17 @@ from gradebook.database.repositories import (
     get_class_dto as repo_get_class_dto,
     get_all_classes_dto as repo_get_all_classes_dto,
     get_students_for_class_dto as repo_get_students_for_class_dto,
+    get_class_versions as repo_get_class_versions,
+    get_classes_dto_many as repo_get_classes_dto_many,
+    count_students_in_classes as repo_count_students_in_classes,
+    iter_all_classes_dto as repo_iter_all_classes_dto,
+    iter_students_for_class_dto as repo_iter_students_for_class_dto,
+    list_classes_dto as repo_list_classes_dto,
+    count_classes as repo_count_classes,
+    CLASS_SORT_KEYS,
 )
-from gradebook.database.dtos import ClassDTO, StudentDTO
+from gradebook.database.dtos import ClassDTO, PageDTO, StudentDTO
+from gradebook.database.services import events, pagination
 from datetime import datetime
 
 
@@ -24,7 +34,9 @@ def create_class(name: str, start_date: datetime | None = None, end_date: dateti
     Raises:
         IntegrityError: If a class with the same name already exists.
     """
-    return Class.create(name=name, start_date=start_date, end_date=end_date)
+    cls = Class.create(name=name, start_date=start_date, end_date=end_date)
+    events.publish(events.ClassCreated(cls.id))
+    return cls
 
 
 def enroll_student(cls: Class, student: "Student") -> ClassRoster:
@@ -41,7 +53,12 @@ def enroll_student(cls: Class, student: "Student") -> ClassRoster:
     Raises:
         IntegrityError: If the student is already enrolled in the class.
     """
-    return ClassRoster.get_or_create(class_ref=cls, student=student)[0]
+    entry, created = ClassRoster.get_or_create(class_ref=cls, student=student)
+    if created:
+        events.publish(
+            events.StudentEnrolled(entry.class_ref_id, entry.student_id, entry.id)
+        )
+    return entry
 
 
 def get_all_classes() -> list[Class]:
@@ -67,6 +84,19 @@ def get_number_of_students_in_class(cls: Class) -> int:
     return ClassRoster.select().where(ClassRoster.class_ref == cls).count()
 
 
+def count_students_in_classes(class_ids: list[int]) -> dict[int, int]:
+    """
+    Get the number of students enrolled in many classes, one query per 999 classes.
+
+    Args:
+        class_ids: The classes to count students in.
+
+    Returns:
+        dict[int, int]: Number of students keyed by class id, 0 for empty or unknown classes.
+    """
+    return repo_count_students_in_classes(class_ids)
+
+
 def get_class_by_id(class_id: int) -> Class | None:
     """
     Retrieve a class by its ID.
@@ -80,21 +110,128 @@ def get_class_by_id(class_id: int) -> Class | None:
     return repo_get_class_by_id(class_id)
 
 
+def get_class_versions(class_id: int) -> dict[str, int]:
+    """
+    Get the change counters of a class, one per versioned table.
+
+    Every insert, update or delete that touches the class in one of
+    `DataVersion.TABLES` increments that table's counter, so data read at one set of
+    versions is still current while the versions are unchanged.
+
+    Args:
+        class_id (int): ID of the class.
+
+    Returns:
+        dict[str, int]: Counter per table name, 0 for tables never written.
+    """
+    return repo_get_class_versions(class_id)
+
+
+def get_class_version(class_id: int) -> int:
+    """
+    Get a single change stamp for a class that grows with every write to its data.
+
+    Args:
+        class_id (int): ID of the class.
+
+    Returns:
+        int: The sum of the class's counters from `get_class_versions`.
+    """
+    return sum(get_class_versions(class_id).values())
+
+
 def get_class_dto(class_id: int):
     """Retrieve a class DTO by ID."""
     return repo_get_class_dto(class_id)
 
 
+def get_classes_dto_many(class_ids: list[int]) -> dict[int, ClassDTO]:
+    """
+    Get many classes as DTOs by id, one query per 999 ids.
+
+    Args:
+        class_ids: The class ids to look up.
+
+    Returns:
+        dict[int, ClassDTO]: Classes keyed by id. Unknown ids are left out.
+    """
+    return repo_get_classes_dto_many(class_ids)
+
+
 def get_all_classes_dto() -> list[ClassDTO]:
     """Retrieve all class DTOs."""
     return repo_get_all_classes_dto()
 
 
+def list_classes(
+    sort: str = "name",
+    descending: bool = False,
+    after: str | None = None,
+    limit: int = 200,
+    search: str | None = None,
+) -> PageDTO[ClassDTO]:
+    """
+    List one page of classes, using keyset pagination.
+
+    Pass the `next_token` of a page as `after` to get the next one, together with the
+    same sort and search.
+
+    Args:
+        sort: "name" or "id".
+        descending: Sort in descending order.
+        after: `next_token` of the previous page, None for the first page.
+        limit: Maximum number of classes on the page.
+        search: Only include classes whose name contains this text.
+
+    Returns:
+        PageDTO[ClassDTO]: Up to `limit` classes, a token if more follow, and the
+        approximate number of classes in the listing.
+
+    Raises:
+        KeyError: If `sort` is not a known sort order.
+        ValueError: If `limit` is less than 1, or `after` is not a token of this listing.
+    """
+    if limit < 1:
+        raise ValueError("limit must be at least 1.")
+    sort_key = CLASS_SORT_KEYS[sort]
+    listing = {"list": "classes", "sort": sort, "descending": descending, "search": search}
+    key = None if after is None else pagination.decode_token(after, listing)
+    classes = repo_list_classes_dto(sort, descending, key, limit + 1, search)
+    total = pagination.counts.get(("classes", search), lambda: repo_count_classes(search))
+    return pagination.make_page(classes, limit, listing, sort_key, total)
+
+
 def get_students_in_class_dto(class_id: int) -> list[StudentDTO]:
     """Retrieve student DTOs enrolled in a class."""
     return repo_get_students_for_class_dto(class_id)
 
 
+def iter_all_classes_dto() -> Iterator[ClassDTO]:
+    """
+    Stream every class as a DTO in id order, for exports over all classes.
+
+    Classes are read a chunk at a time with keyset pagination and never all held in
+    memory, so consume the generator before writing to the classes table.
+
+    Yields:
+        ClassDTO: Each class, in id order.
+    """
+    return repo_iter_all_classes_dto()
+
+
+def iter_students_in_class_dto(class_id: int) -> Iterator[StudentDTO]:
+    """
+    Stream the students enrolled in a class as DTOs in id order.
+
+    Args:
+        class_id: ID of the class.
+
+    Yields:
+        StudentDTO: Each enrolled student, in id order.
+    """
+    return repo_iter_students_for_class_dto(class_id)
+
+
 def get_students_in_class(class_id: int) -> list["Student"]:
     """
     Retrieve all students enrolled in a specific class.
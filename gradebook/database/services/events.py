@@ -0,0 +1,210 @@
+"""
+In-process domain events published by the service layer.
+
+Services publish an event for every change they commit, e.g. `ScoreChanged` when
+question scores are written. Subscribers register a handler per event type and are
+called synchronously, on the thread that made the change, once the change is
+committed:
+
+    unsubscribe = events.subscribe(events.ScoreChanged, handler)
+
+Events published inside `events.atomic()` are held back until the outermost block
+commits, coalesced (all `ScoreChanged` of one student become one event, duplicates
+are dropped) and then delivered in the order they were first published. If the
+block raises, they are discarded with the transaction. Events published outside a
+transaction are delivered straight away, since the write was already committed.
+
+Group service calls with `events.atomic()` rather than `db.atomic()`, otherwise their
+events are delivered before the surrounding transaction commits.
+"""
+
+import logging
+import threading
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Callable, Hashable, Iterator, TypeVar
+from gradebook.database.models import db
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class DomainEvent:
+    """Base class of the events published by the services."""
+
+    @property
+    def coalesce_key(self) -> Hashable:
+        """Events of one transaction with the same key are merged into one."""
+        return self
+
+    def merge(self, later: "DomainEvent") -> "DomainEvent":
+        """Combine this event with a later one that has the same key."""
+        return later
+
+
+@dataclass(frozen=True)
+class ScoreChanged(DomainEvent):
+    """Question scores of a student were created or updated."""
+
+    student_id: int
+    question_ids: frozenset[int]
+
+    @property
+    def coalesce_key(self) -> Hashable:
+        return (ScoreChanged, self.student_id)
+
+    def merge(self, later: "ScoreChanged") -> "ScoreChanged":
+        return ScoreChanged(self.student_id, self.question_ids | later.question_ids)
+
+
+@dataclass(frozen=True)
+class AssignmentScoreChanged(DomainEvent):
+    """The total score or time of a student's assignment was recorded."""
+
+    student_id: int
+    assignment_id: int
+
+
+@dataclass(frozen=True)
+class WeightChanged(DomainEvent):
+    """A category weight of a class was set."""
+
+    class_id: int
+    category: str
+    weight: float
+
+    @property
+    def coalesce_key(self) -> Hashable:
+        return (WeightChanged, self.class_id, self.category)
+
+
+@dataclass(frozen=True)
+class ClassCreated(DomainEvent):
+    class_id: int
+
+
+@dataclass(frozen=True)
+class StudentCreated(DomainEvent):
+    student_id: int
+
+
+@dataclass(frozen=True)
+class StudentEnrolled(DomainEvent):
+    class_id: int
+    student_id: int
+    roster_entry_id: int
+
+
+@dataclass(frozen=True)
+class AssignmentCreated(DomainEvent):
+    assignment_id: int
+
+
+@dataclass(frozen=True)
+class AssignmentAssigned(DomainEvent):
+    class_id: int
+    assignment_id: int
+
+
+E = TypeVar("E", bound=DomainEvent)
+
+
+class EventBus:
+    """Synchronous publish/subscribe with per-transaction coalescing, see the module docs."""
+
+    def __init__(self) -> None:
+        self._handlers: dict[type, list[Callable]] = {}
+        self._lock = threading.Lock()
+        # transaction depth and held back events, per thread like peewee's connections
+        self._local = threading.local()
+
+    def subscribe(
+        self, event_type: type[E], handler: Callable[[E], None]
+    ) -> Callable[[], None]:
+        """
+        Calls `handler` with every committed event of `event_type` (or a subclass).
+
+        Args:
+            event_type (type): the event class, DomainEvent for every event
+            handler (Callable): called with the event
+
+        Returns:
+            Callable[[], None]: removes the subscription
+        """
+        with self._lock:
+            self._handlers.setdefault(event_type, []).append(handler)
+
+        def unsubscribe() -> None:
+            with self._lock:
+                handlers = self._handlers.get(event_type, [])
+                if handler in handlers:
+                    handlers.remove(handler)
+
+        return unsubscribe
+
+    def publish(self, event: DomainEvent) -> None:
+        """
+        Publishes an event, delivered when the current `atomic` block commits or
+        straight away outside of one.
+        """
+        if getattr(self._local, "depth", 0):
+            self._local.pending.append(event)
+        else:
+            self._deliver([event])
+
+    @contextmanager
+    def atomic(self) -> Iterator[None]:
+        """
+        `db.atomic()` that holds back the events published inside it until the
+        outermost block commits. A nested block that rolls back to its savepoint
+        drops the events published inside it.
+        """
+        depth = getattr(self._local, "depth", 0)
+        if depth == 0:
+            self._local.pending = []
+        start = len(self._local.pending)
+        self._local.depth = depth + 1
+        try:
+            with db.atomic():
+                yield
+        except BaseException:
+            self._local.depth = depth
+            del self._local.pending[start:]
+            raise
+
+        self._local.depth = depth
+        if depth == 0:
+            pending, self._local.pending = self._local.pending, []
+            self._deliver(coalesce(pending))
+
+    def _deliver(self, events: list[DomainEvent]) -> None:
+        with self._lock:
+            handlers = {t: list(h) for t, h in self._handlers.items()}
+        for event in events:
+            for event_type, type_handlers in handlers.items():
+                if not isinstance(event, event_type):
+                    continue
+                for handler in type_handlers:
+                    # the change is committed, a failing subscriber must not undo it
+                    try:
+                        handler(event)
+                    except Exception:
+                        logger.exception("Handler %r failed for %r", handler, event)
+
+
+def coalesce(events: list[DomainEvent]) -> list[DomainEvent]:
+    """
+    Merges events with the same `coalesce_key`, keeping the position of the first.
+    """
+    merged: dict[Hashable, DomainEvent] = {}
+    for event in events:
+        key = event.coalesce_key
+        merged[key] = merged[key].merge(event) if key in merged else event
+    return list(merged.values())
+
+
+# The bus used by the services
+bus = EventBus()
+subscribe = bus.subscribe
+publish = bus.publish
+atomic = bus.atomic
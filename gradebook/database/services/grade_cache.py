@@ -0,0 +1,111 @@
+import threading
+from collections import OrderedDict
+from typing import Callable, Generic, NamedTuple, TypeVar
+
+T = TypeVar("T")
+
+
+class CacheStats(NamedTuple):
+    hits: int
+    misses: int
+    size: int
+    max_classes: int
+
+
+class GradeCache(Generic[T]):
+    """
+    Bounded, versioned per-class cache of computed grades.
+
+    Every entry is stored with the class's change stamp at the time it was
+    computed. A lookup first reads the current stamp; an entry is only returned
+    when the stamps match, otherwise the value is recomputed and replaces it. The
+    stamp comes from the DataVersion counters, which the database bumps on every
+    write to a class's roster, assignments, scores and weights, so writes made
+    through `services/scoring.py` (or anywhere else) invalidate the entry without
+    any bookkeeping by the writer.
+
+    The least recently used class is evicted once more than `max_classes` classes
+    are cached. Lookups are thread safe; the value itself is shared between callers
+    and must be treated as read only.
+    """
+
+    def __init__(
+        self,
+        load: Callable[[int], T],
+        stamp: Callable[[int], int],
+        max_classes: int = 8,
+    ) -> None:
+        """
+        Args:
+            load (Callable[[int], T]): computes the value for a class id
+            stamp (Callable[[int], int]): current change stamp of a class id
+            max_classes (int): number of classes kept before evicting
+
+        Raises:
+            ValueError: If max_classes is less than 1.
+        """
+        if max_classes < 1:
+            raise ValueError("max_classes must be at least 1.")
+        self._load = load
+        self._stamp = stamp
+        self._max_classes = max_classes
+        self._entries: "OrderedDict[int, tuple[int, T]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+
+    def get(self, class_id: int) -> T:
+        """
+        Gets the value for a class, computing it if the class changed since it was cached.
+
+        Args:
+            class_id (int): ID of the class.
+
+        Returns:
+            T: the cached or freshly computed value
+        """
+        # Read before computing, a write during the computation leaves an older
+        # stamp on the entry so the next lookup recomputes
+        stamp = self._stamp(class_id)
+        with self._lock:
+            entry = self._entries.get(class_id)
+            if entry is not None and entry[0] == stamp:
+                self._entries.move_to_end(class_id)
+                self._hits += 1
+                return entry[1]
+            self._misses += 1
+
+        value = self._load(class_id)
+
+        with self._lock:
+            self._entries[class_id] = (stamp, value)
+            self._entries.move_to_end(class_id)
+            while len(self._entries) > self._max_classes:
+                self._entries.popitem(last=False)
+        return value
+
+    def invalidate(self, class_id: int | None = None) -> None:
+        """
+        Drops the entry of a class, or every entry.
+
+        Args:
+            class_id (int | None): the class to drop, None to clear the cache
+        """
+        with self._lock:
+            if class_id is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(class_id, None)
+
+    def stats(self) -> CacheStats:
+        """Hit and miss counters and the current size."""
+        with self._lock:
+            return CacheStats(
+                self._hits, self._misses, len(self._entries), self._max_classes
+            )
+
+    def reset_stats(self) -> None:
+        """Sets the hit and miss counters back to zero."""
+        with self._lock:
+            self._hits = 0
+            self._misses = 0
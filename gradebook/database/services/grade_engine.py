@@ -0,0 +1,356 @@
+from bisect import insort
+from dataclasses import replace
+from typing import Dict, Iterable
+from peewee import fn
+from gradebook.database.models import (
+    Assignment,
+    AssignmentQuestion,
+    ClassAssignment,
+    ClassRoster,
+    StudentQuestionScore,
+)
+from gradebook.database.dtos import ClassGradeMatrixDTO, StudentGradeDTO
+from gradebook.database.services import scoring
+
+
+class IncrementalGradeEngine:
+    """
+    Running per-student, per-category sums of the points scored and possible in one
+    class, kept up to date by applying changes instead of recomputing the class.
+
+    Every row shares one `possible` dict, so a change to an assignment's points is
+    applied once for the whole class. A score change touches one row, and only that
+    student's final grade is recomputed. Each `apply_*` method returns the roster
+    entry ids of the rows whose grades changed, so a view can refresh just those.
+
+    `to_matrix` returns the same result `scoring.compute_class_grade_matrix` would
+    compute from the database (up to floating point rounding).
+    """
+
+    def __init__(
+        self,
+        matrix: ClassGradeMatrixDTO,
+        question_categories: Dict[int, str],
+        question_points: Dict[int, float],
+    ) -> None:
+        """
+        Build an engine from a grade matrix. Use `IncrementalGradeEngine.load` to read a class.
+
+        Args:
+            matrix (ClassGradeMatrixDTO): the class's grades, copied so the engine owns its rows
+            question_categories (dict[int, str]): category of every question of the class
+            question_points (dict[int, float]): point value of every question of the class
+        """
+        self.class_id = matrix.class_id
+        self.weights = dict(matrix.weights)
+        self.possible: Dict[str, float] = {}
+        for question_id, category in question_categories.items():
+            self.possible[category] = (
+                self.possible.get(category, 0.0) + question_points[question_id]
+            )
+        self._question_categories = dict(question_categories)
+        self._question_points = dict(question_points)
+
+        self._rows: Dict[int, StudentGradeDTO] = {}
+        self._order: list[int] = []
+        # roster entry id -> position in _order
+        self._row_index: Dict[int, int] = {}
+        self._roster_of_student: Dict[int, int] = {}
+        for student in matrix.students:
+            self._add_row(replace(student, points=dict(student.points)))
+
+    @classmethod
+    def load(cls, class_id: int) -> "IncrementalGradeEngine":
+        """
+        Load the grades of a class.
+
+        Args:
+            class_id (int): ID of the class.
+
+        Returns:
+            IncrementalGradeEngine: an engine holding every enrolled student
+        """
+        question_categories: Dict[int, str] = {}
+        question_points: Dict[int, float] = {}
+        for question_id, category, points in _class_questions(class_id):
+            question_categories[question_id] = category
+            question_points[question_id] = points
+        return cls(
+            scoring.compute_class_grade_matrix(class_id),
+            question_categories,
+            question_points,
+        )
+
+    # Reading
+
+    @property
+    def students(self) -> list[StudentGradeDTO]:
+        """Rows in roster order."""
+        return [self._rows[roster_id] for roster_id in self._order]
+
+    def row_of(self, roster_entry_id: int) -> int:
+        """
+        Gets the position of a roster entry in `students`.
+
+        Raises:
+            ValueError: If the roster entry is not in the class.
+        """
+        try:
+            return self._row_index[roster_entry_id]
+        except KeyError:
+            raise ValueError(f"Roster entry {roster_entry_id} is not in the class.") from None
+
+    def student(self, roster_entry_id: int) -> StudentGradeDTO:
+        """Gets the row of a roster entry."""
+        return self._rows[roster_entry_id]
+
+    def to_matrix(self) -> ClassGradeMatrixDTO:
+        """The current grades as a grade matrix."""
+        return ClassGradeMatrixDTO(
+            class_id=self.class_id,
+            weights=dict(self.weights),
+            students=[
+                replace(s, points=dict(s.points), possible=dict(s.possible))
+                for s in self.students
+            ],
+        )
+
+    # Changes
+
+    def apply_score_change(
+        self,
+        student_id: int,
+        question_id: int,
+        old_points: float | None,
+        new_points: float | None,
+    ) -> list[int]:
+        """
+        Applies an edited question score.
+
+        Args:
+            student_id (int): the student whose score changed
+            question_id (int): the question that was scored
+            old_points (float | None): the score before the edit, None if there was none
+            new_points (float | None): the score after the edit, None if it was deleted
+
+        Returns:
+            list[int]: the affected roster entry id, empty if the student or question
+            is not part of the class
+        """
+        return self.apply_score_changes([(student_id, question_id, old_points, new_points)])
+
+    def apply_score_changes(
+        self,
+        changes: Iterable[tuple[int, int, float | None, float | None]],
+    ) -> list[int]:
+        """
+        Applies a batch of edited question scores.
+
+        Args:
+            changes: (student_id, question_id, old_points, new_points) tuples,
+                see `apply_score_change`
+
+        Returns:
+            list[int]: the affected roster entry ids, in roster order
+        """
+        affected = set()
+        for student_id, question_id, old_points, new_points in changes:
+            roster_id = self._roster_of_student.get(student_id)
+            category = self._question_categories.get(question_id)
+            if roster_id is None or category is None:
+                continue
+            delta = (new_points or 0.0) - (old_points or 0.0)
+            points = self._rows[roster_id].points
+            points[category] = points.get(category, 0.0) + delta
+            affected.add(roster_id)
+
+        for roster_id in affected:
+            self._update_final(self._rows[roster_id])
+        return [roster_id for roster_id in self._order if roster_id in affected]
+
+    def apply_question_points(self, question_id: int, point_value: float) -> list[int]:
+        """
+        Applies a changed question point value, which changes the assignment total.
+
+        Returns:
+            list[int]: every roster entry id, since points possible are shared
+        """
+        category = self._question_categories.get(question_id)
+        if category is None:
+            return []
+        delta = point_value - self._question_points[question_id]
+        self._question_points[question_id] = point_value
+        self.possible[category] = self.possible.get(category, 0.0) + delta
+        return self._update_all_finals()
+
+    def add_assignment(self, assignment_id: int) -> list[int]:
+        """
+        Applies an assignment being assigned to the class, including any scores the
+        students already have for its questions.
+
+        Returns:
+            list[int]: every roster entry id
+        """
+        return self._change_assignment(assignment_id, 1)
+
+    def remove_assignment(self, assignment_id: int) -> list[int]:
+        """
+        Applies an assignment being removed from the class.
+
+        Returns:
+            list[int]: every roster entry id
+        """
+        return self._change_assignment(assignment_id, -1)
+
+    def enroll(self, roster_entry_id: int) -> list[int]:
+        """
+        Applies a student being enrolled in the class.
+
+        Returns:
+            list[int]: the new roster entry id
+        """
+        matrix = scoring.build_grade_matrix(self.class_id, roster_entry_id)
+        added = []
+        for student in matrix.students:
+            if student.roster_entry_id not in self._rows:
+                self._add_row(student)
+                self._update_final(student)
+                added.append(student.roster_entry_id)
+        return added
+
+    def unenroll(self, roster_entry_id: int) -> list[int]:
+        """
+        Applies a student being removed from the class.
+
+        Returns:
+            list[int]: the removed roster entry id, empty if it was not enrolled
+        """
+        row = self._rows.pop(roster_entry_id, None)
+        if row is None:
+            return []
+        self._order.remove(roster_entry_id)
+        self._reindex()
+        del self._roster_of_student[row.student_id]
+        return [roster_entry_id]
+
+    def set_weights(self, weights: Dict[str, float]) -> list[int]:
+        """
+        Applies new category weights.
+
+        Returns:
+            list[int]: every roster entry id
+        """
+        self.weights = dict(weights)
+        return self._update_all_finals()
+
+    def reload_students(self, student_ids: Iterable[int]) -> list[int]:
+        """
+        Reads the category sums of some students again, for changes whose previous
+        values are not known.
+
+        Returns:
+            list[int]: the reloaded roster entry ids, in roster order
+        """
+        affected = []
+        for student_id in set(student_ids):
+            roster_id = self._roster_of_student.get(student_id)
+            if roster_id is None:
+                continue
+            matrix = scoring.build_grade_matrix(self.class_id, roster_id)
+            if matrix.students:
+                row = self._rows[roster_id]
+                row.points = dict(matrix.students[0].points)
+                self._update_final(row)
+                affected.append(roster_id)
+        return [roster_id for roster_id in self._order if roster_id in affected]
+
+    # Helpers
+
+    def _add_row(self, student: StudentGradeDTO) -> None:
+        student.possible = self.possible
+        self._rows[student.roster_entry_id] = student
+        roster_id = student.roster_entry_id
+        if not self._order or roster_id > self._order[-1]:
+            # rows are loaded in roster order, so this is the usual case
+            self._row_index[roster_id] = len(self._order)
+            self._order.append(roster_id)
+        else:
+            insort(self._order, roster_id)
+            self._reindex()
+        self._roster_of_student[student.student_id] = roster_id
+
+    def _reindex(self) -> None:
+        self._row_index = {roster_id: row for row, roster_id in enumerate(self._order)}
+
+    def _update_final(self, student: StudentGradeDTO) -> None:
+        student.final_grade = scoring.weighted_final_grade(
+            student.points, self.possible, self.weights
+        )
+
+    def _update_all_finals(self) -> list[int]:
+        for row in self._rows.values():
+            self._update_final(row)
+        return list(self._order)
+
+    def _change_assignment(self, assignment_id: int, sign: int) -> list[int]:
+        questions = list(
+            AssignmentQuestion.select(
+                AssignmentQuestion.id, Assignment.category, AssignmentQuestion.point_value
+            )
+            .join(Assignment)
+            .where(Assignment.id == assignment_id)
+            .tuples()
+        )
+        question_ids = [q[0] for q in questions]
+        if sign > 0 and any(q in self._question_categories for q in question_ids):
+            return []
+        if sign < 0 and not any(q in self._question_categories for q in question_ids):
+            return []
+
+        for question_id, category, points in questions:
+            self.possible[category] = self.possible.get(category, 0.0) + sign * points
+            if sign > 0:
+                self._question_categories[question_id] = category
+                self._question_points[question_id] = points
+            else:
+                self._question_categories.pop(question_id, None)
+                self._question_points.pop(question_id, None)
+
+        # Scores the enrolled students already have for the assignment
+        scored = (
+            StudentQuestionScore.select(
+                ClassRoster.id,
+                Assignment.category,
+                fn.SUM(StudentQuestionScore.points_scored),
+            )
+            .join(AssignmentQuestion)
+            .join(Assignment)
+            .switch(StudentQuestionScore)
+            .join(
+                ClassRoster,
+                on=(
+                    (ClassRoster.student == StudentQuestionScore.student)
+                    & (ClassRoster.class_ref == self.class_id)
+                ),
+            )
+            .where(Assignment.id == assignment_id)
+            .group_by(ClassRoster.id, Assignment.category)
+            .tuples()
+        )
+        for roster_id, category, total in scored:
+            if roster_id in self._rows:
+                points = self._rows[roster_id].points
+                points[category] = points.get(category, 0.0) + sign * total
+        return self._update_all_finals()
+
+
+def _class_questions(class_id: int):
+    return (
+        AssignmentQuestion.select(
+            AssignmentQuestion.id, Assignment.category, AssignmentQuestion.point_value
+        )
+        .join(Assignment)
+        .join(ClassAssignment, on=(ClassAssignment.assignment == Assignment.id))
+        .where(ClassAssignment.class_ref == class_id)
+        .tuples()
+    )
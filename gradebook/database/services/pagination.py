@@ -0,0 +1,148 @@
+"""
+Continuation tokens and cached row counts for the keyset-paginated `list_*` services.
+
+A listing is described by a small dict of its parameters (what is listed, the class,
+sort order and filter). A page asks the repository for one row more than its limit;
+if that row exists the page gets a token holding the listing and the sort key of its
+last item, and the next call continues right after that key. Tokens are opaque to
+callers and only valid for the listing that produced them.
+
+Totals come from `counts`, which keeps each listing's COUNT(*) for `max_age` seconds
+and is cleared whenever a class or student is created or a student is enrolled.
+"""
+
+import base64
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Hashable, TypeVar
+
+from gradebook.database.dtos import PageDTO
+from gradebook.database.services import events
+
+T = TypeVar("T")
+
+
+def encode_token(listing: dict, key: tuple) -> str:
+    """
+    Encodes the sort key of the last item of a page as a continuation token.
+
+    Args:
+        listing (dict): parameters of the listing, JSON serializable
+        key (tuple): sort key of the last item on the page
+
+    Returns:
+        str: URL safe token
+    """
+    payload = json.dumps({"listing": listing, "key": list(key)}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_token(token: str, listing: dict) -> tuple:
+    """
+    Decodes a continuation token made by `encode_token` for the same listing.
+
+    Args:
+        token (str): the token
+        listing (dict): parameters of the listing being continued
+
+    Returns:
+        tuple: sort key to continue after
+
+    Raises:
+        ValueError: If the token is malformed or belongs to a different listing.
+    """
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(token + "=" * (-len(token) % 4)))
+        key = tuple(payload["key"])
+        matches = payload["listing"] == listing
+    except (ValueError, KeyError, TypeError):
+        raise ValueError("Malformed continuation token.") from None
+    if not matches:
+        raise ValueError("Continuation token belongs to a different listing.")
+    return key
+
+
+def make_page(
+    rows: list[T], limit: int, listing: dict, sort_key: tuple[str, ...], total: int
+) -> PageDTO[T]:
+    """
+    Builds a page from up to `limit + 1` rows, the extra row only tells that more follow.
+
+    Args:
+        rows (list): rows fetched with a limit of `limit + 1`
+        limit (int): page size
+        listing (dict): parameters of the listing, stored in the token
+        sort_key (tuple[str, ...]): attribute names making up a row's sort key
+        total (int): rows in the whole listing
+
+    Returns:
+        PageDTO: at most `limit` items, with a token if more rows follow
+    """
+    next_token = None
+    if len(rows) > limit:
+        del rows[limit:]
+        last = rows[-1]
+        next_token = encode_token(listing, tuple(getattr(last, name) for name in sort_key))
+    return PageDTO(rows, next_token, total)
+
+
+class CountCache:
+    """
+    Row counts of listings, each kept for `max_age` seconds.
+
+    Counting a large listing is a full index scan, paged views ask for the total on
+    every page, so it is computed once and reused. Writes made through the services
+    clear the cache via domain events; writes made elsewhere show up once the entry
+    is older than `max_age`. Lookups are thread safe.
+    """
+
+    def __init__(self, max_age: float = 30.0, max_entries: int = 64) -> None:
+        """
+        Args:
+            max_age (float): seconds a count is reused for
+            max_entries (int): number of listings kept before evicting the oldest
+        """
+        self._max_age = max_age
+        self._max_entries = max_entries
+        self._entries: "OrderedDict[Hashable, tuple[float, int]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, count: Callable[[], int]) -> int:
+        """
+        Gets the count of a listing, counting again if it is missing or too old.
+
+        Args:
+            key (Hashable): identifies the listing
+            count (Callable[[], int]): counts the listing's rows
+
+        Returns:
+            int: the cached or fresh count
+        """
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and now - entry[0] < self._max_age:
+                return entry[1]
+
+        value = count()
+
+        with self._lock:
+            self._entries[key] = (now, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
+        return value
+
+    def invalidate(self) -> None:
+        """Drops every cached count."""
+        with self._lock:
+            self._entries.clear()
+
+
+# Totals of the list_* services
+counts = CountCache()
+
+for _event_type in (events.ClassCreated, events.StudentCreated, events.StudentEnrolled):
+    events.subscribe(_event_type, lambda event: counts.invalidate())
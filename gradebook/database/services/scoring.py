@@ -1,4 +1,4 @@
-from typing import Dict
+from typing import Dict, Iterable
 from gradebook.database.models import (
     ClassRoster,
     ClassAssignment,
@@ -9,10 +9,25 @@ from gradebook.database.models import (
     Student,
     AssignmentQuestion,
     Assignment,
+    StudentCategoryRollup,
 )
-from peewee import prefetch
+from peewee import fn, chunked, Case, EXCLUDED, SQL
 from gradebook.database.models import db
+from gradebook.database.dtos import (
+    AssignmentScoreGridDTO,
+    ClassGradeMatrixDTO,
+    StudentGradeDTO,
+)
+from gradebook.database.services import events
+from gradebook.database.services.grade_cache import GradeCache
+from gradebook.database.triggers import (
+    ROLLUP_INSERT_SQL,
+    TOTAL_POINTS_SQL,
+    TOTAL_SCORE_SQL,
+)
 from gradebook.database.repositories import (
+    get_class_versions as repo_get_class_versions,
+    get_assignment_score_grid_dto as repo_get_assignment_score_grid_dto,
     get_class_assignment_dto as repo_get_class_assignment_dto,
     get_student_assignment_score_dto as repo_get_student_assignment_score_dto,
     get_student_question_score_dto as repo_get_student_question_score_dto,
@@ -20,6 +35,11 @@ from gradebook.database.repositories import (
     get_student_assignment_scores_for_student_dto as repo_get_student_assignment_scores_for_student_dto,
 )
 
+# SQLite builds compiled before 3.32 allow 999 bound variables per statement
+MAX_VARIABLES = 999
+# every upserted question score binds three
+UPSERT_CHUNK_SIZE = MAX_VARIABLES // 3
+
 
 def record_full_assignment(
     roster_entry: ClassRoster,
@@ -28,7 +48,11 @@ def record_full_assignment(
     total_time: int = None,
 ) -> StudentAssignmentScore:
     """
-    Record a student's score for a full assignment.
+    Record a student's score for a full assignment. Recording the same assignment
+    again replaces the previous scores.
+
+    The total score is the sum of every question score the student has for the
+    assignment, kept up to date by database triggers.
 
     Args:
         roster_entry: ClassRoster entry for the student.
@@ -40,25 +64,165 @@ def record_full_assignment(
     """
     total_score = sum(question_scores.values())
     # Ensure recording of per-question scores and the aggregate is atomic.
-    with db.atomic():
+    with events.atomic():
         # create or update StudentQuestionScore rows
-        for qid, pts in question_scores.items():
-            sqs, created = StudentQuestionScore.get_or_create(
-                student_id=roster_entry.student.id,
-                assignment_question_id=qid,
-                defaults={"points_scored": pts},
+        bulk_upsert_question_scores(
+            (roster_entry.student_id, qid, pts) for qid, pts in question_scores.items()
+        )
+
+        # then create the aggregate StudentAssignmentScore, or update it if the
+        # assignment was already recorded (one row per roster entry and assignment)
+        sas = StudentAssignmentScore.get_or_none(
+            (StudentAssignmentScore.roster_entry == roster_entry)
+            & (StudentAssignmentScore.class_assignment == class_assignment)
+        )
+        if sas is None:
+            sas = StudentAssignmentScore.create(
+                roster_entry=roster_entry,
+                class_assignment=class_assignment,
+                total_score=total_score,
+                total_time=total_time,
+            )
+            # corrected by the insert trigger if the student has other scores
+            sas.total_score = (
+                StudentAssignmentScore.select(StudentAssignmentScore.total_score)
+                .where(StudentAssignmentScore.id == sas.id)
+                .scalar()
+            )
+        else:
+            sas.total_time = total_time
+            sas.save(only=[StudentAssignmentScore.total_time])
+        events.publish(
+            events.AssignmentScoreChanged(
+                roster_entry.student_id, class_assignment.assignment_id
             )
-            if not created:
-                sqs.points_scored = pts
-                sqs.save()
-
-        # then create the aggregate StudentAssignmentScore
-        return StudentAssignmentScore.create(
-            roster_entry=roster_entry,
-            class_assignment=class_assignment,
-            total_score=total_score,
-            total_time=total_time,
         )
+        return sas
+
+
+def bulk_upsert_question_scores(rows: Iterable[tuple[int, int, float]]) -> int:
+    """
+    Create or update any number of per-question scores in one transaction.
+
+    Rows are written with INSERT ... ON CONFLICT(student, assignment_question) DO UPDATE,
+    in chunks that stay under SQLite's bound variable limit.
+
+    Args:
+        rows: (student_id, question_id, points_scored) triples.
+
+    Publishes one ScoreChanged per student.
+
+    Returns:
+        int: The number of rows written.
+    """
+    written = 0
+    scored: Dict[int, set[int]] = {}
+    with events.atomic():
+        for chunk in chunked(rows, UPSERT_CHUNK_SIZE):
+            for student_id, question_id, _ in chunk:
+                scored.setdefault(student_id, set()).add(question_id)
+            (
+                StudentQuestionScore.insert_many(
+                    chunk,
+                    fields=[
+                        StudentQuestionScore.student,
+                        StudentQuestionScore.assignment_question,
+                        StudentQuestionScore.points_scored,
+                    ],
+                )
+                .on_conflict(
+                    conflict_target=[
+                        StudentQuestionScore.student,
+                        StudentQuestionScore.assignment_question,
+                    ],
+                    update={
+                        StudentQuestionScore.points_scored: EXCLUDED.points_scored
+                    },
+                )
+                .execute()
+            )
+            written += len(chunk)
+        for student_id, question_ids in scored.items():
+            events.publish(events.ScoreChanged(student_id, frozenset(question_ids)))
+    return written
+
+
+def save_assignment_grades(
+    class_id: int,
+    assignment_id: int,
+    question_scores: Iterable[tuple[int, int, float]],
+    times: Dict[int, int] | None = None,
+) -> int:
+    """
+    Save a batch of grading changes for one assignment in a single transaction.
+
+    Args:
+        class_id (int): ID of the class being graded.
+        assignment_id (int): ID of the assignment being graded.
+        question_scores: (student_id, question_id, points_scored) triples to upsert.
+        times (dict[int, int] | None): total time in seconds keyed by student ID. Only
+            students that already have an assignment score record are updated.
+
+    Returns:
+        int: The number of rows written.
+    """
+    with events.atomic():
+        written = bulk_upsert_question_scores(question_scores)
+        if times:
+            written += _bulk_update_assignment_times(class_id, assignment_id, times)
+    return written
+
+
+def _bulk_update_assignment_times(
+    class_id: int, assignment_id: int, times: Dict[int, int]
+) -> int:
+    """
+    Set total_time on existing StudentAssignmentScore rows with one UPDATE per chunk.
+    """
+    class_assignment_id = (
+        ClassAssignment.select(ClassAssignment.id)
+        .where(
+            (ClassAssignment.class_ref == class_id)
+            & (ClassAssignment.assignment == assignment_id)
+        )
+        .scalar()
+    )
+    if class_assignment_id is None:
+        return 0
+
+    roster_ids: Dict[int, int] = {}
+    # one variable is taken by the class id
+    for chunk in chunked(list(times), MAX_VARIABLES - 1):
+        roster_ids.update(
+            ClassRoster.select(ClassRoster.student, ClassRoster.id)
+            .where(
+                (ClassRoster.class_ref == class_id) & (ClassRoster.student.in_(chunk))
+            )
+            .tuples()
+        )
+
+    updated = 0
+    students_of = {roster_id: sid for sid, roster_id in roster_ids.items()}
+    # each student binds a CASE pair and an IN value, plus one for the class assignment
+    for chunk in chunked(
+        [(roster_ids[sid], t) for sid, t in times.items() if sid in roster_ids],
+        (MAX_VARIABLES - 1) // 3,
+    ):
+        updated += (
+            StudentAssignmentScore.update(
+                total_time=Case(StudentAssignmentScore.roster_entry, chunk)
+            )
+            .where(
+                (StudentAssignmentScore.class_assignment == class_assignment_id)
+                & (StudentAssignmentScore.roster_entry.in_([r for r, _ in chunk]))
+            )
+            .execute()
+        )
+        for roster_id, _ in chunk:
+            events.publish(
+                events.AssignmentScoreChanged(students_of[roster_id], assignment_id)
+            )
+    return updated
 
 
 def set_category_weight(
@@ -80,9 +244,77 @@ def set_category_weight(
     )
     obj.weight = weight
     obj.save()
+    events.publish(events.WeightChanged(cls.id, category, weight))
     return obj
 
 
+def repair_totals(class_id: int | None = None) -> int:
+    """
+    Recompute stored assignment totals that no longer match the rows they sum.
+
+    Triggers keep StudentAssignmentScore.total_score and ClassAssignment.total_points
+    in step with every write, this fixes totals written before they existed or
+    with the triggers bypassed. Each table is fixed by a single UPDATE.
+
+    Args:
+        class_id (int | None): the class to repair, None for every class
+
+    Returns:
+        int: The number of rows corrected.
+    """
+    score_total = SQL(f"({TOTAL_SCORE_SQL.format(row='studentassignmentscore')})")
+    points_total = SQL(f"({TOTAL_POINTS_SQL.format(row='classassignment')})")
+
+    scores_q = StudentAssignmentScore.update(total_score=score_total).where(
+        StudentAssignmentScore.total_score != score_total
+    )
+    points_q = ClassAssignment.update(total_points=points_total).where(
+        ClassAssignment.total_points != points_total
+    )
+    if class_id is not None:
+        scores_q = scores_q.where(
+            StudentAssignmentScore.class_assignment.in_(
+                ClassAssignment.select(ClassAssignment.id).where(
+                    ClassAssignment.class_ref == class_id
+                )
+            )
+        )
+        points_q = points_q.where(ClassAssignment.class_ref == class_id)
+
+    with events.atomic():
+        return points_q.execute() + scores_q.execute()
+
+
+def rebuild_rollups(class_id: int) -> int:
+    """
+    Recompute the StudentCategoryRollup rows of a class from the score, question and
+    assignment tables, with a single INSERT ... SELECT.
+
+    The rows are kept up to date by triggers, this is for repairing a class, e.g.
+    after its totals were fixed with `repair_totals`.
+
+    Args:
+        class_id (int): ID of the class.
+
+    Returns:
+        int: The number of rollup rows written.
+    """
+    with events.atomic():
+        StudentCategoryRollup.delete().where(
+            StudentCategoryRollup.roster_entry.in_(
+                ClassRoster.select(ClassRoster.id).where(
+                    ClassRoster.class_ref == class_id
+                )
+            )
+        ).execute()
+        cursor = db.execute_sql(
+            ROLLUP_INSERT_SQL.format(where="cr.class_ref_id = ?"), (class_id,)
+        )
+    # the rollup table has no version counter, so the stamp of the class is unchanged
+    grade_cache.invalidate(class_id)
+    return cursor.rowcount
+
+
 def compute_final_grade(cls_roster_entry: ClassRoster) -> float:
     """
     Compute the final weighted grade for a student in a class.
@@ -93,46 +325,153 @@ def compute_final_grade(cls_roster_entry: ClassRoster) -> float:
     Returns:
         float: Weighted final grade (0-100)
     """
-    cls = cls_roster_entry.class_ref
-    weights = {
-        w.category: w.weight
-        for w in AssignmentCategoryWeight.select().where(
-            AssignmentCategoryWeight.class_ref == cls
-        )
-    }
+    matrix = compute_class_grade_matrix(cls_roster_entry.class_ref_id)
+    for student in matrix.students:
+        if student.roster_entry_id == cls_roster_entry.id:
+            return student.final_grade
+    return 0.0
+
+
+def _class_stamp(class_id: int) -> int:
+    return sum(repo_get_class_versions(class_id).values())
+
+
+# Grade matrices of recently used classes, recomputed when the class's data changes
+grade_cache: GradeCache[ClassGradeMatrixDTO] = GradeCache(
+    lambda class_id: build_grade_matrix(class_id), _class_stamp
+)
+
+
+def compute_class_grade_matrix(class_id: int) -> ClassGradeMatrixDTO:
+    """
+    Compute the category totals and weighted final grade for every student in a class.
+
+    Category totals are read from the StudentCategoryRollup table, one row per
+    student and category, instead of being summed from the scores. Results are served from
+    `grade_cache` until a roster, assignment, score or weight of the class changes.
+
+    Args:
+        class_id (int): ID of the class.
+
+    Returns:
+        ClassGradeMatrixDTO: The class weights and one row per enrolled student.
+        The object is shared with other callers and must not be modified.
+    """
+    return grade_cache.get(class_id)
+
+
+def weighted_final_grade(
+    points: Dict[str, float], possible: Dict[str, float], weights: Dict[str, float]
+) -> float:
+    """
+    Combine per-category points and possible points into a weighted grade.
+
+    Categories with nothing possible are skipped, the grade is still divided by the
+    sum of every weight.
+
+    Args:
+        points (dict[str, float]): points scored per category
+        possible (dict[str, float]): points possible per category
+        weights (dict[str, float]): category weights
+
+    Returns:
+        float: Weighted final grade (0-100), 0 when no weights are set
+    """
     total_weight = sum(weights.values())
     if total_weight == 0:
         return 0.0
 
-    # Gather all assignments for this student, prefetch class_assignment and assignment to avoid N+1
-    student_scores = prefetch(
-        StudentAssignmentScore.select().join(ClassRoster).where(
-            ClassRoster.id == cls_roster_entry.id
-        ),
-        ClassAssignment,
-        Assignment,
-    )
-    category_totals: Dict[str, float] = {}
-    category_max: Dict[str, float] = {}
-
-    for score in student_scores:
-        cat = score.class_assignment.assignment.category
-        category_totals[cat] = category_totals.get(cat, 0.0) + score.total_score
-        category_max[cat] = (
-            category_max.get(cat, 0.0) + score.class_assignment.total_points
-        )
-
-    # Weighted average
     final_grade = 0.0
     for cat, weight in weights.items():
-        cat_total = category_totals.get(cat, 0.0)
-        cat_max = category_max.get(cat, 0.0)
+        cat_max = possible.get(cat, 0.0)
         if cat_max > 0:
-            final_grade += (cat_total / cat_max) * weight
+            final_grade += (points.get(cat, 0.0) / cat_max) * weight
 
     return final_grade / total_weight * 100
 
 
+def build_grade_matrix(
+    class_id: int, roster_entry_id: int | None = None
+) -> ClassGradeMatrixDTO:
+    """
+    Build the grade matrix for a class from the database, bypassing `grade_cache`.
+
+    Args:
+        class_id (int): ID of the class.
+        roster_entry_id (int | None): only build the row of this roster entry
+
+    Returns:
+        ClassGradeMatrixDTO: The class weights and one row per enrolled student, a
+        new object the caller may modify.
+    """
+    weights = dict(
+        AssignmentCategoryWeight.select(
+            AssignmentCategoryWeight.category, AssignmentCategoryWeight.weight
+        )
+        .where(AssignmentCategoryWeight.class_ref == class_id)
+        .tuples()
+    )
+
+    rollup_q = (
+        StudentCategoryRollup.select(
+            StudentCategoryRollup.roster_entry,
+            StudentCategoryRollup.category,
+            StudentCategoryRollup.points,
+            StudentCategoryRollup.possible,
+        )
+        .join(ClassRoster)
+        .where(ClassRoster.class_ref == class_id)
+    )
+
+    roster_q = (
+        ClassRoster.select(
+            ClassRoster.id,
+            Student.id,
+            Student.student_number,
+            Student.first_name,
+            Student.last_name,
+        )
+        .join(Student)
+        .where(ClassRoster.class_ref == class_id)
+        .order_by(ClassRoster.id)
+    )
+
+    if roster_entry_id is not None:
+        rollup_q = rollup_q.where(StudentCategoryRollup.roster_entry == roster_entry_id)
+        roster_q = roster_q.where(ClassRoster.id == roster_entry_id)
+
+    points: Dict[int, Dict[str, float]] = {}
+    possible: Dict[int, Dict[str, float]] = {}
+    # Rollups exist for every category with an assignment, categories without
+    # anything scored or possible are left out as when summing the scores
+    for roster_id, category, scored, total in rollup_q.tuples():
+        if scored:
+            points.setdefault(roster_id, {})[category] = scored
+        if total:
+            possible.setdefault(roster_id, {})[category] = total
+
+    students = []
+    for roster_id, student_id, number, first, last in roster_q.tuples():
+        student_points = points.get(roster_id, {})
+        student_possible = possible.get(roster_id, {})
+        students.append(
+            StudentGradeDTO(
+                roster_entry_id=roster_id,
+                student_id=student_id,
+                student_number=number,
+                first_name=first,
+                last_name=last,
+                points=student_points,
+                possible=student_possible,
+                final_grade=weighted_final_grade(
+                    student_points, student_possible, weights
+                ),
+            )
+        )
+
+    return ClassGradeMatrixDTO(class_id=class_id, weights=weights, students=students)
+
+
 def get_student_scores_for_assignment(
     assignment_id: int, student_id: int
 ) -> list[StudentQuestionScore]:
@@ -173,6 +512,26 @@ def get_student_scores_for_assignment(
     return list(sqs_list)
 
 
+def get_assignment_score_grid(
+    class_id: int, assignment_id: int
+) -> AssignmentScoreGridDTO:
+    """
+    Gets every student's question scores and time for an assignment in a class.
+
+    Scores are placed by question id, so a student with only some questions scored
+    still lines up with the question columns.
+
+    Args:
+        class_id (int): the class whose roster makes up the rows
+        assignment_id (int): the assignment whose questions make up the columns
+
+    Returns:
+        AssignmentScoreGridDTO: roster, ordered questions, score grid (None where no
+        score is recorded) and times (None where no assignment score is recorded)
+    """
+    return repo_get_assignment_score_grid_dto(class_id, assignment_id)
+
+
 def update_student_question_score(
     student_id: int, question_id: int, points_scored: float
 ) -> StudentQuestionScore:
@@ -196,6 +555,7 @@ def update_student_question_score(
         sqs.points_scored = points_scored
         sqs.save()
 
+    events.publish(events.ScoreChanged(student_id, frozenset([question_id])))
     return sqs
 
 
@@ -230,6 +590,7 @@ def update_student_assignment_time(
     if sas:
         sas.total_time = total_time
         sas.save()
+        events.publish(events.AssignmentScoreChanged(student_id, assignment_id))
     return sas
 
 
@@ -1,12 +1,20 @@
+from collections.abc import Iterator
 from peewee import IntegrityError
 from gradebook.database.models import Student
 from gradebook.database.repositories import (
     create_student as repo_create_student,
     get_student_by_number as repo_get_student_by_number,
+    get_students_dto_by_numbers as repo_get_students_dto_by_numbers,
+    get_students_dto_many as repo_get_students_dto_many,
     get_all_students_dto as repo_get_all_students_dto,
+    iter_all_students_dto as repo_iter_all_students_dto,
+    list_students_dto as repo_list_students_dto,
+    count_students as repo_count_students,
+    STUDENT_SORT_KEYS,
     get_classes_for_student_dto as repo_get_classes_for_student_dto,
 )
-from gradebook.database.dtos import StudentDTO, ClassDTO
+from gradebook.database.dtos import StudentDTO, ClassDTO, PageDTO
+from gradebook.database.services import events, pagination
 
 
 def create_student(student_number: str, first_name: str, last_name: str) -> Student:
@@ -24,7 +32,9 @@ def create_student(student_number: str, first_name: str, last_name: str) -> Stud
     Raises:
         IntegrityError: If a student with the same student_number already exists.
     """
-    return repo_create_student(student_number, first_name, last_name)
+    student = repo_create_student(student_number, first_name, last_name)
+    events.publish(events.StudentCreated(student.id))
+    return student
 
 
 def get_student_by_number(student_number: str) -> Student:
@@ -46,6 +56,33 @@ def get_student_by_number(student_number: str) -> Student:
     return student
 
 
+def get_students_dto_by_numbers(student_numbers: list[str]) -> dict[str, StudentDTO]:
+    """
+    Get many students as DTOs by their student numbers, one query per 999 numbers.
+
+    Args:
+        student_numbers: The student numbers to look up.
+
+    Returns:
+        dict[str, StudentDTO]: Students keyed by student number. Numbers with no
+        matching student are left out.
+    """
+    return repo_get_students_dto_by_numbers(student_numbers)
+
+
+def get_students_dto_many(student_ids: list[int]) -> dict[int, StudentDTO]:
+    """
+    Get many students as DTOs by id, one query per 999 ids.
+
+    Args:
+        student_ids: The student ids to look up.
+
+    Returns:
+        dict[int, StudentDTO]: Students keyed by id. Unknown ids are left out.
+    """
+    return repo_get_students_dto_many(student_ids)
+
+
 def create_student_dto(student_number: str, first_name: str, last_name: str):
     """Non-breaking helper that returns a StudentDTO from the repository."""
     from gradebook.database.repositories import create_student_dto as repo_create
@@ -65,6 +102,69 @@ def get_all_students_dto() -> list[StudentDTO]:
     return repo_get_all_students_dto()
 
 
+def iter_all_students_dto() -> Iterator[StudentDTO]:
+    """
+    Stream every student as a DTO in id order, for exports over the whole institution.
+
+    Students are read a chunk at a time with keyset pagination, so memory stays flat
+    however many students exist.
+
+    Yields:
+        StudentDTO: Each student, in id order.
+    """
+    return repo_iter_all_students_dto()
+
+
+def list_students(
+    class_id: int | None = None,
+    sort: str = "last_name",
+    descending: bool = False,
+    after: str | None = None,
+    limit: int = 200,
+    search: str | None = None,
+) -> PageDTO[StudentDTO]:
+    """
+    List one page of students, every student or those enrolled in a class.
+
+    Pages are read with keyset pagination on the sort key from
+    `repositories.STUDENT_SORT_KEYS`, so every page costs the same however deep
+    into the listing it is. Pass the `next_token` of a page as `after` to get the
+    next one, together with the same class, sort and search.
+
+    Args:
+        class_id: Only list students enrolled in this class, None for every student.
+        sort: "last_name", "first_name" or "student_number".
+        descending: Sort in descending order.
+        after: `next_token` of the previous page, None for the first page.
+        limit: Maximum number of students on the page.
+        search: Only include students whose number or name contains this text.
+
+    Returns:
+        PageDTO[StudentDTO]: Up to `limit` students, a token if more follow, and the
+        approximate number of students in the listing.
+
+    Raises:
+        KeyError: If `sort` is not a known sort order.
+        ValueError: If `limit` is less than 1, or `after` is not a token of this listing.
+    """
+    if limit < 1:
+        raise ValueError("limit must be at least 1.")
+    sort_key = STUDENT_SORT_KEYS[sort]
+    listing = {
+        "list": "students",
+        "class_id": class_id,
+        "sort": sort,
+        "descending": descending,
+        "search": search,
+    }
+    key = None if after is None else pagination.decode_token(after, listing)
+    students = repo_list_students_dto(class_id, sort, descending, key, limit + 1, search)
+    total = pagination.counts.get(
+        ("students", class_id, search), lambda: repo_count_students(class_id, search)
+    )
+    return pagination.make_page(students, limit, listing, sort_key, total)
+
+
 def get_classes_for_student_dto(student_id: int) -> list[ClassDTO]:
     """Retrieve all classes a student is enrolled in as DTOs."""
     return repo_get_classes_for_student_dto(student_id)
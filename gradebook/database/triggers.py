@@ -0,0 +1,405 @@
+"""
+SQLite triggers that keep derived data in step with every write, whichever code
+path makes it.
+
+Triggers are created for a new database by `run_migrations` and for existing
+databases by the migration that introduced them. Each definition uses
+`CREATE TRIGGER IF NOT EXISTS`, so creating them twice is harmless.
+"""
+
+from peewee import SqliteDatabase
+
+# SELECT of the class ids a row of a versioned table belongs to, {row} is NEW or OLD
+_CLASSES_OF_ROW = {
+    "classroster": "SELECT {row}.class_ref_id AS class_id",
+    "classassignment": "SELECT {row}.class_ref_id AS class_id",
+    "assignmentcategoryweight": "SELECT {row}.class_ref_id AS class_id",
+    "studentassignmentscore": (
+        "SELECT class_ref_id AS class_id FROM classroster WHERE id = {row}.roster_entry_id"
+    ),
+    # a question score counts for every class that has the student and the assignment
+    "studentquestionscore": (
+        "SELECT cr.class_ref_id AS class_id FROM classroster cr"
+        " JOIN classassignment ca ON ca.class_ref_id = cr.class_ref_id"
+        " JOIN assignmentquestion aq ON aq.assignment_id = ca.assignment_id"
+        " WHERE cr.student_id = {row}.student_id AND aq.id = {row}.assignment_question_id"
+    ),
+}
+
+
+def _data_version_trigger(table: str, event: str) -> str:
+    if event == "INSERT":
+        classes = _CLASSES_OF_ROW[table].format(row="NEW")
+    elif event == "DELETE":
+        classes = _CLASSES_OF_ROW[table].format(row="OLD")
+    else:
+        classes = (
+            _CLASSES_OF_ROW[table].format(row="OLD")
+            + " UNION "
+            + _CLASSES_OF_ROW[table].format(row="NEW")
+        )
+    # WHERE true keeps SQLite from reading ON CONFLICT as a join constraint
+    return f"""
+        CREATE TRIGGER IF NOT EXISTS dataversion_{table}_{event.lower()}
+        AFTER {event} ON {table}
+        BEGIN
+            INSERT INTO dataversion (class_id, table_name, version)
+            SELECT class_id, '{table}', 1 FROM ({classes}) WHERE true
+            ON CONFLICT (class_id, table_name) DO UPDATE SET version = version + 1;
+        END
+    """
+
+
+# Moving an assignment to another category changes the assignments and grades of
+# every class it is assigned to, without writing a versioned table
+ASSIGNMENT_CATEGORY_VERSION_TRIGGER = """
+    CREATE TRIGGER IF NOT EXISTS dataversion_assignment_update
+    AFTER UPDATE OF category ON assignment
+    WHEN OLD.category IS NOT NEW.category
+    BEGIN
+        INSERT INTO dataversion (class_id, table_name, version)
+        SELECT class_ref_id, 'classassignment', 1 FROM classassignment
+        WHERE assignment_id = NEW.id
+        ON CONFLICT (class_id, table_name) DO UPDATE SET version = version + 1;
+    END
+"""
+
+# Bump DataVersion for the classes touched by every write to a versioned table
+DATA_VERSION_TRIGGERS = [
+    _data_version_trigger(table, event)
+    for table in _CLASSES_OF_ROW
+    for event in ("INSERT", "UPDATE", "DELETE")
+]
+
+# Assignment score rows a question score counts towards, {row} is NEW or OLD
+_SCORES_OF_QUESTION_SCORE = """
+    SELECT sas.id FROM studentassignmentscore sas
+    JOIN classroster cr ON cr.id = sas.roster_entry_id
+    JOIN classassignment ca ON ca.id = sas.class_assignment_id
+    JOIN assignmentquestion aq ON aq.assignment_id = ca.assignment_id
+    WHERE cr.student_id = {row}.student_id AND aq.id = {row}.assignment_question_id
+"""
+
+# Sum of the question scores of an assignment score row, {row} is the row
+TOTAL_SCORE_SQL = """
+    SELECT COALESCE(SUM(sqs.points_scored), 0) FROM studentquestionscore sqs
+    JOIN assignmentquestion aq ON aq.id = sqs.assignment_question_id
+    JOIN classassignment ca ON ca.assignment_id = aq.assignment_id
+    JOIN classroster cr ON cr.student_id = sqs.student_id
+    WHERE ca.id = {row}.class_assignment_id AND cr.id = {row}.roster_entry_id
+"""
+
+# Sum of the question points of a class assignment row, {row} is the row
+TOTAL_POINTS_SQL = """
+    SELECT COALESCE(SUM(point_value), 0) FROM assignmentquestion
+    WHERE assignment_id = {row}.assignment_id
+"""
+
+
+def _adjust_total_score(row: str, sign: str) -> str:
+    return f"""
+        UPDATE studentassignmentscore
+        SET total_score = total_score {sign} {row}.points_scored
+        WHERE id IN ({_SCORES_OF_QUESTION_SCORE.format(row=row)});
+    """
+
+
+def _adjust_total_points(row: str, sign: str) -> str:
+    return f"""
+        UPDATE classassignment
+        SET total_points = total_points {sign} {row}.point_value
+        WHERE assignment_id = {row}.assignment_id;
+    """
+
+
+# Keep StudentAssignmentScore.total_score equal to the sum of the student's question
+# scores for the assignment, and ClassAssignment.total_points equal to the sum of the
+# assignment's question points. Question writes apply the difference, new aggregate
+# rows are corrected to the full sum if they were inserted with another value. Rows that drifted before the triggers existed are
+# fixed by `services.scoring.repair_totals`.
+AGGREGATE_TRIGGERS = [
+    f"""
+    CREATE TRIGGER IF NOT EXISTS total_score_studentquestionscore_insert
+    AFTER INSERT ON studentquestionscore
+    BEGIN
+        {_adjust_total_score("NEW", "+")}
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS total_score_studentquestionscore_update
+    AFTER UPDATE OF student_id, assignment_question_id, points_scored
+    ON studentquestionscore
+    WHEN OLD.points_scored IS NOT NEW.points_scored
+        OR OLD.student_id != NEW.student_id
+        OR OLD.assignment_question_id != NEW.assignment_question_id
+    BEGIN
+        {_adjust_total_score("OLD", "-")}
+        {_adjust_total_score("NEW", "+")}
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS total_score_studentquestionscore_delete
+    AFTER DELETE ON studentquestionscore
+    BEGIN
+        {_adjust_total_score("OLD", "-")}
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS total_score_studentassignmentscore_insert
+    AFTER INSERT ON studentassignmentscore
+    BEGIN
+        UPDATE studentassignmentscore
+        SET total_score = ({TOTAL_SCORE_SQL.format(row="NEW")})
+        WHERE id = NEW.id AND total_score != ({TOTAL_SCORE_SQL.format(row="NEW")});
+    END
+    """,
+    # Deleting a question cascades to its scores after the question row is gone,
+    # when the delete trigger above can no longer find the assignment
+    """
+    CREATE TRIGGER IF NOT EXISTS total_score_assignmentquestion_delete
+    BEFORE DELETE ON assignmentquestion
+    BEGIN
+        UPDATE studentassignmentscore
+        SET total_score = total_score - (
+            SELECT COALESCE(SUM(sqs.points_scored), 0) FROM studentquestionscore sqs
+            JOIN classroster cr ON cr.student_id = sqs.student_id
+            WHERE sqs.assignment_question_id = OLD.id
+            AND cr.id = studentassignmentscore.roster_entry_id
+        )
+        WHERE class_assignment_id IN (
+            SELECT id FROM classassignment WHERE assignment_id = OLD.assignment_id
+        );
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS total_points_assignmentquestion_insert
+    AFTER INSERT ON assignmentquestion
+    BEGIN
+        {_adjust_total_points("NEW", "+")}
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS total_points_assignmentquestion_update
+    AFTER UPDATE OF assignment_id, point_value ON assignmentquestion
+    WHEN OLD.point_value IS NOT NEW.point_value
+        OR OLD.assignment_id != NEW.assignment_id
+    BEGIN
+        {_adjust_total_points("OLD", "-")}
+        {_adjust_total_points("NEW", "+")}
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS total_points_assignmentquestion_delete
+    AFTER DELETE ON assignmentquestion
+    BEGIN
+        {_adjust_total_points("OLD", "-")}
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS total_points_classassignment_insert
+    AFTER INSERT ON classassignment
+    BEGIN
+        UPDATE classassignment
+        SET total_points = ({TOTAL_POINTS_SQL.format(row="NEW")})
+        WHERE id = NEW.id AND total_points != ({TOTAL_POINTS_SQL.format(row="NEW")});
+    END
+    """,
+]
+
+# Recompute the category rollups of the roster entries and categories matching
+# {where}, which can filter on `cr` (classroster) and `totals.category`. Points possible
+# are summed from ClassAssignment.total_points, kept up to date by the triggers above.
+ROLLUP_INSERT_SQL = """
+    INSERT INTO studentcategoryrollup
+        (roster_entry_id, category, points, possible, n_assignments)
+    SELECT cr.id, totals.category,
+        COALESCE((
+            SELECT SUM(sqs.points_scored) FROM studentquestionscore sqs
+            JOIN assignmentquestion aq ON aq.id = sqs.assignment_question_id
+            JOIN assignment a ON a.id = aq.assignment_id
+            JOIN classassignment ca ON ca.assignment_id = a.id
+            WHERE sqs.student_id = cr.student_id
+            AND ca.class_ref_id = cr.class_ref_id
+            AND a.category = totals.category
+        ), 0),
+        totals.possible, totals.n_assignments
+    FROM classroster cr
+    JOIN (
+        SELECT ca.class_ref_id, a.category,
+            SUM(ca.total_points) AS possible, COUNT(*) AS n_assignments
+        FROM classassignment ca JOIN assignment a ON a.id = ca.assignment_id
+        GROUP BY ca.class_ref_id, a.category
+    ) totals ON totals.class_ref_id = cr.class_ref_id
+    WHERE {where}
+    ON CONFLICT (roster_entry_id, category) DO UPDATE SET
+        points = excluded.points,
+        possible = excluded.possible,
+        n_assignments = excluded.n_assignments
+"""
+
+# Category of the assignment a class assignment or question row belongs to
+_CATEGORY_OF_ROW = "(SELECT category FROM assignment WHERE id = {row}.assignment_id)"
+
+
+def _adjust_rollup_points(row: str, sign: str) -> str:
+    return f"""
+        UPDATE studentcategoryrollup
+        SET points = points {sign} {row}.points_scored
+        WHERE id IN (
+            SELECT r.id FROM assignmentquestion aq
+            JOIN assignment a ON a.id = aq.assignment_id
+            JOIN classassignment ca ON ca.assignment_id = a.id
+            JOIN classroster cr ON cr.class_ref_id = ca.class_ref_id
+            JOIN studentcategoryrollup r
+                ON r.roster_entry_id = cr.id AND r.category = a.category
+            WHERE aq.id = {row}.assignment_question_id
+            AND cr.student_id = {row}.student_id
+        );
+    """
+
+
+def _rebuild_class_category(row: str) -> str:
+    category = _CATEGORY_OF_ROW.format(row=row)
+    return f"""
+        DELETE FROM studentcategoryrollup
+        WHERE category = {category} AND roster_entry_id IN (
+            SELECT id FROM classroster WHERE class_ref_id = {row}.class_ref_id
+        );
+        {ROLLUP_INSERT_SQL.format(
+            where=f"cr.class_ref_id = {row}.class_ref_id AND totals.category = {category}"
+        )};
+    """
+
+
+# Keep StudentCategoryRollup equal to what `ROLLUP_INSERT_SQL` would compute. Score
+# writes apply the difference to the points, changed assignment totals to the points
+# possible. Assigning or unassigning an assignment and enrolling a student recompute
+# the rows involved.
+ROLLUP_TRIGGERS = [
+    f"""
+    CREATE TRIGGER IF NOT EXISTS rollup_studentquestionscore_insert
+    AFTER INSERT ON studentquestionscore
+    BEGIN
+        {_adjust_rollup_points("NEW", "+")}
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS rollup_studentquestionscore_update
+    AFTER UPDATE OF student_id, assignment_question_id, points_scored
+    ON studentquestionscore
+    WHEN OLD.points_scored IS NOT NEW.points_scored
+        OR OLD.student_id != NEW.student_id
+        OR OLD.assignment_question_id != NEW.assignment_question_id
+    BEGIN
+        {_adjust_rollup_points("OLD", "-")}
+        {_adjust_rollup_points("NEW", "+")}
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS rollup_studentquestionscore_delete
+    AFTER DELETE ON studentquestionscore
+    BEGIN
+        {_adjust_rollup_points("OLD", "-")}
+    END
+    """,
+    # see total_score_assignmentquestion_delete
+    f"""
+    CREATE TRIGGER IF NOT EXISTS rollup_assignmentquestion_delete
+    BEFORE DELETE ON assignmentquestion
+    BEGIN
+        UPDATE studentcategoryrollup
+        SET points = points - (
+            SELECT COALESCE(SUM(sqs.points_scored), 0) FROM studentquestionscore sqs
+            JOIN classroster cr ON cr.student_id = sqs.student_id
+            WHERE sqs.assignment_question_id = OLD.id
+            AND cr.id = studentcategoryrollup.roster_entry_id
+        )
+        WHERE category = {_CATEGORY_OF_ROW.format(row="OLD")}
+        AND roster_entry_id IN (
+            SELECT cr.id FROM classroster cr
+            JOIN classassignment ca ON ca.class_ref_id = cr.class_ref_id
+            WHERE ca.assignment_id = OLD.assignment_id
+        );
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS rollup_classassignment_update
+    AFTER UPDATE OF total_points ON classassignment
+    WHEN OLD.total_points IS NOT NEW.total_points
+    BEGIN
+        UPDATE studentcategoryrollup
+        SET possible = possible + NEW.total_points - OLD.total_points
+        WHERE category = {_CATEGORY_OF_ROW.format(row="NEW")}
+        AND roster_entry_id IN (
+            SELECT id FROM classroster WHERE class_ref_id = NEW.class_ref_id
+        );
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS rollup_classassignment_insert
+    AFTER INSERT ON classassignment
+    BEGIN
+        {_rebuild_class_category("NEW")}
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS rollup_classassignment_delete
+    AFTER DELETE ON classassignment
+    BEGIN
+        {_rebuild_class_category("OLD")}
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS rollup_assignment_update
+    AFTER UPDATE OF category ON assignment
+    WHEN OLD.category IS NOT NEW.category
+    BEGIN
+        DELETE FROM studentcategoryrollup
+        WHERE category IN (OLD.category, NEW.category) AND roster_entry_id IN (
+            SELECT cr.id FROM classroster cr
+            JOIN classassignment ca ON ca.class_ref_id = cr.class_ref_id
+            WHERE ca.assignment_id = NEW.id
+        );
+        {ROLLUP_INSERT_SQL.format(
+            where="totals.category IN (OLD.category, NEW.category)"
+            " AND cr.class_ref_id IN"
+            " (SELECT class_ref_id FROM classassignment WHERE assignment_id = NEW.id)"
+        )};
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS rollup_classroster_insert
+    AFTER INSERT ON classroster
+    BEGIN
+        {ROLLUP_INSERT_SQL.format(where="cr.id = NEW.id")};
+    END
+    """,
+    # the foreign key cascades too, but only with PRAGMA foreign_keys on
+    """
+    CREATE TRIGGER IF NOT EXISTS rollup_classroster_delete
+    AFTER DELETE ON classroster
+    BEGIN
+        DELETE FROM studentcategoryrollup WHERE roster_entry_id = OLD.id;
+    END
+    """,
+]
+
+# Every trigger of the current schema
+ALL_TRIGGERS = (
+    DATA_VERSION_TRIGGERS
+    + [ASSIGNMENT_CATEGORY_VERSION_TRIGGER]
+    + AGGREGATE_TRIGGERS
+    + ROLLUP_TRIGGERS
+)
+
+
+def create_triggers(database: SqliteDatabase, triggers: list[str] | None = None) -> None:
+    """
+    Creates triggers that do not exist yet.
+
+    Args:
+        database (SqliteDatabase): the database to create them in
+        triggers (list[str]): CREATE TRIGGER statements, defaults to every trigger
+    """
+    for sql in ALL_TRIGGERS if triggers is None else triggers:
+        database.execute_sql(sql)
@@ -2,6 +2,8 @@ from PySide6 import QtWidgets, QtCore, QtGui
 from gradebook.views.class_window.ui_class_window import Ui_ClassDialog
 from gradebook.views.class_window.new_class_window import NewClassWindow
 import gradebook.database.services.classes as class_service
+from gradebook.database.dtos import ClassDTO
+from peewee import IntegrityError
 
 import typing
 
@@ -11,8 +13,14 @@ if typing.TYPE_CHECKING:
 
 class ClassWindow(QtWidgets.QDialog):
 
+    # Classes loaded per page, more are loaded until the list fills its viewport and
+    # then whenever it is scrolled to the end
+    PAGE_SIZE = 100
+
     _fetch_all_classes = QtCore.Signal()
     _all_classes = []
+    _student_counts = {}
+    _next_token = None
     _selected_class = None
 
     def __init__(self, parent: QtWidgets.QMainWindow) -> None:
@@ -38,9 +46,9 @@ class ClassWindow(QtWidgets.QDialog):
         return self._selected_class
 
     @property
-    def _class_list(self) -> list["Class"]:
+    def _class_list(self) -> list[ClassDTO]:
         """
-        Property to get the list of classes.
+        Property to get the classes loaded so far.
         """
         return self._all_classes
 
@@ -62,30 +70,21 @@ class ClassWindow(QtWidgets.QDialog):
 
         # Signals
         self._fetch_all_classes.connect(self._get_all_classes)
+        self.ui.lwClassList.verticalScrollBar().valueChanged.connect(
+            self._class_list_scrolled
+        )
         self.ui.lwClassList.itemSelectionChanged.connect(self._update_open_button_state)
         self.ui.lwClassList.itemSelectionChanged.connect(self._set_selected_class)
 
-    def _get_class_by_name(self, name: str) -> "Class | None":
-        """
-        Retrieves a class by its name.
-
-        Args:
-            name: The name of the class to retrieve.
-
-        Returns:
-            Class | None: The Class object if found, otherwise None.
-        """
-        for cls in self._class_list:
-            if cls.name == name:
-                return cls
-        return None
-
     def _set_selected_class(self) -> None:
         """
         Sets the selected class based on the current selection in the list widget.
         """
-        self._selected_class = self._get_class_by_name(
-            self.ui.lwClassList.currentItem().text().split(",")[0]
+        item = self.ui.lwClassList.currentItem()
+        self._selected_class = (
+            class_service.get_class_by_id(item.data(QtCore.Qt.ItemDataRole.UserRole))
+            if item is not None
+            else None
         )
 
     def _update_open_button_state(self) -> None:
@@ -104,18 +103,20 @@ class ClassWindow(QtWidgets.QDialog):
 
         if new_class_window.result() == QtWidgets.QDialog.Accepted:
             class_name = new_class_window.ui.tbClassName.text()
-            if self._get_class_by_name(class_name):
+            # Only a page of classes is loaded, let the unique name decide
+            try:
+                class_service.create_class(
+                    class_name,
+                    new_class_window.ui.dStart.date().toPython(),
+                    new_class_window.ui.dEnd.date().toPython(),
+                )
+            except IntegrityError:
                 QtWidgets.QMessageBox.warning(
                     self,
                     "Duplicate Class",
                     f"A class named '{class_name}' already exists.",
                 )
             else:
-                class_service.create_class(
-                    class_name,
-                    new_class_window.ui.dStart.date().toPython(),
-                    new_class_window.ui.dEnd.date().toPython(),
-                )
                 self._fetch_all_classes.emit()
 
     def _refresh_class_list(self) -> None:
@@ -128,9 +129,68 @@ class ClassWindow(QtWidgets.QDialog):
 
     def _get_all_classes(self) -> None:
         """
-        Fetches all classes from the database and updates the internal class list.
+        Fetches the first page of classes and replaces the internal class list.
         """
-        self._class_list = class_service.get_all_classes()
+        page = class_service.list_classes(limit=self.PAGE_SIZE)
+        self.setWindowTitle(f"Classes ({page.total})")
+        # Count every class's students in one query rather than one per list item
+        self._student_counts = class_service.count_students_in_classes(
+            [cls.id for cls in page.items]
+        )
+        self._next_token = page.next_token
+        self._class_list = page.items
+        self._schedule_fill()
+
+    def resizeEvent(self, event: QtGui.QResizeEvent) -> None:
+        """
+        Loads more classes if the larger list is no longer filled.
+        """
+        super().resizeEvent(event)
+        self._schedule_fill()
+
+    def _schedule_fill(self) -> None:
+        """
+        Checks whether the list is filled once the added items are laid out.
+        """
+        QtCore.QTimer.singleShot(0, self._fill_viewport)
+
+    def _fill_viewport(self) -> None:
+        """
+        Appends pages of classes while more exist and the list cannot scroll yet, so
+        the end of the list can be reached by scrolling.
+        """
+        if self._next_token is None:
+            return
+        if self.ui.lwClassList.verticalScrollBar().maximum() > 0:
+            return
+        self._fetch_next_page()
+        self._schedule_fill()
+
+    def _class_list_scrolled(self, value: int) -> None:
+        """
+        Appends the next page of classes once the list is scrolled to the end.
+
+        Args:
+            value (int): the scroll bar position
+        """
+        scroll_bar = self.ui.lwClassList.verticalScrollBar()
+        if self._next_token is None or value < scroll_bar.maximum():
+            return
+        self._fetch_next_page()
+        self._schedule_fill()
+
+    def _fetch_next_page(self) -> None:
+        """
+        Appends the page of classes after the ones already loaded.
+        """
+        page = class_service.list_classes(after=self._next_token, limit=self.PAGE_SIZE)
+        self._student_counts.update(
+            class_service.count_students_in_classes([cls.id for cls in page.items])
+        )
+        self._next_token = page.next_token
+        self._all_classes.extend(page.items)
+        for cls in page.items:
+            self.ui.lwClassList.addItem(self._format_class_string(cls))
 
     def _bOpen_clicked(self) -> None:
         """
@@ -138,12 +198,12 @@ class ClassWindow(QtWidgets.QDialog):
         """
         self.accept()
 
-    def _format_class_string(self, cls: "Class") -> QtWidgets.QListWidgetItem:
+    def _format_class_string(self, cls: ClassDTO) -> QtWidgets.QListWidgetItem:
         """
         Formats the class information into a string for display.
 
         Args:
-            cls (database.models.Class): The Class object to format.
+            cls (ClassDTO): The class to format.
 
         Returns:
             QListWidgetItem: The formatted list widget item.
@@ -160,8 +220,8 @@ class ClassWindow(QtWidgets.QDialog):
         else:
             font.setItalic(True)
 
-        # Get number of students from the db
-        number_of_students = class_service.get_number_of_students_in_class(cls)
+        # Get number of students fetched with the class list
+        number_of_students = self._student_counts.get(cls.id, 0)
 
         # Create the status string
         status = (
@@ -175,5 +235,6 @@ class ClassWindow(QtWidgets.QDialog):
             f"{cls.name}, Students: {number_of_students}, {status}"
         )
         item.setFont(font)
+        item.setData(QtCore.Qt.ItemDataRole.UserRole, cls.id)
 
         return item
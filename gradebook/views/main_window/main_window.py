@@ -17,12 +17,16 @@ from gradebook.views.class_window.class_window import ClassWindow
 from gradebook.database.services import classes as class_service
 from gradebook.database.services import students as student_service
 from gradebook.database.services import assignments as assignment_service
+from gradebook.database.services import events
 from gradebook.views.main_window.tabs.tab import Tab
+from gradebook.views.main_window.tab_loader import TabLoader
 from gradebook.views.student_window.new_student import NewStudentDialog
 from gradebook.views.table_view_window.table_view_window import TableViewWindow
 from gradebook.views.main_window.save_state import SaveState
 from gradebook.views.main_window.toml_utils import load_from_toml, save_to_toml
 from peewee import DoesNotExist
+import logging
+import time
 import typing
 
 if typing.TYPE_CHECKING:
@@ -30,6 +34,8 @@ if typing.TYPE_CHECKING:
 
 SESSION_FILEPATH = ".session.toml"
 
+logger = logging.getLogger(__name__)
+
 
 class MainWindow(QMainWindow):
     # Settings
@@ -37,6 +43,8 @@ class MainWindow(QMainWindow):
 
     # Signals
     _class_changed = QtCore.Signal()
+    # Domain events from the services, delivered on the GUI thread
+    _domain_event = QtCore.Signal(object)
 
     # UI data
     _unsaved_changes = []
@@ -44,6 +52,12 @@ class MainWindow(QMainWindow):
 
     # Database data
     _selected_class = None
+    _tab_loader: TabLoader = None
+    # tab -> (time its load was requested, class versions at that time)
+    _tabs_loading: dict[Tab, tuple[float, dict[str, int]]] = {}
+    # Events received since the last time the current tab was checked
+    _pending_events: list[events.DomainEvent] = []
+    _unsubscribe_events = None
 
     # State Information
     _session_data: SaveState = None
@@ -54,6 +68,13 @@ class MainWindow(QMainWindow):
         self.ui.setupUi(self)
         self.app = parent
 
+        # Tab data is fetched in the background
+        self._tab_loader = TabLoader(self)
+        self._tabs_loading = {}
+        self._pending_events = []
+        self._events_timer = QtCore.QTimer(self)
+        self._events_timer.setSingleShot(True)
+
         self._connect_handlers()
 
         # UI
@@ -94,12 +115,91 @@ class MainWindow(QMainWindow):
 
     def _refresh_tables(self) -> None:
         """
-        Refresh all data tables in the main window.
+        Loads the current tab if its data changed. The other tabs are checked when they
+        are shown, loads still running for a previous class are discarded.
         """
-        for index in range(self.ui.tabWidget.count()):
-            tab: Tab = self.ui.tabWidget.widget(index)
-            tab.fetch_data.emit(self._current_class)
-            tab.refresh_view.emit()
+        self._tab_loader.cancel()
+        self._tabs_loading = {}
+        self._activate_tab(self._current_tab)
+
+    def _activate_tab(self, tab: Tab | None) -> None:
+        """
+        Starts loading a tab unless it is already loading, or showing, the current
+        data of the class.
+
+        Args:
+            tab (Tab | None): the tab being shown
+        """
+        if tab is None or self._current_class is None or tab in self._tabs_loading:
+            return
+
+        versions = class_service.get_class_versions(self._current_class.id)
+        if not tab.is_stale(self._current_class, versions):
+            return
+
+        self._tabs_loading[tab] = (time.perf_counter(), versions)
+        self._set_status(f"Loading {tab.name} for {self._current_class.name}...")
+        self._tab_loader.load(tab, self._current_class)
+
+    def _data_changed(self, event: events.DomainEvent) -> None:
+        """
+        Handler for domain events published by the services. Events arriving in one
+        pass of the event loop, e.g. a batch of enrollments, are handled together.
+        """
+        self._pending_events.append(event)
+        self._events_timer.start(0)
+
+    def _apply_pending_events(self) -> None:
+        """
+        Reloads the current tab if one of the received events can change its data,
+        e.g. a new assignment does not reload the roster. The other tabs notice the
+        change through their versions when they are shown.
+        """
+        changes = events.coalesce(self._pending_events)
+        self._pending_events = []
+        tab = self._current_tab
+        if tab is None or self._current_class is None:
+            return
+        if any(tab.affected_by(change, self._current_class.id) for change in changes):
+            self._activate_tab(tab)
+        else:
+            logger.debug("%d data changes do not affect %s", len(changes), tab.name)
+
+    def _tab_changed(self, index: int) -> None:
+        """
+        Handler for switching tabs, loads the new tab if its data is stale.
+        """
+        self._activate_tab(self.ui.tabWidget.widget(index))
+
+    def _tab_loaded(self, tab: Tab, elapsed: float) -> None:
+        """
+        Marks a tab as loaded and logs how long it took to become interactive.
+
+        Args:
+            tab (Tab): the tab that finished loading
+            elapsed (float): milliseconds spent fetching its data
+        """
+        started, versions = self._tabs_loading.pop(tab)
+        tab.mark_loaded(self._current_class, versions)
+
+        total_ms = (time.perf_counter() - started) * 1000
+        logger.info(
+            "%s interactive for class %s after %.0f ms (fetch %.0f ms)",
+            tab.name,
+            self._current_class.id,
+            total_ms,
+            elapsed,
+        )
+        self._set_status(
+            f"Loaded {tab.name} for {self._current_class.name} in {total_ms:.0f} ms."
+        )
+
+    def _tab_failed(self, tab: Tab, message: str) -> None:
+        """
+        Reports a tab whose data could not be loaded, it is retried when shown again.
+        """
+        self._tabs_loading.pop(tab, None)
+        self._set_status(f"Could not load {tab.name}: {message}")
 
     def _create_tab_views(self) -> None:
         """
@@ -107,10 +207,27 @@ class MainWindow(QMainWindow):
         """
         for tab_class in self._tabs:
             tab_view = tab_class()
+            tab_view.status_message.connect(self._set_status)
+            if isinstance(tab_view, AssignmentTab):
+                tab_view.scores_saved.connect(self._scores_saved)
             self.ui.tabWidget.addTab(tab_view, tab_view.name)
 
     # Data Management
 
+    def _scores_saved(self, changes: list) -> None:
+        """
+        Updates the rows of the Grade tab affected by saved question scores, instead of
+        reloading the whole class the next time it is shown.
+
+        Args:
+            changes (list): (student_id, question_id, old_points, new_points) tuples
+        """
+        for index in range(self.ui.tabWidget.count()):
+            tab = self.ui.tabWidget.widget(index)
+            if isinstance(tab, Grade) and tab not in self._tabs_loading:
+                versions = class_service.get_class_versions(self._current_class.id)
+                tab.apply_score_changes(self._current_class, changes, versions)
+
     def _add_student_clicked(self) -> None:
         """
         Handler for adding a new student to the current class.
@@ -168,9 +285,6 @@ class MainWindow(QMainWindow):
                                 f"An error occurred while adding student: {str(e)}",
                             )
 
-                # Refresh view
-                self._refresh_tables()
-
             else:
                 self._set_status("Student addition cancelled.")
         else:
@@ -201,7 +315,6 @@ class MainWindow(QMainWindow):
                 assignment_service.assign_to_class(
                     self._selected_class, new_assignment_record
                 )
-                self._refresh_tables()
             else:
                 self._set_status("Cancelling assignment addition.")
         else:
@@ -237,8 +350,20 @@ class MainWindow(QMainWindow):
 
         # Signals
         self._class_changed.connect(self._refresh_tables)
+        self.ui.tabWidget.currentChanged.connect(self._tab_changed)
+        self._tab_loader.tab_loaded.connect(self._tab_loaded)
+        self._tab_loader.tab_failed.connect(self._tab_failed)
         self.app.aboutToQuit.connect(self._commit_save_state)
 
+        # Domain events may be published from the loader thread, the signal queues
+        # them onto the GUI thread
+        self._domain_event.connect(self._data_changed)
+        self._events_timer.timeout.connect(self._apply_pending_events)
+        self._unsubscribe_events = events.subscribe(
+            events.DomainEvent, self._domain_event.emit
+        )
+        self.app.aboutToQuit.connect(self._unsubscribe_events)
+
     def _bAdd_clicked(self) -> None:
         """
         Handler for the Add button click event.
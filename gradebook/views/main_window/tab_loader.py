@@ -0,0 +1,124 @@
+import time
+from PySide6 import QtCore
+from gradebook.views.main_window.tabs.tab import Tab
+import typing
+
+if typing.TYPE_CHECKING:
+    from gradebook.database.models import Class
+
+
+class _FetchSignals(QtCore.QObject):
+    """Signals of the fetch jobs, emitted from the worker thread and queued to the GUI thread."""
+
+    # generation, tab, fetched data, milliseconds spent fetching
+    finished = QtCore.Signal(int, object, object, float)
+    failed = QtCore.Signal(int, object, str)
+
+
+class _FetchJob(QtCore.QRunnable):
+    """
+    Runs `Tab.on_fetch_data` for one tab on the loader's worker thread. The tab is
+    not touched here, its data is handed to the GUI thread through the signals.
+    """
+
+    def __init__(
+        self,
+        loader: "TabLoader",
+        signals: _FetchSignals,
+        generation: int,
+        tab: Tab,
+        selected_class: "Class",
+    ) -> None:
+        super().__init__()
+        self._loader = loader
+        self._signals = signals
+        self._generation = generation
+        self._tab = tab
+        self._selected_class = selected_class
+
+    def run(self) -> None:
+        # The class changed while this job was waiting, skip the queries
+        if self._generation != self._loader.generation:
+            return
+
+        start = time.perf_counter()
+        try:
+            data = self._tab.on_fetch_data(self._selected_class)
+        except Exception as e:
+            self._signals.failed.emit(self._generation, self._tab, str(e))
+        else:
+            elapsed = (time.perf_counter() - start) * 1000
+            self._signals.finished.emit(self._generation, self._tab, data, elapsed)
+
+
+class TabLoader(QtCore.QObject):
+    """
+    Fetches tab data on a worker thread and refreshes the tab views on the GUI thread.
+
+    Each tab's `on_fetch_data` runs on a single database worker thread, so fetches
+    never overlap and each thread keeps its own SQLite connection. `on_fetch_data`
+    only returns the data; it is posted back through a queued signal, given to the
+    tab's `on_data_fetched` and followed by its `refresh_view` on the GUI thread.
+
+    Every call to `cancel` (done when the class changes) starts a new generation:
+    queued jobs of older generations are dropped and results that arrive late are
+    discarded, so a slow fetch for the previous class never overwrites the view.
+    """
+
+    # tab, milliseconds spent fetching
+    tab_loaded = QtCore.Signal(object, float)
+    tab_failed = QtCore.Signal(object, str)
+
+    def __init__(self, parent: QtCore.QObject | None = None) -> None:
+        super().__init__(parent)
+        self._generation = 0
+        self._pool = QtCore.QThreadPool(self)
+        self._pool.setMaxThreadCount(1)
+        # Keep the worker (and its database connection) alive between loads
+        self._pool.setExpiryTimeout(-1)
+
+        # Created on the GUI thread, so emits from the worker are queued here
+        self._signals = _FetchSignals(self)
+        self._signals.finished.connect(self._on_finished)
+        self._signals.failed.connect(self._on_failed)
+
+    @property
+    def generation(self) -> int:
+        """Current load generation, bumped by `cancel`."""
+        return self._generation
+
+    def cancel(self) -> None:
+        """Drops queued fetches and discards results of fetches already running."""
+        self._generation += 1
+        self._pool.clear()
+
+    def load(self, tab: Tab, selected_class: "Class") -> None:
+        """
+        Queues a fetch of the tab's data for the class.
+
+        Args:
+            tab (Tab): the tab to load
+            selected_class (Class): the class to load it for
+        """
+        self._pool.start(
+            _FetchJob(self, self._signals, self._generation, tab, selected_class)
+        )
+
+    def wait(self, msecs: int = -1) -> bool:
+        """
+        Blocks until the queued fetches have run. Their results are delivered once
+        the event loop runs again.
+        """
+        return self._pool.waitForDone(msecs)
+
+    def _on_finished(self, generation: int, tab: Tab, data: object, elapsed: float) -> None:
+        if generation != self._generation:
+            return
+        tab.on_data_fetched(data)
+        tab.refresh_view.emit()
+        self.tab_loaded.emit(tab, elapsed)
+
+    def _on_failed(self, generation: int, tab: Tab, message: str) -> None:
+        if generation != self._generation:
+            return
+        self.tab_failed.emit(tab, message)
@@ -1,6 +1,7 @@
 from gradebook.database.models import Assignment
 from gradebook.views.main_window.tabs.tab import Tab
 from gradebook.database.services import assignments as assignment_service
+from gradebook.database.services import events
 from PySide6 import QtWidgets, QtCore, QtGui
 from gradebook.views.table_view_window.assignment_grader_window import (
     AssignmentGraderWindow,
@@ -13,6 +14,12 @@ if typing.TYPE_CHECKING:
 
 class AssignmentTab(Tab):
 
+    data_tables = ("classassignment",)
+    data_events = (events.AssignmentAssigned,)
+
+    # (student_id, question_id, old_points, new_points) of every saved question score
+    scores_saved = QtCore.Signal(list)
+
     _selected_class: "Class" = None
 
     def __init__(self):
@@ -42,19 +49,24 @@ class AssignmentTab(Tab):
             self._data_model.index(i).data() for i in range(self._data_model.rowCount())
         ]
 
-    def on_fetch_data(self, selected_class: "Class") -> None:
+    def on_fetch_data(self, selected_class: "Class") -> tuple["Class", list[Assignment]]:
         """
-        Fetches the data and caches it for later.
+        Fetches the assignments of the tab's category for the class.
 
         Args:
             model (Class): the class to get assignments of
         """
-        self._selected_class = selected_class
         # Get all the assignments for the class
-        self._assignment_list = assignment_service.get_assignments_for_class(
+        return selected_class, assignment_service.get_assignments_for_class(
             selected_class.id, self.name.lower()
         )
 
+    def on_data_fetched(self, data: tuple["Class", list[Assignment]]) -> None:
+        """
+        Caches the fetched assignments for later.
+        """
+        self._selected_class, self._assignment_list = data
+
     def on_refresh_view(self) -> None:
         """
         Loads the view model with the cached data.
@@ -131,6 +143,12 @@ class AssignmentTab(Tab):
             window.set_assignment_data(selected_assignment, self._selected_class)
             window.exec()
 
+            if window.result() == QtWidgets.QDialog.Accepted:
+                self.status_message.emit(
+                    f"Saved {window.rows_written} rows for {selected_assignment.title}."
+                )
+                self.scores_saved.emit(window.saved_scores)
+
     def _add_row_to_data_model(self, text: str) -> None:
         """
         Add a value to the model
@@ -1,11 +1,16 @@
 from abc import abstractmethod
-from typing import TypedDict
+from typing import NamedTuple, TypedDict
 from wsgiref import headers
 from PySide6 import QtWidgets, QtGui
-from gradebook.database.models import Class, Student
+from gradebook.database.models import Class
+from gradebook.database.dtos import StudentGradeDTO
 from gradebook.views.main_window.tabs.tab import Tab
-from gradebook.database.services import classes as class_service
-from gradebook.database.services import assignments as assignment_service
+from gradebook.database.services import events
+from gradebook.database.services.grade_engine import IncrementalGradeEngine
+
+
+# Tables written by saving grades, see Grade.apply_score_changes
+SCORE_TABLES = ("studentquestionscore", "studentassignmentscore")
 
 
 class GradeBook(TypedDict):
@@ -17,12 +22,27 @@ class GradeBook(TypedDict):
     final: float
 
 
+class _FetchedGrades(NamedTuple):
+    engine: IncrementalGradeEngine
+    grades: list[GradeBook]
+    weights: dict[str, float]
+
+
 class Grade(Tab):
     """
     A class representing a tab in the main window.
     """
 
-    _class_roster: list[Student] = []
+    data_events = (
+        events.ScoreChanged,
+        events.AssignmentScoreChanged,
+        events.WeightChanged,
+        events.StudentEnrolled,
+        events.AssignmentAssigned,
+    )
+
+    _engine: IncrementalGradeEngine = None
+    _class_roster: list[StudentGradeDTO] = []
     _grades: list[GradeBook] = []
     _weights: dict[str, float] = {}
     _data_model = QtGui.QStandardItemModel()
@@ -43,25 +63,86 @@ class Grade(Tab):
         return ["Student Number", "Last Name", "First Name"] + headers
 
     @abstractmethod
-    def on_fetch_data(self, selected_class: "Class") -> None:
+    def on_fetch_data(self, selected_class: "Class") -> _FetchedGrades:
         """
-        Fetches data from the database and holds caches it.
+        Fetches data from the database.
         """
-        # Get the roster for the class
-        self._class_roster = class_service.get_students_in_class(selected_class.id)
+        # Aggregate every student's category totals for the class in one pass, kept
+        # as running sums so later score edits only update the edited rows
+        engine = IncrementalGradeEngine.load(selected_class.id)
 
         # Get a table of all the score sums for each assignment category in Gradebook for each student in the class
-        self._grades = [
-            self._get_student_scores(student.id, selected_class.id)
-            for student in self._class_roster
-        ]
+        grades = [self._grade_book(student) for student in engine.students]
 
         # Get a dictionary of the category weights for the class
-        self._weights = {}
-        for category in GradeBook.__annotations__.keys():
-            self._weights[category] = assignment_service.get_assignment_weight(
-                selected_class.id, category
-            )
+        weights = {
+            category: engine.weights.get(category, 0.0)
+            for category in GradeBook.__annotations__.keys()
+        }
+        return _FetchedGrades(engine, grades, weights)
+
+    def on_data_fetched(self, data: _FetchedGrades) -> None:
+        """
+        Holds the fetched grades until the view is refreshed.
+        """
+        self._engine, self._grades, self._weights = data
+        self._class_roster = self._engine.students
+
+    def apply_score_changes(
+        self,
+        selected_class: "Class",
+        changes: list[tuple[int, int, float | None, float | None]],
+        versions: dict[str, int],
+    ) -> bool:
+        """
+        Applies saved question score edits to the loaded grades and refreshes only the
+        rows of the affected students.
+
+        Args:
+            selected_class (Class): the class the scores were saved for
+            changes: (student_id, question_id, old_points, new_points) tuples
+            versions (dict[str, int]): the class versions after the save
+
+        Returns:
+            bool: False if the tab was not showing the class's data from before the
+            save, in which case nothing was applied and it has to be reloaded
+        """
+        # Saving may only have moved the score counters since the tab was loaded
+        expected = dict(versions)
+        expected.update(
+            (table, version)
+            for table, version in zip(self.data_tables, self._loaded_versions)
+            if table in SCORE_TABLES
+        )
+        if self._engine is None or self.is_stale(selected_class, expected):
+            return False
+
+        roster_ids = self._engine.apply_score_changes(changes)
+        self._refresh_rows(roster_ids)
+        self.mark_loaded(selected_class, versions)
+        return True
+
+    def _grade_book(self, student: StudentGradeDTO) -> GradeBook:
+        return GradeBook(
+            **{
+                category: student.category_score(category)
+                for category in GradeBook.__annotations__.keys()
+            }
+        )
+
+    def _refresh_rows(self, roster_ids: list[int]) -> None:
+        """
+        Rewrites the model rows of some roster entries from the engine.
+
+        Args:
+            roster_ids (list[int]): the roster entries whose grades changed
+        """
+        for roster_id in roster_ids:
+            r = self._engine.row_of(roster_id)
+            self._grades[r] = self._grade_book(self._engine.student(roster_id))
+            texts = self._row_texts(self._build_row(self._class_roster[r], self._grades[r]))
+            for c, text in enumerate(texts):
+                self._data_model.item(r, c).setText(text)
 
     def _build_data_table(self) -> list[list]:
         """
@@ -73,23 +154,41 @@ class Grade(Tab):
 
         Returns:
         """
-        table = []
-        for student, grade_book in zip(self._class_roster, self._grades):
-            row = [
-                student.student_number,
-                student.last_name,
-                student.first_name,
-            ] + list(
-                zip(
-                    grade_book.values(),
-                    [
-                        grade_book[category] * self._weights[category]
-                        for category in GradeBook.__annotations__.keys()
-                    ],
-                )
+        return [
+            self._build_row(student, grade_book)
+            for student, grade_book in zip(self._class_roster, self._grades)
+        ]
+
+    def _build_row(self, student: StudentGradeDTO, grade_book: GradeBook) -> list:
+        """
+        Build the table row of one student.
+        """
+        return [
+            student.student_number,
+            student.last_name,
+            student.first_name,
+        ] + list(
+            zip(
+                grade_book.values(),
+                [
+                    grade_book[category] * self._weights[category]
+                    for category in GradeBook.__annotations__.keys()
+                ],
             )
-            table.append(row)
-        return table
+        )
+
+    @staticmethod
+    def _row_texts(row: list) -> list[str]:
+        """
+        Flatten a table row into cell texts, (score, weighted) pairs take two cells.
+        """
+        texts = []
+        for value in row:
+            if isinstance(value, tuple):
+                texts.extend(f"{v:.2f}" for v in value)
+            else:
+                texts.append(str(value))
+        return texts
 
     def _set_data_model(self, data_table: list[list]) -> None:
         """
@@ -101,40 +200,12 @@ class Grade(Tab):
         self._data_model.setRowCount(0)
         for row in data_table:
             model_row = []
-            for value in row:
-                if isinstance(value, tuple):
-                    for v in value:
-                        item = QtGui.QStandardItem(f"{v:.2f}")
-                        item.setEditable(False)
-                        model_row.append(item)
-                else:
-                    item = QtGui.QStandardItem(str(value))
-                    item.setEditable(False)
-                    model_row.append(item)
+            for text in self._row_texts(row):
+                item = QtGui.QStandardItem(text)
+                item.setEditable(False)
+                model_row.append(item)
             self._data_model.appendRow(model_row)
 
-    def _get_student_scores(self, student_id: int, class_id: int) -> GradeBook:
-        """
-        Get the total scores for each category for a student in a class.
-
-        Args:
-            student_id: The ID of the student.
-            class_id: The ID of the class.
-
-        Returns:
-            Gradebook: A dictionary containing the total scores for each category.
-        """
-        # Get all the assignment scores for the student in the class
-        assignment_scores = [
-            assignment_service.get_student_category_score(
-                student_id, class_id, category
-            )
-            for category in GradeBook.__annotations__.keys()
-        ]
-        return GradeBook(
-            **dict(zip(GradeBook.__annotations__.keys(), assignment_scores))
-        )
-
     @abstractmethod
     def on_refresh_view(self) -> None:
         """
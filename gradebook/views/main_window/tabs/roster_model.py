@@ -0,0 +1,170 @@
+from PySide6 import QtCore
+from gradebook.database.dtos import PageDTO, StudentDTO
+from gradebook.database.services import students as students_service
+
+
+class RosterModel(QtCore.QAbstractTableModel):
+    """
+    Read-only table model of a class roster that loads students a page at a time.
+
+    Views call `canFetchMore`/`fetchMore` as the user scrolls, and every page is one
+    keyset query that continues from the token of the last loaded page. Sorting
+    and filtering reset the model and are done by the query (ORDER BY / WHERE), so
+    only the rows on screen are ever loaded, whatever the size of the roster.
+    """
+
+    PAGE_SIZE = 200
+
+    # (header, StudentDTO field, sort order used when the column is sorted)
+    COLUMNS = [
+        ("Student Number", "student_number", "student_number"),
+        ("Last Name", "last_name", "last_name"),
+        ("First Name", "first_name", "first_name"),
+    ]
+
+    def __init__(self, parent: QtCore.QObject | None = None) -> None:
+        super().__init__(parent)
+        self._class_id: int | None = None
+        self._students: list[StudentDTO] = []
+        self._next_token: str | None = None
+        self._total = 0
+        self._sort = "last_name"
+        self._descending = False
+        self._search: str | None = None
+
+    @property
+    def headers(self) -> list[str]:
+        """Column headers"""
+        return [header for header, _, _ in self.COLUMNS]
+
+    @property
+    def students(self) -> list[StudentDTO]:
+        """The students loaded so far, in display order."""
+        return self._students
+
+    @property
+    def class_id(self) -> int | None:
+        """The class the roster belongs to"""
+        return self._class_id
+
+    @property
+    def total(self) -> int:
+        """Approximate number of students matching the filter, loaded or not."""
+        return self._total
+
+    def fetch_first_page(self, class_id: int) -> PageDTO[StudentDTO]:
+        """
+        Queries the first page of a class with the current sort and filter. Does not
+        change the model, pass the result to `set_first_page`.
+
+        Args:
+            class_id (int): the class to load
+
+        Returns:
+            PageDTO[StudentDTO]: the first page
+        """
+        return students_service.list_students(
+            class_id,
+            self._sort,
+            self._descending,
+            None,
+            self.PAGE_SIZE,
+            self._search,
+        )
+
+    def set_first_page(self, class_id: int | None, page: PageDTO[StudentDTO] | None) -> None:
+        """
+        Replaces the model data with the first page of a class.
+
+        Args:
+            class_id (int | None): the class the page belongs to
+            page (PageDTO[StudentDTO] | None): the first page, from `fetch_first_page`
+        """
+        self.beginResetModel()
+        self._class_id = class_id
+        if class_id is None or page is None:
+            self._students, self._next_token, self._total = [], None, 0
+        else:
+            self._students = list(page.items)
+            self._next_token = page.next_token
+            self._total = page.total
+        self.endResetModel()
+
+    def reload(self) -> None:
+        """Drops the loaded pages and loads the first page again."""
+        if self._class_id is None:
+            return
+        self.set_first_page(self._class_id, self.fetch_first_page(self._class_id))
+
+    def set_search(self, text: str) -> None:
+        """
+        Filters the roster to students whose number or name contains `text`.
+
+        Args:
+            text (str): the filter text, empty to show every student
+        """
+        search = text.strip() or None
+        if search != self._search:
+            self._search = search
+            self.reload()
+
+    # QAbstractTableModel
+
+    def canFetchMore(self, parent: QtCore.QModelIndex = QtCore.QModelIndex()) -> bool:
+        return not parent.isValid() and self._next_token is not None
+
+    def fetchMore(self, parent: QtCore.QModelIndex = QtCore.QModelIndex()) -> None:
+        if parent.isValid() or self._next_token is None:
+            return
+
+        page = students_service.list_students(
+            self._class_id,
+            self._sort,
+            self._descending,
+            self._next_token,
+            self.PAGE_SIZE,
+            self._search,
+        )
+        self._next_token = page.next_token
+        self._total = page.total
+        if not page.items:
+            return
+
+        first = len(self._students)
+        self.beginInsertRows(QtCore.QModelIndex(), first, first + len(page.items) - 1)
+        self._students.extend(page.items)
+        self.endInsertRows()
+
+    def sort(
+        self, column: int, order: QtCore.Qt.SortOrder = QtCore.Qt.SortOrder.AscendingOrder
+    ) -> None:
+        self._sort = self.COLUMNS[column][2]
+        self._descending = order == QtCore.Qt.SortOrder.DescendingOrder
+        self.reload()
+
+    def rowCount(self, parent: QtCore.QModelIndex = QtCore.QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self._students)
+
+    def columnCount(self, parent: QtCore.QModelIndex = QtCore.QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self.COLUMNS)
+
+    def headerData(
+        self,
+        section: int,
+        orientation: QtCore.Qt.Orientation,
+        role: int = QtCore.Qt.ItemDataRole.DisplayRole,
+    ):
+        if role != QtCore.Qt.ItemDataRole.DisplayRole:
+            return None
+        if orientation == QtCore.Qt.Orientation.Horizontal:
+            return self.COLUMNS[section][0]
+        return section + 1
+
+    def data(
+        self,
+        index: QtCore.QModelIndex,
+        role: int = QtCore.Qt.ItemDataRole.DisplayRole,
+    ):
+        if not index.isValid() or role != QtCore.Qt.ItemDataRole.DisplayRole:
+            return None
+        return getattr(self._students[index.row()], self.COLUMNS[index.column()][1])
@@ -1,16 +1,22 @@
 from gradebook.views.main_window.tabs.tab import Tab
-from gradebook.database.services import classes as class_service
-from PySide6 import QtWidgets, QtGui
+from gradebook.views.main_window.tabs.roster_model import RosterModel
+from gradebook.database.dtos import PageDTO, StudentDTO
+from gradebook.database.services import events
+from PySide6 import QtWidgets, QtCore
 import typing
 
 if typing.TYPE_CHECKING:
-    from gradebook.database.models import Student, Class
+    from gradebook.database.models import Class
 
 
 class Roster(Tab):
 
-    _data_model = QtGui.QStandardItemModel()
-    _roster_data: list["Student"] = []
+    data_tables = ("classroster",)
+    data_events = (events.StudentEnrolled,)
+
+    _data_model: RosterModel = None
+    _class_id: int | None = None
+    _first_page: PageDTO[StudentDTO] | None = None
 
     def __init__(self) -> None:
         """
@@ -19,39 +25,42 @@ class Roster(Tab):
         super().__init__()
 
     @property
-    def roster(self) -> list["Student"]:
+    def roster(self) -> list[StudentDTO]:
         """
-        Property to get the roster data.
+        Property to get the students loaded so far.
         """
-        return self._roster_data
+        return self._data_model.students
 
     @property
     def headers(self) -> list[str]:
         """Headers for the View"""
-        return ["Student Number", "Last Name", "First Name"]
+        return self._data_model.headers
 
-    def on_fetch_data(self, selected_class: "Class") -> None:
+    def on_fetch_data(
+        self, selected_class: "Class"
+    ) -> tuple[int, PageDTO[StudentDTO]]:
         """
-        Fetches data from the database and holds caches it.
+        Fetches the first page of the roster. Later pages are fetched by the model as
+        the view scrolls.
         """
-        self._roster_data = class_service.get_students_in_class(selected_class.id)
+        return selected_class.id, self._data_model.fetch_first_page(selected_class.id)
 
-    def on_refresh_view(self) -> list["Student"]:
+    def on_data_fetched(self, data: tuple[int, PageDTO[StudentDTO]]) -> None:
         """
-        Updates the model with fetched data.
+        Keeps the first page until the view is refreshed.
         """
-        # Clear the model
-        self._data_model.removeRows(0, self._data_model.rowCount())
+        self._class_id, self._first_page = data
 
-        # Add the rows from the cache
-        for student in self._roster_data:
-            self._add_row_to_model(
-                [student.student_number, student.last_name, student.first_name]
-            )
+    def on_refresh_view(self) -> None:
+        """
+        Updates the model with fetched data.
+        """
+        self._data_model.set_first_page(self._class_id, self._first_page)
+        self._first_page = None
 
     def _create_view(self) -> None:
         """
-        Add a table view to the tab.
+        Add a filter box and a table view to the tab.
         """
         # Set my name
         self.setObjectName("tab" + self.name)
@@ -60,22 +69,27 @@ class Roster(Tab):
         self._gridLayout = QtWidgets.QGridLayout(self)
         self._gridLayout.setObjectName("gridLayout")
 
-        # Model Headers
-        self._data_model.setHorizontalHeaderLabels(self.headers)
+        # Model
+        self._data_model = RosterModel(self)
+
+        # Filter box, filtering is done by the roster query
+        self._searchEdit = QtWidgets.QLineEdit(self)
+        self._searchEdit.setObjectName("searchEdit")
+        self._searchEdit.setPlaceholderText("Filter by student number or name")
+        self._searchEdit.setClearButtonEnabled(True)
+        self._searchEdit.textChanged.connect(self._data_model.set_search)
 
         # Add a table view to my view
         self._tableView = QtWidgets.QTableView(self)
         self._tableView.setObjectName("tableWidget")
         self._tableView.setModel(self._data_model)
 
-        # Add the table view to the layout
-        self._gridLayout.addWidget(self._tableView, 0, 0, 1, 1)
-
-    def _add_row_to_model(self, row_values: list[str]) -> None:
-        """
-        Adds a new row to the model with the row values.
+        # Sorting is done by the roster query, start with the last name
+        self._tableView.horizontalHeader().setSortIndicator(
+            1, QtCore.Qt.SortOrder.AscendingOrder
+        )
+        self._tableView.setSortingEnabled(True)
 
-        Args:
-            row_values (list[str]): the values to add to the model
-        """
-        self._data_model.appendRow([QtGui.QStandardItem(str(v)) for v in row_values])
+        # Add the filter box and table view to the layout
+        self._gridLayout.addWidget(self._searchEdit, 0, 0, 1, 1)
+        self._gridLayout.addWidget(self._tableView, 1, 0, 1, 1)
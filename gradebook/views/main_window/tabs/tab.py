@@ -1,6 +1,7 @@
 from abc import abstractmethod
 from PySide6 import QtWidgets, QtCore, QtGui
-from gradebook.database.models import BaseModel, Class
+from gradebook.database.models import BaseModel, Class, DataVersion
+from gradebook.database.services import events
 
 
 class Tab(QtWidgets.QWidget):
@@ -10,6 +11,18 @@ class Tab(QtWidgets.QWidget):
 
     fetch_data = QtCore.Signal(BaseModel)
     refresh_view = QtCore.Signal()
+    status_message = QtCore.Signal(str)
+
+    # Versioned tables the view is built from, see classes.get_class_versions
+    data_tables: tuple[str, ...] = DataVersion.TABLES
+
+    # Domain events that can change the view, see affected_by
+    data_events: tuple[type[events.DomainEvent], ...] = (events.DomainEvent,)
+
+    # Class and versions of the data the view shows, and whether it was marked stale
+    _loaded_class_id: int | None = None
+    _loaded_versions: tuple[int, ...] = ()
+    _stale = True
 
     def __init__(self) -> None:
         """
@@ -18,19 +31,30 @@ class Tab(QtWidgets.QWidget):
         super().__init__()
 
         # Connect signals
-        self.fetch_data.connect(self.on_fetch_data)
+        self.fetch_data.connect(self._fetch_now)
         self.refresh_view.connect(self.on_refresh_view)
 
         # Create the view
         self._create_view()
 
     @abstractmethod
-    def on_fetch_data(self, selected_class: "Class") -> None:
+    def on_fetch_data(self, selected_class: "Class") -> object:
         """
-        Fetches data from the database and holds caches it.
+        Fetches data from the database. Runs on the loader's worker thread, so it must
+        not change the tab, the data is returned and passed to `on_data_fetched`.
         """
         raise NotImplementedError("Subclasses must implement on_fetch_data method.")
 
+    @abstractmethod
+    def on_data_fetched(self, data: object) -> None:
+        """
+        Keeps the data returned by `on_fetch_data`, on the GUI thread.
+        """
+        raise NotImplementedError("Subclasses must implement on_data_fetched method.")
+
+    def _fetch_now(self, selected_class: "Class") -> None:
+        self.on_data_fetched(self.on_fetch_data(selected_class))
+
     @abstractmethod
     def on_refresh_view(self) -> None:
         """
@@ -38,6 +62,59 @@ class Tab(QtWidgets.QWidget):
         """
         raise NotImplementedError("Subclasses must implement on_refresh_view method.")
 
+    def _versions_of(self, versions: dict[str, int]) -> tuple[int, ...]:
+        return tuple(versions.get(table, 0) for table in self.data_tables)
+
+    def is_stale(self, selected_class: "Class", versions: dict[str, int]) -> bool:
+        """
+        Checks if the tab has to fetch its data before it shows the class.
+
+        Args:
+            selected_class (Class): the class that should be shown
+            versions (dict[str, int]): the current versions of the class
+
+        Returns:
+            bool: True if the view shows another class, one of `data_tables` changed
+            since it was loaded, or it was marked stale
+        """
+        return (
+            self._stale
+            or self._loaded_class_id != selected_class.id
+            or self._loaded_versions != self._versions_of(versions)
+        )
+
+    def affected_by(self, event: events.DomainEvent, class_id: int) -> bool:
+        """
+        Checks if an event can change the view of a class.
+
+        Args:
+            event (DomainEvent): a committed change
+            class_id (int): the class the view shows
+
+        Returns:
+            bool: True if the event is one of `data_events` and belongs to the class,
+            events without a class (e.g. score changes) may belong to any class
+        """
+        return isinstance(event, self.data_events) and (
+            getattr(event, "class_id", class_id) == class_id
+        )
+
+    def mark_stale(self) -> None:
+        """Marks the data as out of date, it is fetched again when the tab is next shown."""
+        self._stale = True
+
+    def mark_loaded(self, selected_class: "Class", versions: dict[str, int]) -> None:
+        """
+        Records that the view shows the class's data as of the given versions.
+
+        Args:
+            selected_class (Class): the class that was loaded
+            versions (dict[str, int]): the class versions read before the fetch started
+        """
+        self._loaded_class_id = selected_class.id
+        self._loaded_versions = self._versions_of(versions)
+        self._stale = False
+
     @property
     def name(self) -> str:
         """
@@ -1,20 +1,28 @@
-from PySide6 import QtWidgets, QtGui, QtCore
+import math
+from array import array
+from PySide6 import QtWidgets, QtCore
 from gradebook.views.table_view_window.table_view_window import TableViewWindow
+from gradebook.views.table_view_window.change_tracking import CellChange
+from gradebook.views.table_view_window.typed_table_model import (
+    TypedTableModel,
+    format_integer,
+    format_number,
+    format_total,
+)
 from gradebook.database.services import scoring as scoring_service
-from gradebook.database.services import classes as class_service
 from gradebook.database.services import students as students_service
-from gradebook.database.services import assignments as assignment_service
-from gradebook.database.models import (
-    Assignment,
-    AssignmentQuestion,
-    Class,
-    StudentQuestionScore,
-)
+from gradebook.database.models import Assignment, Class
+from gradebook.database.dtos import AssignmentQuestionDTO
 
 
 class AssignmentGraderWindow(TableViewWindow):
 
     _selected_assignment: Assignment = None
+    _selected_class: Class = None
+    _question_list: list[AssignmentQuestionDTO] = []
+    _rows_written = 0
+    _saved_scores: list[tuple[int, int, float | None, float]] = []
+    _row_totals = array("d")
 
     def __init__(self, parent: QtWidgets.QWidget | None = None) -> None:
         super().__init__(parent)
@@ -22,47 +30,119 @@ class AssignmentGraderWindow(TableViewWindow):
 
         # Connect the data changed signal to this function so that it updates when the user changes a value
         self._data_model.dataChanged.connect(
-            self.sum_totals, QtCore.Qt.UniqueConnection
+            self._update_totals, QtCore.Qt.UniqueConnection
         )
 
         # Signal for saving data
         self.accept_signal.connect(self._update_student_scores_from_table_view)
 
+    @property
+    def rows_written(self) -> int:
+        """Number of database rows written by the last save."""
+        return self._rows_written
+
+    @property
+    def saved_scores(self) -> list[tuple[int, int, float | None, float]]:
+        """
+        Question scores written by the last save, as (student_id, question_id,
+        old_points, new_points) with None for a question that had no score.
+        """
+        return self._saved_scores
+
+    @property
+    def _time_column(self) -> int:
+        """Model column holding the time taken"""
+        return 3 + len(self._question_list)
+
+    def _changed_score_cells(self) -> list[CellChange]:
+        """
+        Gets the edited question and time cells.
+
+        Returns:
+            list[CellChange]: every edit in a question or time column
+        """
+        return [
+            change
+            for change in self.changed_cells()
+            if 3 <= change.column <= self._time_column
+        ]
+
     def _data_changed(self) -> bool:
         """
-        Checks if the data in the model has been changed by comparing it to the original model.
+        Checks if any question score or time has been edited.
 
         Returns:
             bool: True if the data has been changed, False otherwise.
         """
-        for r in range(self._data_model.rowCount() - 1):
-            for c in range(self._data_model.columnCount() - 1):
-                if (
-                    self._data_model.item(r, c).text()
-                    != self._original_model.item(r, c).text()
-                ):
-                    return True
-        return False
+        return bool(self._changed_score_cells())
+
+    @property
+    def row_totals(self) -> array:
+        """Cached points total of every row."""
+        return self._row_totals
+
+    @property
+    def _total_column(self) -> int:
+        """Model column holding the computed total"""
+        return self._time_column + 1
+
+    def _row_total(self, row: int) -> float:
+        """Sums the question cells of a row, empty cells count as 0."""
+        total = 0.0
+        for c in range(3, self._time_column):
+            value = self._data_model.value(row, c)
+            if not math.isnan(value):
+                total += value
+        return total
 
     def sum_totals(self) -> None:
         """
-        Gets the points sum for each row and updates the table. Also sets up the dataChanged signal for the first time
+        Rebuilds the cached total of every row and renders every Total cell.
+        """
+        self._row_totals = array(
+            "d", (self._row_total(r) for r in range(self._data_model.rowCount()))
+        )
+        self._render_totals(range(self._data_model.rowCount()))
+
+    def _update_totals(
+        self,
+        top_left: QtCore.QModelIndex,
+        bottom_right: QtCore.QModelIndex,
+        roles: list[int] | None = None,
+    ) -> None:
+        """
+        Recomputes the cached totals of the edited rows and re-renders only those rows.
+
+        Args:
+            top_left (QModelIndex): first changed cell
+            bottom_right (QModelIndex): last changed cell
+            roles (list[int]): changed roles, unused
         """
         if self._data_model_update_lock:
             return
 
+        # Only question columns feed the totals
+        if top_left.column() >= self._time_column or bottom_right.column() < 3:
+            return
+
+        rows = range(top_left.row(), bottom_right.row() + 1)
+        for r in rows:
+            self._row_totals[r] = self._row_total(r)
+
+        self._render_totals(rows)
+
+    def _render_totals(self, rows: range) -> None:
+        """
+        Writes the cached totals of the given rows into the Total column.
+
+        Args:
+            rows (range): the rows to render
+        """
         # Prevent an infinite loop
         self._data_model_update_lock = True
 
-        for r in range(self._data_model.rowCount()):
-            _sum = 0
-            for c in range(3, self._data_model.columnCount() - 2):
-                _sum += float(self._data_model.item(r, c).text())
-            self._data_model.setItem(
-                r,
-                self._data_model.columnCount() - 1,
-                QtGui.QStandardItem(str(f"{_sum:.2f}")),
-            )
+        for r in rows:
+            self._data_model.set_value(r, self._total_column, self._row_totals[r])
 
         # Unlock for the next time it changes
         self._data_model_update_lock = False
@@ -77,81 +157,71 @@ class AssignmentGraderWindow(TableViewWindow):
             assignment (Assignment): the assignment to get the data for
         """
         self._selected_assignment = selected_assignment
+        self._selected_class = selected_class
 
-        # Get the question list for the headers
-        question_list: list[AssignmentQuestion] = (
-            assignment_service.get_assignment_questions(selected_assignment.id)
+        # Load the roster, questions, scores and times in one go
+        grid = scoring_service.get_assignment_score_grid(
+            selected_class.id, selected_assignment.id
         )
+        self._question_list = grid.questions
 
-        # Get the roster
-        student_list = class_service.get_students_in_class(selected_class.id)
-
-        # Get or Create the rows for each student
+        # Missing scores and times are shown as empty cells, the total is computed below
         table = []
-        for student in student_list:
-            # Get the student score for each question
-            score_records: list["StudentQuestionScore"] = (
-                scoring_service.get_student_scores_for_assignment(
-                    selected_assignment.id, student.id
-                )
+        for student, scores, total_time in zip(grid.students, grid.scores, grid.times):
+            table.append(
+                [student.student_number, student.last_name, student.first_name]
+                + scores
+                + [total_time, None]
             )
-            row_data = [
-                student.student_number,
-                student.last_name,
-                student.first_name,
-            ]
-            # Get the time taken from the database
-            total_time = scoring_service.get_student_assignment_time(
-                student.id, selected_assignment.id
-            )
-            if score_records == []:
-                table.append(
-                    row_data + [0 for _ in range(len(question_list))] + [total_time]
-                )
-            else:
-                table.append(
-                    row_data + [s.points_scored for s in score_records] + [total_time]
-                )  # TODO: figure out what structure gets returned
 
         self.set_headers(
             ["Student ID", "Last Name", "First Name"]
-            + [q.text for q in question_list]
+            + [q.text for q in grid.questions]
             + ["Time", "Total"]
         )
 
-        self.set_model_data(table)
+        # Scores, time and total are stored as numbers
+        numeric_columns = {c: format_number for c in range(3, self._time_column)}
+        numeric_columns[self._time_column] = format_integer
+        numeric_columns[self._total_column] = format_total
+        self.set_model_data(table, numeric_columns, [self._total_column])
         self.sum_totals()
 
-    def _update_student_scores_from_table_view(
-        self, model: QtGui.QStandardItemModel
-    ) -> None:
+    def _update_student_scores_from_table_view(self, model: TypedTableModel) -> None:
         """
         Slot to handle updating student scores from the table view.
 
         Args:
-            model (QtGui.QStandardItemModel): the model from the table view with updated scores
+            model (TypedTableModel): the model from the table view with updated scores
         """
-        # Get the question list for the headers
-        question_list: list[AssignmentQuestion] = (
-            assignment_service.get_assignment_questions(self._selected_assignment.id)
+        # Only the edited cells are saved
+        changed_cells = self._changed_score_cells()
+
+        # Resolve every affected student in one query
+        students = students_service.get_students_dto_by_numbers(
+            [model.text(change.row, 0) for change in changed_cells]
         )
 
-        # Loop though all the students in the model and update their assignment scores, question scores, and total time if applicable
-        for r in range(model.rowCount()):
-            student_number = model.item(r, 0).text()
-            student = students_service.get_student_by_number(student_number)
-
-            # Update question scores
-            for c in range(3, 3 + len(question_list)):
-                question_score = float(model.item(r, c).text())
-                question = question_list[c - 3]
-                scoring_service.update_student_question_score(
-                    student.id, question.id, question_score
-                )
-
-            # Update total time if applicable
-            if model.item(r, 3 + len(question_list)).text() != "":
-                total_time = int(model.item(r, 3 + len(question_list)).text())
-                scoring_service.update_student_assignment_time(
-                    student.id, self._selected_assignment.id, total_time
-                )
+        question_scores = []
+        saved_scores = []
+        times = {}
+        for change in changed_cells:
+            student = students[model.text(change.row, 0)]
+            if change.column == self._time_column:
+                # Update total time if applicable
+                if change.new != "":
+                    times[student.id] = int(change.new)
+            elif change.new != "":
+                question = self._question_list[change.column - 3]
+                question_scores.append((student.id, question.id, float(change.new)))
+                old = float(change.old) if change.old != "" else None
+                saved_scores.append((student.id, question.id, old, float(change.new)))
+
+        # Write everything in a single transaction
+        self._rows_written = scoring_service.save_assignment_grades(
+            self._selected_class.id,
+            self._selected_assignment.id,
+            question_scores,
+            times,
+        )
+        self._saved_scores = saved_scores
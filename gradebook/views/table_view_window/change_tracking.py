@@ -0,0 +1,10 @@
+from typing import NamedTuple
+
+
+class CellChange(NamedTuple):
+    """An edited cell with the text it was loaded with and the text it holds now."""
+
+    row: int
+    column: int
+    old: str
+    new: str
@@ -1,5 +1,8 @@
-from PySide6 import QtWidgets, QtGui, QtCore
+from typing import Callable
+from PySide6 import QtWidgets, QtCore
 from gradebook.views.table_view_window.ui_table_view_window import Ui_TableViewWindow
+from gradebook.views.table_view_window.change_tracking import CellChange
+from gradebook.views.table_view_window.typed_table_model import TypedTableModel
 
 
 class TableViewWindow(QtWidgets.QDialog):
@@ -8,9 +11,7 @@ class TableViewWindow(QtWidgets.QDialog):
     """
 
     _data_model_update_lock = False
-    _data_model = QtGui.QStandardItemModel()
-    _accept_signal = QtCore.Signal(QtGui.QStandardItemModel)
-    _original_model = QtGui.QStandardItemModel()
+    _accept_signal = QtCore.Signal(QtCore.QAbstractItemModel)
 
     def __init__(self, parent: QtWidgets.QWidget | None = None) -> None:
         super().__init__(parent)
@@ -18,6 +19,9 @@ class TableViewWindow(QtWidgets.QDialog):
         self.ui.setupUi(self)
         self.setModal(True)
 
+        # Each dialog owns its model, edits are recorded as they are made
+        self._data_model = TypedTableModel(self)
+
         # Setup Model
         self.ui.tableView.setModel(self._data_model)
 
@@ -32,7 +36,7 @@ class TableViewWindow(QtWidgets.QDialog):
         return self._accept_signal
 
     @property
-    def data_model(self) -> QtGui.QStandardItemModel:
+    def data_model(self) -> TypedTableModel:
         """Property to access the data model for this dialog."""
         return self._data_model
 
@@ -44,21 +48,23 @@ class TableViewWindow(QtWidgets.QDialog):
             self._accept_signal.emit(self._data_model)
         super().accept()
 
+    def changed_cells(self) -> list[CellChange]:
+        """
+        Gets the cells edited since the data was loaded.
+
+        Returns:
+            list[CellChange]: (row, column, old, new) for every edited cell
+        """
+        return self._data_model.changed_cells()
+
     def _data_changed(self) -> bool:
         """
-        Checks if the data in the model has been changed by comparing it to the original model.
+        Checks if the data in the model has been changed since it was loaded.
 
         Returns:
             bool: True if the data has been changed, False otherwise.
         """
-        for r in range(self._data_model.rowCount()):
-            for c in range(self._data_model.columnCount()):
-                if (
-                    self._data_model.item(r, c).text()
-                    != self._original_model.item(r, c).text()
-                ):
-                    return True
-        return False
+        return bool(self._data_model.changed_cells())
 
     def set_headers(self, headers: list[str]) -> None:
         """
@@ -69,18 +75,20 @@ class TableViewWindow(QtWidgets.QDialog):
         """
         self._data_model.setHorizontalHeaderLabels(headers)
 
-    def set_model_data(self, data: list[list[any]]) -> None:
+    def set_model_data(
+        self,
+        data: list[list[any]],
+        numeric_columns: dict[int, Callable[[float], str]] | None = None,
+        read_only_columns: list[int] | None = None,
+    ) -> None:
         """
         Sets sets the data of the view model using raw data.
 
         Args:
             data (list[list[any]]): The raw data to add to the model
+            numeric_columns (dict[int, Callable] | None): columns stored as numbers,
+                mapped to the function formatting their text
+            read_only_columns (list[int] | None): columns the user cannot edit
         """
-        self._data_model.removeRows(0, self._data_model.rowCount())
-
-        for r in data:
-            new_row = [QtGui.QStandardItem(str(c)) for c in r]
-            self._data_model.appendRow(new_row)
-
-            copy_row = [QtGui.QStandardItem(str(c)) for c in r]
-            self._original_model.appendRow(copy_row)
+        # The loaded data is the baseline for change tracking
+        self._data_model.load(data, numeric_columns or {}, read_only_columns or [])
@@ -0,0 +1,237 @@
+import math
+from array import array
+from typing import Callable, Iterable
+from PySide6 import QtCore
+from gradebook.views.table_view_window.change_tracking import CellChange
+
+# Empty numeric cells are stored as NaN
+EMPTY = math.nan
+
+
+def format_number(value: float) -> str:
+    """Default display text of a numeric cell, e.g. 4.0"""
+    return str(value)
+
+
+def format_integer(value: float) -> str:
+    """Display text of a whole number cell, e.g. 332"""
+    return str(int(value))
+
+
+def format_total(value: float) -> str:
+    """Display text of a computed total, e.g. 13.00"""
+    return f"{value:.2f}"
+
+
+class TypedTableModel(QtCore.QAbstractTableModel):
+    """
+    Table model that keeps its data in typed column stores and builds the display
+    and edit text of a cell only when a view asks for it.
+
+    Numeric columns live in one flat row-major `array('d')` (NaN marks an empty
+    cell) and every other column is a plain list of strings, so a grid costs a few
+    bytes per cell instead of one Qt item object per cell.
+
+    Edits made through `setData` are recorded as they happen: `changed_cells`
+    returns (row, column, old, new) for every cell that differs from the text it
+    was loaded with, and editing a cell back to that text removes its entry.
+    """
+
+    def __init__(self, parent: QtCore.QObject | None = None) -> None:
+        super().__init__(parent)
+        self._headers: list[str] = []
+        self._row_count = 0
+        # column -> index into the numeric row or the string column store
+        self._numeric_slot: dict[int, int] = {}
+        self._text_slot: dict[int, int] = {}
+        self._formatters: dict[int, Callable[[float], str]] = {}
+        self._read_only: set[int] = set()
+        self._values = array("d")
+        self._texts: list[list[str]] = []
+        self._changes: dict[tuple[int, int], CellChange] = {}
+
+    # Loading
+
+    def setHorizontalHeaderLabels(self, headers: list[str]) -> None:
+        """
+        Sets the column headers, same as QStandardItemModel.setHorizontalHeaderLabels.
+        """
+        self._headers = list(headers)
+        self.headerDataChanged.emit(
+            QtCore.Qt.Orientation.Horizontal, 0, max(len(self._headers) - 1, 0)
+        )
+
+    def load(
+        self,
+        rows: list[list],
+        numeric_columns: dict[int, Callable[[float], str]] | Iterable[int] = (),
+        read_only_columns: Iterable[int] = (),
+    ) -> None:
+        """
+        Replaces the model data.
+
+        Args:
+            rows (list[list]): row values, None (or "") is an empty cell
+            numeric_columns: columns stored as numbers, optionally mapped to the
+                function that formats their display text
+            read_only_columns: columns the user cannot edit
+        """
+        column_count = max([len(self._headers)] + [len(r) for r in rows])
+        if not isinstance(numeric_columns, dict):
+            numeric_columns = {c: format_number for c in numeric_columns}
+
+        self.beginResetModel()
+        self._row_count = len(rows)
+        self._numeric_slot = {}
+        self._text_slot = {}
+        for c in range(column_count):
+            if c in numeric_columns:
+                self._numeric_slot[c] = len(self._numeric_slot)
+            else:
+                self._text_slot[c] = len(self._text_slot)
+        self._formatters = dict(numeric_columns)
+        self._read_only = set(read_only_columns)
+
+        width = len(self._numeric_slot)
+        self._values = array("d", [EMPTY]) * (width * len(rows))
+        self._texts = [[""] * len(rows) for _ in self._text_slot]
+        for r, row in enumerate(rows):
+            for c, value in enumerate(row):
+                if value is None or value == "":
+                    continue
+                if c in self._numeric_slot:
+                    self._values[r * width + self._numeric_slot[c]] = float(value)
+                else:
+                    self._texts[self._text_slot[c]][r] = str(value)
+        self._changes.clear()
+        self.endResetModel()
+
+    # Typed access
+
+    def value(self, row: int, column: int) -> float:
+        """
+        Gets the number stored in a numeric cell.
+
+        Returns:
+            float: the value, NaN for an empty cell
+        """
+        return self._values[row * len(self._numeric_slot) + self._numeric_slot[column]]
+
+    def set_value(self, row: int, column: int, value: float) -> None:
+        """
+        Sets a numeric cell without recording it as an edit. Use for computed columns.
+        """
+        offset = row * len(self._numeric_slot) + self._numeric_slot[column]
+        if self._values[offset] != value:
+            self._values[offset] = value
+            index = self.index(row, column)
+            self.dataChanged.emit(index, index, [QtCore.Qt.ItemDataRole.DisplayRole])
+
+    def text(self, row: int, column: int) -> str:
+        """
+        Gets the display text of a cell.
+        """
+        if column in self._text_slot:
+            return self._texts[self._text_slot[column]][row]
+        if column not in self._numeric_slot:
+            # header without data
+            return ""
+        value = self.value(row, column)
+        return "" if math.isnan(value) else self._formatters[column](value)
+
+    # Change tracking
+
+    def changed_cells(self) -> list[CellChange]:
+        """
+        Gets every cell that differs from the data it was loaded with.
+
+        Returns:
+            list[CellChange]: the edits, ordered by row then column
+        """
+        return [self._changes[key] for key in sorted(self._changes)]
+
+    def clear_changes(self) -> None:
+        """Forget the recorded edits, making the current data the new baseline."""
+        self._changes.clear()
+
+    # QAbstractTableModel
+
+    def rowCount(self, parent: QtCore.QModelIndex = QtCore.QModelIndex()) -> int:
+        return 0 if parent.isValid() else self._row_count
+
+    def columnCount(self, parent: QtCore.QModelIndex = QtCore.QModelIndex()) -> int:
+        if parent.isValid():
+            return 0
+        return max(len(self._headers), len(self._numeric_slot) + len(self._text_slot))
+
+    def headerData(
+        self,
+        section: int,
+        orientation: QtCore.Qt.Orientation,
+        role: int = QtCore.Qt.ItemDataRole.DisplayRole,
+    ):
+        if role != QtCore.Qt.ItemDataRole.DisplayRole:
+            return None
+        if orientation == QtCore.Qt.Orientation.Horizontal:
+            return self._headers[section] if section < len(self._headers) else None
+        return section + 1
+
+    def flags(self, index: QtCore.QModelIndex) -> QtCore.Qt.ItemFlag:
+        flags = QtCore.Qt.ItemFlag.ItemIsEnabled | QtCore.Qt.ItemFlag.ItemIsSelectable
+        if index.column() not in self._read_only:
+            flags |= QtCore.Qt.ItemFlag.ItemIsEditable
+        return flags
+
+    def data(
+        self,
+        index: QtCore.QModelIndex,
+        role: int = QtCore.Qt.ItemDataRole.DisplayRole,
+    ):
+        if not index.isValid() or role not in (
+            QtCore.Qt.ItemDataRole.DisplayRole,
+            QtCore.Qt.ItemDataRole.EditRole,
+        ):
+            return None
+        return self.text(index.row(), index.column())
+
+    def setData(
+        self,
+        index: QtCore.QModelIndex,
+        value: object,
+        role: int = QtCore.Qt.ItemDataRole.EditRole,
+    ) -> bool:
+        """
+        Stores an edit. Text that is not a finite number is rejected for numeric columns.
+        """
+        if not index.isValid() or role != QtCore.Qt.ItemDataRole.EditRole:
+            return False
+
+        r, c = index.row(), index.column()
+        if c not in self._numeric_slot and c not in self._text_slot:
+            return False
+        old = self._changes[(r, c)].old if (r, c) in self._changes else self.text(r, c)
+        text = "" if value is None else str(value).strip()
+
+        if c in self._numeric_slot:
+            try:
+                number = float(text) if text != "" else EMPTY
+            except ValueError:
+                return False
+            # "inf", "nan" and "1e400" parse but cannot be displayed or saved
+            if text != "" and not math.isfinite(number):
+                return False
+            self._values[r * len(self._numeric_slot) + self._numeric_slot[c]] = number
+        else:
+            self._texts[self._text_slot[c]][r] = text
+
+        new = self.text(r, c)
+        if new == old:
+            self._changes.pop((r, c), None)
+        else:
+            self._changes[(r, c)] = CellChange(r, c, old, new)
+        self.dataChanged.emit(
+            index,
+            index,
+            [QtCore.Qt.ItemDataRole.DisplayRole, QtCore.Qt.ItemDataRole.EditRole],
+        )
+        return True
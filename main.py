@@ -1,7 +1,9 @@
 from gradebook.views.main_window.main_window import MainWindow
+from gradebook.database.models import init_db
 from PySide6.QtWidgets import QApplication
 
 if __name__ == "__main__":
+    init_db(profile="desktop", create_tables=True)
     app = QApplication([])
     window = MainWindow(app)
     window.show()
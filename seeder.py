@@ -5,6 +5,7 @@ from faker import Faker
 
 from gradebook.database.models import (
     db,
+    init_db,
     Class,
     Student,
     ClassRoster,
@@ -26,7 +27,7 @@ def reset_database():
     db_path = os.getenv("DB_PATH", "gradebook.db")  # or db.database for Peewee >=3.15
 
     # Close if already open
-    if not db.is_closed():
+    if db.obj is not None and not db.is_closed():
         db.close()
 
     # Safety check
@@ -35,20 +36,8 @@ def reset_database():
         os.remove(db_path)
 
     print(f"Connecting to database at {db_path} ...")
-    db.connect()
-    db.create_tables(
-        [
-            Class,
-            Student,
-            ClassRoster,
-            Assignment,
-            AssignmentQuestion,
-            ClassAssignment,
-            StudentAssignmentScore,
-            StudentQuestionScore,
-            AssignmentCategoryWeight,
-        ]
-    )
+    # Seeding is one large write, use the bulk-load pragmas
+    init_db(db_path, profile="bulk-load", create_tables=True)
 
 
 # -----------------------------------------------------
@@ -1,5 +1,6 @@
 import os
 import pytest
+from peewee import SqliteDatabase
 
 # Force tests to use in-memory SQLite database
 os.environ.setdefault("DB_PATH", ":memory:")
@@ -17,19 +18,33 @@ from gradebook.database.models import (
     StudentAssignmentScore,
     AssignmentCategoryWeight,
     StudentQuestionScore,
+    DataVersion,
+    StudentCategoryRollup,
 )
+from gradebook.database.triggers import create_triggers
+from gradebook.database.services import scoring
 
 # Initialize proxy to an in-memory DB; do not auto-create tables here — tests will manage schema
 models.init_db(db_path=":memory:")
 
+# Every test runs against SQLite's defaults and against the app's "desktop" profile,
+# which turns on foreign keys and so the ON DELETE CASCADE actions
+DATABASES = {
+    "default": db.obj,
+    "desktop": SqliteDatabase(":memory:", pragmas=models.SQLITE_PROFILES["desktop"]),
+}
 
-@pytest.fixture(autouse=True)
-def reset_db():
+
+@pytest.fixture(autouse=True, params=list(DATABASES))
+def reset_db(request):
+    db.initialize(DATABASES[request.param])
     # Drop in an order that respects foreign keys, use safe=True to avoid errors
     real_db = db.obj if hasattr(db, "obj") else db
 
     db.drop_tables(
         [
+            StudentCategoryRollup,
+            DataVersion,
             StudentQuestionScore,
             StudentAssignmentScore,
             ClassAssignment,
@@ -53,6 +68,26 @@ def reset_db():
             StudentAssignmentScore,
             AssignmentCategoryWeight,
             StudentQuestionScore,
+            DataVersion,
+            StudentCategoryRollup,
         ]
     )
+    create_triggers(real_db)
+    # ids and versions start over with the tables, so cached grades no longer apply
+    scoring.grade_cache.invalidate()
     yield
+
+
+@pytest.fixture
+def count_queries(monkeypatch):
+    """Records the SQL of every statement executed, e.g. `len(count_queries)` after a call."""
+    real_db = db.obj
+    executed = []
+    execute_sql = real_db.execute_sql
+
+    def counting(sql, params=None, *args, **kwargs):
+        executed.append(sql)
+        return execute_sql(sql, params, *args, **kwargs)
+
+    monkeypatch.setattr(real_db, "execute_sql", counting)
+    return executed
@@ -0,0 +1,167 @@
+import pytest
+from gradebook.database.models import (
+    db,
+    AssignmentQuestion,
+    Class,
+    ClassAssignment,
+    ClassRoster,
+    Student,
+    StudentAssignmentScore,
+    StudentCategoryRollup,
+    StudentQuestionScore,
+)
+from gradebook.database.repair import repair
+from gradebook.database.services.assignments import create_assignment, assign_to_class
+from gradebook.database.services.classes import create_class, enroll_student
+from gradebook.database.services.students import create_student
+from gradebook.database.services.scoring import (
+    record_full_assignment,
+    repair_totals,
+    update_student_question_score,
+)
+
+
+def _total_score(sas) -> float:
+    return StudentAssignmentScore.get_by_id(sas.id).total_score
+
+
+def _total_points(ca) -> float:
+    return ClassAssignment.get_by_id(ca.id).total_points
+
+
+def _graded(name="Totals"):
+    c = create_class(name, None, None)
+    s = create_student(f"{name}1", "T", "One")
+    roster = enroll_student(c, s)
+    a = create_assignment("Quiz", "quiz", [5, 5, 10])
+    ca = assign_to_class(c, a)
+    q1, q2, q3 = [q.id for q in a.questions]
+    sas = record_full_assignment(roster, ca, {q1: 2.0}, total_time=30)
+    return c, s, a, ca, sas, (q1, q2, q3)
+
+
+def test_question_score_writes_keep_the_total_in_step():
+    c, s, a, ca, sas, (q1, q2, q3) = _graded()
+    assert _total_score(sas) == 2.0
+
+    update_student_question_score(s.id, q2, 4.0)
+    assert _total_score(sas) == 6.0
+
+    update_student_question_score(s.id, q1, 5.0)
+    assert _total_score(sas) == 9.0
+
+    StudentQuestionScore.delete().where(
+        StudentQuestionScore.assignment_question == q2
+    ).execute()
+    assert _total_score(sas) == 5.0
+
+
+def test_deleting_a_question_removes_its_scores_from_the_total():
+    c, s, a, ca, sas, (q1, q2, q3) = _graded()
+    update_student_question_score(s.id, q2, 4.0)
+
+    AssignmentQuestion.delete().where(AssignmentQuestion.id == q1).execute()
+    assert _total_score(sas) == 4.0
+    assert _total_points(ca) == 15
+
+
+def test_new_assignment_score_includes_existing_question_scores():
+    c = create_class("Existing", None, None)
+    s = create_student("X1", "X", "One")
+    roster = enroll_student(c, s)
+    a = create_assignment("Quiz", "quiz", [5, 5])
+    ca = assign_to_class(c, a)
+    q1, q2 = [q.id for q in a.questions]
+    update_student_question_score(s.id, q1, 3.0)
+
+    sas = record_full_assignment(roster, ca, {q2: 4.0})
+    assert sas.total_score == 7.0
+    assert _total_score(sas) == 7.0
+
+
+def test_shared_assignment_updates_every_class():
+    c1, s, a, ca1, sas1, (q1, q2, q3) = _graded()
+    c2 = create_class("Other", None, None)
+    roster2 = enroll_student(c2, s)
+    ca2 = assign_to_class(c2, a)
+    sas2 = record_full_assignment(roster2, ca2, {})
+    assert _total_score(sas2) == 2.0
+
+    update_student_question_score(s.id, q3, 10.0)
+    assert _total_score(sas1) == 12.0
+    assert _total_score(sas2) == 12.0
+
+
+def test_question_points_keep_the_class_total_in_step():
+    c, s, a, ca, sas, (q1, q2, q3) = _graded()
+    assert _total_points(ca) == 20
+
+    AssignmentQuestion.update(point_value=8).where(AssignmentQuestion.id == q1).execute()
+    assert _total_points(ca) == 23
+
+    AssignmentQuestion.create(assignment=a, text="Bonus", point_value=2)
+    assert _total_points(ca) == 25
+
+    AssignmentQuestion.delete().where(AssignmentQuestion.id == q3).execute()
+    assert _total_points(ca) == 15
+
+
+def test_repair_fixes_drifted_totals():
+    c, s, a, ca, sas, qs = _graded()
+    other, _, _, other_ca, other_sas, _ = _graded("Other")
+    for class_assignment in (ca, other_ca):
+        ClassAssignment.update(total_points=99).where(
+            ClassAssignment.id == class_assignment.id
+        ).execute()
+    for score in (sas, other_sas):
+        StudentAssignmentScore.update(total_score=42).where(
+            StudentAssignmentScore.id == score.id
+        ).execute()
+
+    assert repair_totals(c.id) == 2
+    assert (_total_points(ca), _total_score(sas)) == (20, 2.0)
+    assert (_total_points(other_ca), _total_score(other_sas)) == (99, 42)
+
+    assert repair_totals() == 2
+    assert (_total_points(other_ca), _total_score(other_sas)) == (20, 2.0)
+    assert repair_totals() == 0
+
+
+def test_repair_fixes_totals_and_rollups_of_every_class():
+    c, s, a, ca, sas, qs = _graded()
+    other, _, _, other_ca, other_sas, _ = _graded("Other")
+    StudentAssignmentScore.update(total_score=42).execute()
+    StudentCategoryRollup.update(points=99).execute()
+
+    assert repair() == (2, 2)
+    assert (_total_score(sas), _total_score(other_sas)) == (2.0, 2.0)
+    assert [r.points for r in StudentCategoryRollup.select()] == [2.0, 2.0]
+    assert repair(c.id) == (0, 1)
+
+
+def test_cascading_deletes_keep_totals_and_rollups_right():
+    if not db.foreign_keys:
+        pytest.skip("ON DELETE CASCADE needs foreign keys, run under the desktop profile")
+    c, s, a, ca, sas, (q1, q2, q3) = _graded()
+    update_student_question_score(s.id, q2, 4.0)
+    roster = ClassRoster.get(student=s.id)
+
+    # the question's scores go with it, and are only subtracted once
+    AssignmentQuestion.delete().where(AssignmentQuestion.id == q1).execute()
+    assert not StudentQuestionScore.select().where(
+        StudentQuestionScore.assignment_question == q1
+    ).exists()
+    assert (_total_score(sas), _total_points(ca)) == (4.0, 15)
+    rollup = StudentCategoryRollup.get(roster_entry=roster.id, category="quiz")
+    assert (rollup.points, rollup.possible) == (4.0, 15.0)
+
+    # deleting the student removes the enrollment, its totals and its rollups
+    Student.delete().where(Student.id == s.id).execute()
+    assert not ClassRoster.select().where(ClassRoster.id == roster.id).exists()
+    assert not StudentAssignmentScore.select().where(
+        StudentAssignmentScore.id == sas.id
+    ).exists()
+    assert not StudentCategoryRollup.select().exists()
+
+    Class.delete().where(Class.id == c.id).execute()
+    assert not ClassAssignment.select().exists()
@@ -0,0 +1,89 @@
+from gradebook.database.models import (
+    Assignment,
+    AssignmentQuestion,
+    ClassAssignment,
+    ClassRoster,
+    StudentCategoryRollup,
+)
+from gradebook.database.services.assignments import create_assignment, assign_to_class
+from gradebook.database.services.classes import create_class, enroll_student
+from gradebook.database.services.students import create_student
+from gradebook.database.services.scoring import (
+    rebuild_rollups,
+    update_student_question_score,
+)
+
+
+def _rollups(roster) -> dict[str, tuple[float, float, int]]:
+    return {
+        r.category: (r.points, r.possible, r.n_assignments)
+        for r in StudentCategoryRollup.select().where(
+            StudentCategoryRollup.roster_entry == roster.id
+        )
+    }
+
+
+def _class_with_scores(name="Rollups"):
+    c = create_class(name, None, None)
+    s = create_student(f"{name}1", "R", "One")
+    roster = enroll_student(c, s)
+    quiz = create_assignment("Quiz", "quiz", [5, 5])
+    hw = create_assignment("HW", "homework", [10])
+    assign_to_class(c, quiz)
+    assign_to_class(c, hw)
+    q1, q2 = [q.id for q in quiz.questions]
+    update_student_question_score(s.id, q1, 4.0)
+    update_student_question_score(s.id, hw.questions[0].id, 7.0)
+    return c, s, roster, quiz, hw, (q1, q2)
+
+
+def test_rollups_follow_enrollment_assignments_and_scores():
+    c, s, roster, quiz, hw, (q1, q2) = _class_with_scores()
+    assert _rollups(roster) == {"quiz": (4.0, 10.0, 1), "homework": (7.0, 10.0, 1)}
+
+    update_student_question_score(s.id, q2, 3.0)
+    update_student_question_score(s.id, q1, 5.0)
+    assert _rollups(roster)["quiz"] == (8.0, 10.0, 1)
+
+    # scores the student already has count once the assignment is assigned
+    quiz2 = create_assignment("Quiz 2", "quiz", [10])
+    update_student_question_score(s.id, quiz2.questions[0].id, 6.0)
+    assert _rollups(roster)["quiz"] == (8.0, 10.0, 1)
+    assign_to_class(c, quiz2)
+    assert _rollups(roster)["quiz"] == (14.0, 20.0, 2)
+
+    # a late enrollment starts from the student's existing scores
+    other = create_class("Other", None, None)
+    assign_to_class(other, quiz)
+    other_roster = enroll_student(other, s)
+    assert _rollups(other_roster) == {"quiz": (8.0, 10.0, 1)}
+
+
+def test_rollups_follow_question_and_assignment_changes():
+    c, s, roster, quiz, hw, (q1, q2) = _class_with_scores()
+
+    AssignmentQuestion.update(point_value=8).where(AssignmentQuestion.id == q2).execute()
+    assert _rollups(roster)["quiz"] == (4.0, 13.0, 1)
+
+    AssignmentQuestion.delete().where(AssignmentQuestion.id == q1).execute()
+    assert _rollups(roster)["quiz"] == (0.0, 8.0, 1)
+
+    Assignment.update(category="test").where(Assignment.id == hw.id).execute()
+    assert _rollups(roster) == {"quiz": (0.0, 8.0, 1), "test": (7.0, 10.0, 1)}
+
+    ClassAssignment.delete().where(ClassAssignment.assignment == quiz.id).execute()
+    assert _rollups(roster) == {"test": (7.0, 10.0, 1)}
+
+    ClassRoster.delete().where(ClassRoster.id == roster.id).execute()
+    assert _rollups(roster) == {}
+
+
+def test_rebuild_recomputes_one_class():
+    c, s, roster, *_ = _class_with_scores()
+    other, _, other_roster, *_ = _class_with_scores("Other")
+    expected = _rollups(roster)
+    StudentCategoryRollup.update(points=99, possible=99, n_assignments=9).execute()
+
+    assert rebuild_rollups(c.id) == 2
+    assert _rollups(roster) == expected
+    assert _rollups(other_roster)["quiz"] == (99, 99, 9)
@@ -0,0 +1,124 @@
+import random
+import pytest
+from gradebook.database.services.assignments import (
+    create_assignment,
+    assign_to_class,
+    get_student_category_score,
+)
+from gradebook.database.services.classes import create_class, enroll_student
+from gradebook.database.services.students import create_student
+from gradebook.database.services.scoring import (
+    compute_class_grade_matrix,
+    compute_final_grade,
+    record_full_assignment,
+    set_category_weight,
+    update_student_question_score,
+)
+from gradebook.database.models import Assignment, ClassRoster
+
+
+def _build_class():
+    c = create_class("Matrix")
+    s1 = create_student("M1", "Ann", "Alpha")
+    s2 = create_student("M2", "Ben", "Beta")
+    s3 = create_student("M3", "Cal", "Gamma")
+    r1 = enroll_student(c, s1)
+    r2 = enroll_student(c, s2)
+    enroll_student(c, s3)
+    quiz = create_assignment("Q", "quiz", [5, 5])
+    hw = create_assignment("H", "homework", [10, 10])
+    test = create_assignment("T", "test", [20])
+    ca_quiz = assign_to_class(c, quiz)
+    ca_hw = assign_to_class(c, hw)
+    assign_to_class(c, test)
+    q1, q2 = list(quiz.questions)
+    record_full_assignment(r1, ca_quiz, {q1.id: 5, q2.id: 3})
+    record_full_assignment(r2, ca_quiz, {q1.id: 2, q2.id: 2})
+    record_full_assignment(r1, ca_hw, {q.id: 10 for q in hw.questions})
+    set_category_weight(c, "quiz", 0.3)
+    set_category_weight(c, "homework", 0.3)
+    set_category_weight(c, "test", 0.4)
+    return c
+
+
+def test_matrix_matches_per_student_category_scores():
+    c = _build_class()
+    matrix = compute_class_grade_matrix(c.id)
+    assert [s.student_number for s in matrix.students] == ["M1", "M2", "M3"]
+    for student in matrix.students:
+        for category in Assignment.ASSIGNMENT_CATEGORIES:
+            assert student.category_score(category) == pytest.approx(
+                get_student_category_score(student.student_id, c.id, category)
+            )
+
+
+def test_matrix_points_possible_and_finals():
+    c = _build_class()
+    matrix = compute_class_grade_matrix(c.id)
+    first = matrix.students[0]
+    assert first.points == {"quiz": 8, "homework": 20}
+    assert first.possible == {"quiz": 10, "homework": 20, "test": 20}
+    assert first.final_grade == pytest.approx((0.8 * 0.3 + 1.0 * 0.3) * 100)
+    assert matrix.students[2].final_grade == 0.0
+    assert matrix.weights == {"quiz": 0.3, "homework": 0.3, "test": 0.4}
+
+
+def test_compute_final_grade_uses_matrix_row():
+    c = _build_class()
+    matrix = compute_class_grade_matrix(c.id)
+    for student in matrix.students:
+        roster = ClassRoster.get_by_id(student.roster_entry_id)
+        assert compute_final_grade(roster) == pytest.approx(student.final_grade)
+
+
+def test_matrix_reflects_single_question_updates():
+    c = _build_class()
+    first = compute_class_grade_matrix(c.id).students[0]
+    quiz_question = Assignment.get(Assignment.title == "Q").questions[1]
+    update_student_question_score(first.student_id, quiz_question.id, 5)
+    assert compute_class_grade_matrix(c.id).students[0].points["quiz"] == 10
+
+
+def test_matrix_for_empty_class():
+    c = create_class("Empty Matrix")
+    matrix = compute_class_grade_matrix(c.id)
+    assert matrix.students == []
+    assert matrix.weights == {}
+
+
+@pytest.mark.parametrize("seed", [1, 2, 3])
+def test_final_grades_match_a_plain_python_oracle(seed):
+    rng = random.Random(seed)
+    c = create_class(f"Oracle {seed}")
+    rosters = [enroll_student(c, create_student(f"O{seed}-{i}", "O", str(i))) for i in range(6)]
+    # category -> [(points scored, points possible)] per roster entry, built from the inputs
+    expected = {r.id: {} for r in rosters}
+    for i, category in enumerate(["quiz", "quiz", "test", "homework", "project"]):
+        points = [rng.randint(1, 10) for _ in range(rng.randint(1, 4))]
+        a = create_assignment(f"A{i}", category, points)
+        ca = assign_to_class(c, a)
+        for r in rosters:
+            scored = {
+                q.id: round(rng.uniform(0, q.point_value), 2)
+                for q in a.questions
+                if rng.random() < 0.8
+            }
+            record_full_assignment(r, ca, scored)
+            totals = expected[r.id].setdefault(category, [0.0, 0.0])
+            totals[0] += sum(scored.values())
+            totals[1] += sum(points)
+    weights = {"quiz": rng.uniform(0.1, 1), "test": rng.uniform(0.1, 1), "homework": 0.25}
+    for category, weight in weights.items():
+        set_category_weight(c, category, weight)
+
+    # final = sum(scored / possible * weight) / sum(weights) * 100, unweighted categories ignored
+    def oracle(totals):
+        graded = sum(
+            totals[cat][0] / totals[cat][1] * w for cat, w in weights.items() if cat in totals
+        )
+        return graded / sum(weights.values()) * 100
+
+    matrix = compute_class_grade_matrix(c.id)
+    assert [s.roster_entry_id for s in matrix.students] == [r.id for r in rosters]
+    for student in matrix.students:
+        assert student.final_grade == pytest.approx(oracle(expected[student.roster_entry_id]))
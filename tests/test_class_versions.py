@@ -0,0 +1,67 @@
+from gradebook.database.models import StudentQuestionScore
+from gradebook.database.services.assignments import create_assignment, assign_to_class
+from gradebook.database.services.classes import (
+    create_class,
+    enroll_student,
+    get_class_version,
+    get_class_versions,
+)
+from gradebook.database.services.students import create_student
+from gradebook.database.services.scoring import (
+    bulk_upsert_question_scores,
+    set_category_weight,
+    update_student_question_score,
+)
+
+
+def test_new_class_starts_at_zero():
+    c = create_class("Empty", None, None)
+    assert set(get_class_versions(c.id).values()) == {0}
+    assert get_class_version(c.id) == 0
+
+
+def test_writes_bump_only_the_touched_table_and_class():
+    c = create_class("Versioned", None, None)
+    other = create_class("Untouched", None, None)
+    s = create_student("V1", "V", "One")
+
+    enroll_student(c, s)
+    assert get_class_versions(c.id)["classroster"] == 1
+
+    a = create_assignment("Quiz", "quiz", [5, 5])
+    assign_to_class(c, a)
+    assert get_class_versions(c.id)["classassignment"] == 1
+
+    q1, q2 = [q.id for q in a.questions]
+    before = get_class_versions(c.id)
+    update_student_question_score(s.id, q1, 3.0)
+    update_student_question_score(s.id, q1, 4.0)
+    after = get_class_versions(c.id)
+    assert after["studentquestionscore"] == before["studentquestionscore"] + 2
+    assert after["classroster"] == before["classroster"]
+
+    set_category_weight(c, "quiz", 0.5)
+    assert get_class_versions(c.id)["assignmentcategoryweight"] >= 1
+
+    assert get_class_version(other.id) == 0
+
+
+def test_question_scores_bump_every_class_with_the_student_and_assignment():
+    a_cls = create_class("A", None, None)
+    b_cls = create_class("B", None, None)
+    c_cls = create_class("C", None, None)
+    s = create_student("V2", "V", "Two")
+    for cls in (a_cls, b_cls, c_cls):
+        enroll_student(cls, s)
+    a = create_assignment("Shared", "homework", [10])
+    assign_to_class(a_cls, a)
+    assign_to_class(b_cls, a)
+    q = a.questions[0].id
+
+    bulk_upsert_question_scores([(s.id, q, 7.0)])
+    StudentQuestionScore.delete().execute()
+
+    assert get_class_versions(a_cls.id)["studentquestionscore"] == 2
+    assert get_class_versions(b_cls.id)["studentquestionscore"] == 2
+    # enrolled, but the assignment is not assigned to this class
+    assert get_class_versions(c_cls.id)["studentquestionscore"] == 0
@@ -0,0 +1,136 @@
+import pytest
+from gradebook.database.models import ClassRoster, ClassAssignment, Student
+from gradebook.database.services import events
+from gradebook.database.services.assignments import create_assignment, assign_to_class
+from gradebook.database.services.classes import create_class, enroll_student
+from gradebook.database.services.students import create_student
+from gradebook.database.services.scoring import (
+    record_full_assignment,
+    save_assignment_grades,
+    set_category_weight,
+    update_student_question_score,
+)
+
+
+@pytest.fixture
+def received():
+    """Every event delivered while the test runs."""
+    delivered = []
+    unsubscribe = events.subscribe(events.DomainEvent, delivered.append)
+    yield delivered
+    unsubscribe()
+
+
+def test_events_outside_a_transaction_are_delivered_immediately(received):
+    c = create_class("Events", None, None)
+    s = create_student("E1", "E", "One")
+    roster = enroll_student(c, s)
+    enroll_student(c, s)
+
+    assert received == [
+        events.ClassCreated(c.id),
+        events.StudentCreated(s.id),
+        events.StudentEnrolled(c.id, s.id, roster.id),
+    ]
+
+
+def test_events_are_coalesced_until_the_transaction_commits(received):
+    c = create_class("Events", None, None)
+    s = create_student("E1", "E", "One")
+    a = create_assignment("Quiz", "quiz", [5, 5])
+    q1, q2 = [q.id for q in a.questions]
+    received.clear()
+
+    with events.atomic():
+        update_student_question_score(s.id, q1, 1.0)
+        with events.atomic():
+            update_student_question_score(s.id, q2, 2.0)
+            set_category_weight(c, "quiz", 0.2)
+        set_category_weight(c, "quiz", 0.4)
+        update_student_question_score(s.id, q1, 3.0)
+        assert received == []
+
+    assert received == [
+        events.ScoreChanged(s.id, frozenset([q1, q2])),
+        events.WeightChanged(c.id, "quiz", 0.4),
+    ]
+
+
+def test_events_are_discarded_when_the_transaction_rolls_back(received):
+    with pytest.raises(RuntimeError):
+        with events.atomic():
+            create_student("E1", "E", "One")
+            raise RuntimeError("rolled back")
+
+    assert received == []
+    assert Student.select().count() == 0
+
+    s = create_student("E2", "E", "Two")
+    assert received == [events.StudentCreated(s.id)]
+
+
+def test_events_of_a_rolled_back_savepoint_are_discarded(received):
+    with events.atomic():
+        kept = create_student("E1", "E", "One")
+        with pytest.raises(RuntimeError):
+            with events.atomic():
+                create_student("E2", "E", "Two")
+                raise RuntimeError("rolled back")
+
+    assert [s.student_number for s in Student.select()] == ["E1"]
+    assert received == [events.StudentCreated(kept.id)]
+
+
+def test_grading_publishes_one_event_per_student(received):
+    c = create_class("Events", None, None)
+    s1 = create_student("E1", "E", "One")
+    s2 = create_student("E2", "E", "Two")
+    for s in (s1, s2):
+        enroll_student(c, s)
+    a = create_assignment("Quiz", "quiz", [5, 5])
+    ca = assign_to_class(c, a)
+    q1, q2 = [q.id for q in a.questions]
+    record_full_assignment(
+        ClassRoster.get(student=s1), ca, {q1: 1.0, q2: 2.0}, total_time=60
+    )
+    received.clear()
+
+    save_assignment_grades(
+        c.id, a.id, [(s1.id, q1, 4.0), (s1.id, q2, 5.0), (s2.id, q2, 3.0)], {s1.id: 90}
+    )
+
+    assert received == [
+        events.ScoreChanged(s1.id, frozenset([q1, q2])),
+        events.ScoreChanged(s2.id, frozenset([q2])),
+        events.AssignmentScoreChanged(s1.id, a.id),
+    ]
+
+
+def test_assigning_publishes_after_the_assignment_exists(received):
+    c = create_class("Events", None, None)
+    seen = []
+    unsubscribe = events.subscribe(
+        events.AssignmentAssigned,
+        lambda e: seen.append(ClassAssignment.get_or_none(assignment=e.assignment_id)),
+    )
+    try:
+        a = create_assignment("Quiz", "quiz", [5])
+        ca = assign_to_class(c, a)
+    finally:
+        unsubscribe()
+
+    assert seen == [ca]
+    assert events.AssignmentCreated(a.id) in received
+
+
+def test_failing_handler_does_not_stop_delivery(received):
+    def broken(event):
+        raise ValueError("broken subscriber")
+
+    unsubscribe = events.subscribe(events.StudentCreated, broken)
+    try:
+        s = create_student("E1", "E", "One")
+    finally:
+        unsubscribe()
+
+    assert received == [events.StudentCreated(s.id)]
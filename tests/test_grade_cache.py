@@ -0,0 +1,89 @@
+import pytest
+from gradebook.database.models import Assignment, StudentCategoryRollup
+from gradebook.database.services import scoring
+from gradebook.database.services.assignments import create_assignment, assign_to_class
+from gradebook.database.services.classes import create_class, enroll_student
+from gradebook.database.services.grade_cache import GradeCache
+from gradebook.database.services.students import create_student
+
+
+def _graded_class(name, number):
+    c = create_class(name, None, None)
+    s = create_student(number, "G", "C")
+    roster = enroll_student(c, s)
+    a = create_assignment(f"{name} quiz", "quiz", [10])
+    assign_to_class(c, a)
+    scoring.set_category_weight(c, "quiz", 1.0)
+    return c, s, roster, a.questions[0].id
+
+
+def test_grade_matrix_is_cached_until_a_score_or_weight_changes():
+    c, s, roster, q = _graded_class("Cached", "GC1")
+    scoring.update_student_question_score(s.id, q, 5.0)
+    scoring.grade_cache.reset_stats()
+
+    first = scoring.compute_class_grade_matrix(c.id)
+    assert scoring.compute_class_grade_matrix(c.id) is first
+    assert scoring.compute_final_grade(roster) == pytest.approx(50.0)
+    assert scoring.grade_cache.stats()[:2] == (2, 1)
+
+    scoring.update_student_question_score(s.id, q, 8.0)
+    assert scoring.compute_final_grade(roster) == pytest.approx(80.0)
+
+    scoring.set_category_weight(c, "homework", 1.0)
+    matrix = scoring.compute_class_grade_matrix(c.id)
+    assert matrix.weights["homework"] == 1.0
+    assert matrix.students[0].final_grade == pytest.approx(40.0)
+    assert scoring.grade_cache.stats()[:2] == (2, 3)
+
+
+def test_grade_cache_evicts_least_recently_used_class():
+    loads = []
+    cache = GradeCache(lambda class_id: loads.append(class_id) or class_id, lambda _: 0, max_classes=2)
+
+    for class_id in (1, 2, 1, 3, 1, 2):
+        assert cache.get(class_id) == class_id
+
+    # 2 was evicted by 3, then 3 by 2
+    assert loads == [1, 2, 3, 2]
+    stats = cache.stats()
+    assert (stats.hits, stats.misses, stats.size) == (2, 4, 2)
+
+
+def test_grade_cache_recomputes_when_stamp_changes():
+    stamps = {1: 0}
+    cache = GradeCache(lambda class_id: object(), stamps.__getitem__)
+    first = cache.get(1)
+    assert cache.get(1) is first
+    stamps[1] += 1
+    assert cache.get(1) is not first
+    cache.invalidate(1)
+    assert cache.stats().size == 0
+
+
+def test_grade_cache_requires_room_for_one_class():
+    with pytest.raises(ValueError):
+        GradeCache(lambda _: None, lambda _: 0, max_classes=0)
+
+
+def test_rebuilding_rollups_refreshes_the_cached_matrix():
+    c, s, roster, q = _graded_class("Rebuilt", "GR1")
+    scoring.update_student_question_score(s.id, q, 5.0)
+    StudentCategoryRollup.update(points=1.0).execute()
+    scoring.grade_cache.invalidate()
+    assert scoring.compute_final_grade(roster) == pytest.approx(10.0)
+
+    scoring.rebuild_rollups(c.id)
+    assert scoring.compute_final_grade(roster) == pytest.approx(50.0)
+    assert scoring.compute_class_grade_matrix(c.id) == scoring.build_grade_matrix(c.id)
+
+
+def test_changing_an_assignment_category_refreshes_the_cached_matrix():
+    c, s, roster, q = _graded_class("Moved", "GM1")
+    scoring.update_student_question_score(s.id, q, 5.0)
+    assert scoring.compute_final_grade(roster) == pytest.approx(50.0)
+
+    # moved out of the only weighted category
+    Assignment.update(category="homework").execute()
+    assert scoring.compute_final_grade(roster) == scoring.build_grade_matrix(c.id).students[0].final_grade
+    assert scoring.compute_class_grade_matrix(c.id) == scoring.build_grade_matrix(c.id)
@@ -0,0 +1,121 @@
+from random import Random
+import pytest
+from gradebook.database.models import AssignmentQuestion, ClassAssignment, ClassRoster, StudentQuestionScore
+from gradebook.database.services import scoring
+from gradebook.database.services.assignments import create_assignment, assign_to_class
+from gradebook.database.services.classes import create_class, enroll_student
+from gradebook.database.services.grade_engine import IncrementalGradeEngine
+from gradebook.database.services.students import create_student
+
+CATEGORIES = ["quiz", "test", "homework"]
+
+
+def _assert_matches_full_recompute(engine, class_id):
+    # rebuilt from the score tables, so trigger maintained rollups are checked too
+    scoring.rebuild_rollups(class_id)
+    expected = scoring.build_grade_matrix(class_id)
+    actual = engine.to_matrix()
+    assert actual.weights == expected.weights
+    assert [s.roster_entry_id for s in actual.students] == [
+        s.roster_entry_id for s in expected.students
+    ]
+    for row, want in enumerate(expected.students):
+        assert engine.row_of(want.roster_entry_id) == row
+    for got, want in zip(actual.students, expected.students):
+        for category in CATEGORIES:
+            assert got.points.get(category, 0.0) == pytest.approx(want.points.get(category, 0.0))
+            assert got.possible.get(category, 0.0) == pytest.approx(want.possible.get(category, 0.0))
+        assert got.final_grade == pytest.approx(want.final_grade)
+
+
+def _current_score(student_id, question_id):
+    sqs = StudentQuestionScore.get_or_none(
+        (StudentQuestionScore.student == student_id)
+        & (StudentQuestionScore.assignment_question == question_id)
+    )
+    return None if sqs is None else sqs.points_scored
+
+
+@pytest.mark.parametrize("seed", range(8))
+def test_incremental_grades_match_full_recompute(seed):
+    rng = Random(seed)
+    c = create_class(f"Engine {seed}", None, None)
+    students = [create_student(f"E{seed}-{i}", f"F{i}", f"L{i}") for i in range(8)]
+    assignments = [
+        create_assignment(f"A{i}", CATEGORIES[i % 3], [rng.randint(1, 10) for _ in range(3)])
+        for i in range(5)
+    ]
+    for student in students[:5]:
+        enroll_student(c, student)
+    for assignment in assignments[:3]:
+        assign_to_class(c, assignment)
+    scoring.set_category_weight(c, "quiz", 0.3)
+    scoring.set_category_weight(c, "test", 0.7)
+    questions = [q.id for q in AssignmentQuestion.select()]
+
+    engine = IncrementalGradeEngine.load(c.id)
+    _assert_matches_full_recompute(engine, c.id)
+
+    for _ in range(60):
+        op = rng.choice(["score", "score", "score", "delete", "points", "assign", "enroll", "weight"])
+        if op in ("score", "delete"):
+            student = rng.choice(students)
+            question = rng.choice(questions)
+            old = _current_score(student.id, question)
+            if op == "score":
+                new = float(rng.randint(0, 10))
+                scoring.update_student_question_score(student.id, question, new)
+            else:
+                new = None
+                StudentQuestionScore.delete().where(
+                    (StudentQuestionScore.student == student.id)
+                    & (StudentQuestionScore.assignment_question == question)
+                ).execute()
+            engine.apply_score_change(student.id, question, old, new)
+        elif op == "points":
+            question = rng.choice(questions)
+            points = rng.randint(1, 10)
+            AssignmentQuestion.update(point_value=points).where(AssignmentQuestion.id == question).execute()
+            engine.apply_question_points(question, points)
+        elif op == "assign":
+            assignment = rng.choice(assignments)
+            link = ClassAssignment.get_or_none(class_ref=c, assignment=assignment)
+            if link is None:
+                assign_to_class(c, assignment)
+                engine.add_assignment(assignment.id)
+            else:
+                link.delete_instance()
+                engine.remove_assignment(assignment.id)
+        elif op == "enroll":
+            student = rng.choice(students)
+            roster = ClassRoster.get_or_none(class_ref=c, student=student)
+            if roster is None:
+                engine.enroll(enroll_student(c, student).id)
+            else:
+                roster.delete_instance()
+                engine.unenroll(roster.id)
+        else:
+            scoring.set_category_weight(c, rng.choice(CATEGORIES), rng.random())
+            engine.set_weights(scoring.build_grade_matrix(c.id).weights)
+
+        _assert_matches_full_recompute(engine, c.id)
+
+
+def test_score_change_only_touches_the_edited_student():
+    c = create_class("Rows", None, None)
+    first, second = create_student("R1", "A", "A"), create_student("R2", "B", "B")
+    r1, r2 = enroll_student(c, first), enroll_student(c, second)
+    a = create_assignment("Quiz", "quiz", [10])
+    assign_to_class(c, a)
+    scoring.set_category_weight(c, "quiz", 1.0)
+    q = a.questions[0].id
+
+    engine = IncrementalGradeEngine.load(c.id)
+    assert engine.apply_score_change(second.id, q, None, 7.0) == [r2.id]
+    assert engine.student(r2.id).final_grade == pytest.approx(70.0)
+    assert engine.student(r1.id).final_grade == 0.0
+    assert engine.row_of(r2.id) == 1
+    with pytest.raises(ValueError):
+        engine.row_of(-1)
+    # not part of the class
+    assert engine.apply_score_change(first.id, q + 100, None, 5.0) == []
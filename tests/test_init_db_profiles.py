@@ -0,0 +1,53 @@
+import pytest
+from gradebook.database.models import db, init_db, SQLITE_PROFILES
+from gradebook.database.services import scoring
+from gradebook.database.services.assignments import create_assignment, assign_to_class
+from gradebook.database.services.classes import create_class, enroll_student
+from gradebook.database.services.students import create_student
+
+
+@pytest.fixture
+def restore_proxy():
+    original = db.obj
+    yield
+    # closing the shared in-memory database would drop every table
+    if db.obj is not original:
+        db.close()
+        db.initialize(original)
+
+
+@pytest.mark.parametrize("profile", list(SQLITE_PROFILES))
+def test_profile_pragmas_applied(tmp_path, restore_proxy, profile):
+    init_db(db_path=str(tmp_path / "profile.db"), profile=profile, create_tables=True)
+    expected = SQLITE_PROFILES[profile]
+    assert db.journal_mode == "wal"
+    assert db.cache_size == expected["cache_size"]
+    assert db.mmap_size == expected["mmap_size"]
+    assert db.foreign_keys == 1
+    assert db.execute_sql("PRAGMA busy_timeout").fetchone()[0] == expected["busy_timeout"]
+
+
+def test_switching_databases_drops_cached_grades(tmp_path, restore_proxy):
+    def graded_class(points):
+        c = create_class("Cached", None, None)
+        s = create_student("C1", "C", "One")
+        enroll_student(c, s)
+        a = create_assignment("Quiz", "quiz", [10])
+        assign_to_class(c, a)
+        scoring.set_category_weight(c, "quiz", 1.0)
+        scoring.update_student_question_score(s.id, a.questions[0].id, points)
+        return c
+
+    first = graded_class(5.0)
+    assert scoring.compute_class_grade_matrix(first.id).students[0].final_grade == pytest.approx(50.0)
+
+    # same class id and version stamp in the new database
+    init_db(db_path=str(tmp_path / "other.db"), create_tables=True)
+    second = graded_class(8.0)
+    assert second.id == first.id
+    assert scoring.compute_class_grade_matrix(second.id).students[0].final_grade == pytest.approx(80.0)
+
+
+def test_invalid_profile_raises(restore_proxy):
+    with pytest.raises(ValueError):
+        init_db(db_path=":memory:", profile="turbo")
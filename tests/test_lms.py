@@ -1,7 +1,6 @@
 import pytest
 from peewee import IntegrityError
 from gradebook.database.models import (
-    db,
     Class,
     Student,
     ClassRoster,
@@ -21,36 +20,6 @@ from gradebook.database.services.scoring import (
 )
 
 
-@pytest.fixture(autouse=True)
-def reset_db():
-    """Reset the database before each test."""
-    db.drop_tables(
-        [
-            ClassRoster,
-            ClassAssignment,
-            StudentAssignmentScore,
-            AssignmentCategoryWeight,
-            AssignmentQuestion,
-            Assignment,
-            Student,
-            Class,
-        ]
-    )
-    db.create_tables(
-        [
-            Class,
-            Student,
-            ClassRoster,
-            Assignment,
-            AssignmentQuestion,
-            ClassAssignment,
-            StudentAssignmentScore,
-            AssignmentCategoryWeight,
-        ]
-    )
-    yield
-
-
 def test_create_class_and_student():
     c = create_class("Math 101")
     s = create_student("S123", "Alice", "Smith")
@@ -0,0 +1,157 @@
+import pytest
+from peewee import SqliteDatabase
+from gradebook.database import migrations
+from gradebook.database.migrations import (
+    Migration,
+    get_schema_version,
+    latest_version,
+    pending_migrations,
+    run_migrations,
+)
+from gradebook.database.models import MODELS
+
+# Indexes that databases created before migrations do not have
+MIGRATION_1_INDEXES = [
+    "studentassignmentscore_roster_entry_id_class_assignment_id",
+    "assignment_category",
+    "classroster_student_id_class_ref_id",
+    "classassignment_assignment_id_class_ref_id",
+]
+MIGRATION_5_INDEXES = ["student_last_name_first_name", "student_first_name_last_name"]
+
+
+@pytest.fixture
+def legacy_db(tmp_path):
+    """A database with the schema as it was before versioned migrations."""
+    database = SqliteDatabase(str(tmp_path / "legacy.db"))
+    with database.bind_ctx(MODELS):
+        database.create_tables(MODELS)
+    for index in MIGRATION_1_INDEXES + MIGRATION_5_INDEXES:
+        database.execute_sql(f'DROP INDEX "{index}"')
+    database.execute_sql('DROP TABLE "dataversion"')
+    database.execute_sql('DROP TABLE "studentcategoryrollup"')
+    database.execute_sql("INSERT INTO class (name) VALUES ('Legacy')")
+    database.execute_sql("INSERT INTO student (student_number, first_name, last_name) VALUES ('L1', 'L', 'One')")
+    database.execute_sql("INSERT INTO classroster (class_ref_id, student_id) VALUES (1, 1)")
+    database.execute_sql("INSERT INTO assignment (title, category) VALUES ('A', 'quiz')")
+    database.execute_sql("INSERT INTO classassignment (class_ref_id, assignment_id, total_points) VALUES (1, 1, 10)")
+    # recorded twice, which the old record_full_assignment allowed
+    for score in (4, 7):
+        database.execute_sql(
+            "INSERT INTO studentassignmentscore (roster_entry_id, class_assignment_id, total_score) VALUES (1, 1, ?)",
+            (score,),
+        )
+    yield database
+    database.close()
+
+
+def _index_names(database, table):
+    return {i.name for i in database.get_indexes(table)}
+
+
+def test_new_database_is_created_at_latest_version(tmp_path):
+    database = SqliteDatabase(str(tmp_path / "new.db"))
+    assert run_migrations(database) == []
+    assert get_schema_version(database) == latest_version()
+    assert all(database.table_exists(m._meta.table_name) for m in MODELS)
+    assert pending_migrations(database) == []
+
+
+def test_legacy_database_is_upgraded_in_place(legacy_db):
+    assert get_schema_version(legacy_db) == 0
+    assert run_migrations(legacy_db) == [m.version for m in migrations.MIGRATIONS]
+    assert get_schema_version(legacy_db) == latest_version()
+    assert "studentassignmentscore_roster_entry_id_class_assignment_id" in _index_names(
+        legacy_db, "studentassignmentscore"
+    )
+    assert "assignment_category" in _index_names(legacy_db, "assignment")
+    assert set(MIGRATION_5_INDEXES) <= _index_names(legacy_db, "student")
+    # duplicates collapsed to the newest row
+    rows = legacy_db.execute_sql("SELECT total_score FROM studentassignmentscore").fetchall()
+    assert rows == [(7.0,)]
+    # statistics gathered for the planner
+    assert legacy_db.table_exists("sqlite_stat1")
+    # nothing left to do
+    assert run_migrations(legacy_db) == []
+
+
+def test_failed_migration_rolls_back(legacy_db, monkeypatch):
+    run_migrations(legacy_db)
+    version = get_schema_version(legacy_db)
+
+    def broken(database, migrator):
+        database.execute_sql("CREATE INDEX broken_idx ON student (first_name)")
+        raise RuntimeError("simulated failure")
+
+    monkeypatch.setattr(
+        migrations, "MIGRATIONS", migrations.MIGRATIONS + [Migration(version + 1, "broken", broken)]
+    )
+    with pytest.raises(RuntimeError):
+        run_migrations(legacy_db)
+    assert get_schema_version(legacy_db) == version
+    assert "broken_idx" not in _index_names(legacy_db, "student")
+
+
+def _triggers(database):
+    return {
+        name: " ".join(sql.split())
+        for name, sql in database.execute_sql(
+            "SELECT name, sql FROM sqlite_master WHERE type = 'trigger'"
+        )
+    }
+
+
+def test_upgrade_installs_the_triggers_of_a_new_database(tmp_path, legacy_db):
+    """A trigger changed without a new migration only reaches new databases."""
+    new_db = SqliteDatabase(str(tmp_path / "new.db"))
+    run_migrations(new_db)
+    run_migrations(legacy_db)
+    assert _triggers(legacy_db) == _triggers(new_db)
+    new_db.close()
+
+
+@pytest.mark.parametrize("upgrade", [False, True])
+def test_data_version_triggers_are_installed(tmp_path, legacy_db, upgrade):
+    if upgrade:
+        database = legacy_db
+    else:
+        database = SqliteDatabase(str(tmp_path / "new.db"))
+        run_migrations(database)
+        database.execute_sql("INSERT INTO class (name) VALUES ('New')")
+        database.execute_sql("INSERT INTO student (student_number, first_name, last_name) VALUES ('L1', 'L', 'One')")
+    run_migrations(database)
+
+    database.execute_sql("INSERT INTO student (student_number, first_name, last_name) VALUES ('L2', 'L', 'Two')")
+    database.execute_sql("INSERT INTO classroster (class_ref_id, student_id) VALUES (1, 2)")
+    rows = database.execute_sql(
+        "SELECT class_id, table_name, version FROM dataversion"
+    ).fetchall()
+    assert rows == [(1, "classroster", 1)]
+
+
+def test_upgrade_installs_aggregate_triggers_without_rewriting_totals(legacy_db):
+    run_migrations(legacy_db)
+    # the legacy total was recorded without question scores and is left alone
+    assert legacy_db.execute_sql("SELECT total_score FROM studentassignmentscore").fetchall() == [(7.0,)]
+
+    legacy_db.execute_sql("INSERT INTO assignmentquestion (assignment_id, text, point_value) VALUES (1, 'Q1', 5)")
+    legacy_db.execute_sql("INSERT INTO studentquestionscore (student_id, assignment_question_id, points_scored) VALUES (1, 1, 3)")
+    assert legacy_db.execute_sql("SELECT total_score FROM studentassignmentscore").fetchall() == [(10.0,)]
+    assert legacy_db.execute_sql("SELECT total_points FROM classassignment").fetchall() == [(15.0,)]
+
+
+def test_upgrade_fills_category_rollups(legacy_db):
+    run_migrations(legacy_db)
+    rows = legacy_db.execute_sql(
+        "SELECT roster_entry_id, category, points, possible, n_assignments FROM studentcategoryrollup"
+    ).fetchall()
+    assert rows == [(1, "quiz", 0.0, 10.0, 1)]
+
+
+def test_upgrade_versions_assignment_category_changes(legacy_db):
+    run_migrations(legacy_db)
+    legacy_db.execute_sql("UPDATE assignment SET category = 'test'")
+    rows = legacy_db.execute_sql(
+        "SELECT class_id, table_name, version FROM dataversion"
+    ).fetchall()
+    assert rows == [(1, "classassignment", 1)]
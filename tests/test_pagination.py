@@ -0,0 +1,121 @@
+import pytest
+from gradebook.database.models import Student
+from gradebook.database.services import pagination
+from gradebook.database.services.classes import create_class, enroll_student, list_classes
+from gradebook.database.services.students import create_student, list_students
+
+
+@pytest.fixture(autouse=True)
+def fresh_counts():
+    pagination.counts.invalidate()
+
+
+def _page_through(list_function, **kwargs):
+    pages, after = [], None
+    while True:
+        page = list_function(after=after, **kwargs)
+        pages.append(page)
+        after = page.next_token
+        if after is None:
+            return pages
+
+
+def test_list_students_follows_tokens_to_the_last_page():
+    c = create_class("Paged", None, None)
+    for number, first, last in [
+        ("S4", "Ann", "Young"),
+        ("S2", "Bob", "Adams"),
+        ("S3", "Ann", "Adams"),
+        ("S1", "Bob", "Adams"),
+        ("S5", "Cy", "Moss"),
+    ]:
+        enroll_student(c, create_student(number, first, last))
+    create_student("S9", "Al", "Adams")
+
+    pages = _page_through(list_students, class_id=c.id, limit=2)
+    assert [[s.student_number for s in p.items] for p in pages] == [
+        ["S3", "S2"],
+        ["S1", "S5"],
+        ["S4"],
+    ]
+    assert [p.total for p in pages] == [5, 5, 5]
+
+    # a full last page has no token, there is no empty page after it
+    pages = _page_through(list_students, sort="student_number", descending=True, limit=3)
+    assert [[s.student_number for s in p.items] for p in pages] == [
+        ["S9", "S5", "S4"],
+        ["S3", "S2", "S1"],
+    ]
+    assert pages[0].total == 6
+
+    page = list_students(search="Adams", limit=10)
+    assert [s.student_number for s in page.items] == ["S9", "S3", "S2", "S1"]
+    assert (page.next_token, page.total) == (None, 4)
+
+
+def test_list_classes_pages_by_name():
+    for name in ["Math", "Art", "Biology", "History"]:
+        create_class(name, None, None)
+
+    pages = _page_through(list_classes, limit=3)
+    assert [[c.name for c in p.items] for p in pages] == [
+        ["Art", "Biology", "History"],
+        ["Math"],
+    ]
+    assert list_classes(search="o", descending=True).total == 2
+
+
+def test_tokens_only_continue_their_own_listing():
+    for i in range(3):
+        create_student(f"S{i}", "T", f"Student{i}")
+    token = list_students(limit=1).next_token
+
+    assert list_students(after=token, limit=1).items[0].student_number == "S1"
+    with pytest.raises(ValueError):
+        list_students(sort="student_number", after=token)
+    with pytest.raises(ValueError):
+        list_students(search="T", after=token)
+    with pytest.raises(ValueError):
+        list_classes(after=token)
+    with pytest.raises(ValueError):
+        list_students(after="not a token")
+    with pytest.raises(ValueError):
+        list_students(limit=0)
+    with pytest.raises(KeyError):
+        list_students(sort="grade")
+
+
+def test_totals_are_cached_until_the_services_write(count_queries):
+    c = create_class("Counted", None, None)
+    for i in range(4):
+        create_student(f"S{i}", "T", f"Student{i}")
+    first = list_students(limit=2)
+    assert first.total == 4
+
+    count_queries.clear()
+    assert list_students(after=first.next_token, limit=2).total == 4
+    assert not any("COUNT" in sql.upper() for sql in count_queries)
+
+    # writes made outside the services are only seen once the count expires
+    Student.create(student_number="S9", first_name="T", last_name="Outside")
+    assert list_students(limit=2).total == 4
+
+    enroll_student(c, create_student("S5", "T", "Student5"))
+    assert list_students(limit=2).total == 6
+    assert list_students(class_id=c.id, limit=2).total == 1
+
+
+def test_count_cache_recounts_expired_entries():
+    calls = []
+
+    def count():
+        calls.append(1)
+        return len(calls)
+
+    cache = pagination.CountCache(max_age=60)
+    assert [cache.get("key", count), cache.get("key", count)] == [1, 1]
+    cache.invalidate()
+    assert cache.get("key", count) == 2
+
+    expired = pagination.CountCache(max_age=0)
+    assert [expired.get("key", count), expired.get("key", count)] == [3, 4]
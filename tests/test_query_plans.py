@@ -0,0 +1,67 @@
+import pytest
+from gradebook.database.models import db, Assignment, StudentAssignmentScore
+from gradebook.database import repositories
+from gradebook.database.services import assignments, classes, scoring, students
+
+
+@pytest.fixture
+def captured_selects(monkeypatch):
+    """Record every SELECT statement executed against the database."""
+    statements = []
+    real_execute_sql = db.obj.execute_sql
+
+    def execute_sql(sql, params=None, *args, **kwargs):
+        if sql.lstrip().upper().startswith("SELECT"):
+            statements.append((sql, params))
+        return real_execute_sql(sql, params, *args, **kwargs)
+
+    monkeypatch.setattr(db.obj, "execute_sql", execute_sql)
+    return statements
+
+
+def _full_scans(statements) -> list[str]:
+    scans = []
+    for sql, params in statements:
+        for row in db.execute_sql("EXPLAIN QUERY PLAN " + sql, params or ()):
+            detail = row[-1]
+            if detail.startswith("SCAN"):
+                scans.append(f"{detail} <- {sql}")
+    return scans
+
+
+HOT_QUERIES = {
+    "update_student_assignment_time": lambda: scoring.update_student_assignment_time(1, 1, 60),
+    "get_student_assignment_time": lambda: scoring.get_student_assignment_time(1, 1),
+    "get_student_scores_for_assignment": lambda: scoring.get_student_scores_for_assignment(1, 1),
+    "compute_class_grade_matrix": lambda: scoring.compute_class_grade_matrix(1),
+    "get_assignment_score_grid": lambda: scoring.get_assignment_score_grid(1, 1),
+    "fetch_assignments_for_class": lambda: repositories.fetch_assignments_for_class(1, "quiz"),
+    "get_assignments_for_class_dto": lambda: repositories.get_assignments_for_class_dto(1, "quiz"),
+    "get_assignment_weight": lambda: assignments.get_assignment_weight(1, "quiz"),
+    "get_students_in_class": lambda: classes.get_students_in_class(1),
+    "list_students": lambda: students.list_students(1),
+    "list_students_dto_in_class": lambda: repositories.list_students_dto(1, after=("A", "B", 1)),
+    "iter_students_in_class_dto": lambda: list(classes.iter_students_in_class_dto(1)),
+    "list_students_dto": lambda: repositories.list_students_dto(after=("A", "B", 1)),
+    "list_students_dto_first_name": lambda: repositories.list_students_dto(
+        sort="first_name", descending=True, after=("A", "B", 1)
+    ),
+    "list_classes_dto": lambda: repositories.list_classes_dto(after=("A", 1)),
+}
+
+
+@pytest.mark.parametrize("name", list(HOT_QUERIES))
+def test_hot_queries_do_not_scan_tables(captured_selects, name):
+    HOT_QUERIES[name]()
+    assert captured_selects
+    assert _full_scans(captured_selects) == []
+
+
+def test_student_assignment_score_is_unique_per_roster_entry():
+    indexes = {
+        tuple(i.columns): i.unique for i in db.get_indexes(StudentAssignmentScore._meta.table_name)
+    }
+    assert indexes[("roster_entry_id", "class_assignment_id")] is True
+    assert ("category",) in {
+        tuple(i.columns) for i in db.get_indexes(Assignment._meta.table_name)
+    }
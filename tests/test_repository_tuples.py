@@ -0,0 +1,162 @@
+import pytest
+from gradebook.database import repositories
+from gradebook.database.services.assignments import create_assignment, assign_to_class
+from gradebook.database.services.classes import create_class, enroll_student
+from gradebook.database.services.students import create_student
+from gradebook.database.services.scoring import record_full_assignment, set_category_weight
+
+
+@pytest.fixture
+def graded():
+    c = create_class("Tuples", None, None)
+    students = [create_student(f"T{i}", "T", f"Student{i}") for i in range(5)]
+    a = create_assignment("Quiz", "quiz", [5, 5])
+    ca = assign_to_class(c, a)
+    for s in students:
+        roster = enroll_student(c, s)
+        record_full_assignment(roster, ca, {q.id: 1.0 for q in a.questions})
+    set_category_weight(c, "quiz", 1.0)
+    return c, students, a, ca
+
+
+def test_lists_cost_one_query_and_carry_foreign_key_ids(graded, count_queries):
+    c, students, a, ca = graded
+    s = students[0]
+
+    calls = [
+        (repositories.get_students_for_class_dto, (c.id,)),
+        (repositories.get_classes_for_student_dto, (s.id,)),
+        (repositories.get_student_assignment_scores_for_student_dto, (s.id,)),
+        (repositories.get_student_question_scores_for_assignment_dto, (a.id, s.id)),
+        (repositories.get_questions_for_assignment_dto, (a.id,)),
+        (repositories.get_category_weights_for_class_dto, (c.id,)),
+    ]
+    for function, args in calls:
+        count_queries.clear()
+        rows = function(*args)
+        assert rows
+        assert len(count_queries) == 1, function.__name__
+
+    sas = repositories.get_student_assignment_scores_for_student_dto(s.id)[0]
+    assert sas.class_assignment_id == ca.id
+    assert isinstance(sas.roster_entry_id, int)
+    assert repositories.get_class_assignment_dto(ca.id).class_id == c.id
+    assert repositories.get_questions_for_assignment_dto(a.id)[0].assignment_id == a.id
+
+
+def test_dtos_are_slotted(graded):
+    c, students, *_ = graded
+    student = repositories.get_students_for_class_dto(c.id)[0]
+    assert not hasattr(student, "__dict__")
+    with pytest.raises(AttributeError):
+        student.nickname = "T"
+
+
+@pytest.mark.parametrize("n_assignments", [1, 12])
+def test_assignments_for_class_load_in_two_queries(count_queries, n_assignments):
+    c = create_class("Batched", None, None)
+    other = create_class("Other", None, None)
+    created = []
+    for i in range(n_assignments):
+        a = create_assignment(f"A{i}", "quiz" if i % 2 else "homework", [i + 1, 2, 3])
+        assign_to_class(c, a)
+        created.append(a)
+    assign_to_class(other, create_assignment("Elsewhere", "quiz", [9]))
+
+    count_queries.clear()
+    assignments = repositories.get_assignments_for_class_dto(c.id)
+    assert len(count_queries) == 2
+
+    assert [a.id for a in assignments] == [a.id for a in created]
+    for dto, a in zip(assignments, created):
+        assert [q.id for q in dto.questions] == [q.id for q in a.questions]
+        assert [q.point_value for q in dto.questions] == [q.point_value for q in a.questions]
+        assert {q.assignment_id for q in dto.questions} == {a.id}
+
+    count_queries.clear()
+    quizzes = repositories.get_assignments_for_class_dto(c.id, "quiz")
+    assert len(count_queries) <= 2
+    assert [a.id for a in quizzes] == [a.id for a in created if a.category == "quiz"]
+
+
+def test_get_many_chunks_and_keys_by_id(graded, count_queries, monkeypatch):
+    c, students, a, ca = graded
+    monkeypatch.setattr(repositories, "IN_CHUNK_SIZE", 2)
+    ids = [s.id for s in students]
+
+    count_queries.clear()
+    by_id = repositories.get_students_dto_many(ids + ids[:2] + [-1])
+    assert len(count_queries) == 3
+    assert list(by_id) == ids
+    assert by_id[ids[0]].student_number == students[0].student_number
+
+    count_queries.clear()
+    by_number = repositories.get_students_dto_by_numbers(["T1", "T3", "missing"])
+    assert len(count_queries) == 2
+    assert {n: s.id for n, s in by_number.items()} == {
+        "T1": students[1].id,
+        "T3": students[3].id,
+    }
+
+    count_queries.clear()
+    assert repositories.get_students_dto_many([]) == {}
+    assert count_queries == []
+
+    assert repositories.get_classes_dto_many([c.id, -1]) == {
+        c.id: repositories.get_class_dto(c.id)
+    }
+    questions = repositories.get_assignment_questions_dto_many([q.id for q in a.questions])
+    assert [q.assignment_id for q in questions.values()] == [a.id, a.id]
+
+
+def test_assignments_many_load_two_queries_per_chunk(count_queries, monkeypatch):
+    created = [create_assignment(f"A{i}", "quiz", [i + 1, 2]) for i in range(5)]
+    monkeypatch.setattr(repositories, "IN_CHUNK_SIZE", 3)
+
+    count_queries.clear()
+    assignments = repositories.get_assignments_dto_many([a.id for a in reversed(created)])
+    assert len(count_queries) == 4
+    assert sorted(assignments) == [a.id for a in created]
+    for a in created:
+        assert [q.point_value for q in assignments[a.id].questions] == [
+            q.point_value for q in a.questions
+        ]
+
+
+def test_student_counts_default_to_zero(graded, count_queries):
+    c, students, *_ = graded
+    empty = create_class("Empty", None, None)
+
+    count_queries.clear()
+    counts = repositories.count_students_in_classes([c.id, empty.id, -1])
+    assert len(count_queries) == 1
+    assert counts == {c.id: len(students), empty.id: 0, -1: 0}
+
+
+def test_iterators_stream_in_keyset_chunks(count_queries):
+    c = create_class("Streamed", None, None)
+    other = create_class("Other", None, None)
+    students = [create_student(f"I{i}", "I", f"Student{i}") for i in range(7)]
+    for s in students[1:]:
+        enroll_student(c, s)
+    enroll_student(other, students[0])
+
+    count_queries.clear()
+    streamed = repositories.iter_all_students_dto(chunk_size=3)
+    assert count_queries == []
+    assert [s.id for s in streamed] == [s.id for s in students]
+    # 3 + 3 + 1 rows, the short chunk ends the stream
+    assert len(count_queries) == 3
+    assert all("OFFSET" not in sql for sql in count_queries)
+
+    count_queries.clear()
+    enrolled = list(repositories.iter_students_for_class_dto(c.id, chunk_size=3))
+    assert [s.id for s in enrolled] == [s.id for s in students[1:]]
+    # an exact multiple of the chunk size needs one more, empty, query
+    assert len(count_queries) == 3
+
+    assert list(repositories.iter_all_classes_dto(chunk_size=1)) == [
+        repositories.get_class_dto(c.id),
+        repositories.get_class_dto(other.id),
+    ]
+    assert list(repositories.iter_students_for_class_dto(-1)) == []
@@ -1,7 +1,7 @@
 import pytest
 from peewee import IntegrityError
 from gradebook.database.services.classes import create_class, enroll_student, get_number_of_students_in_class, get_all_classes, get_students_in_class, get_class_by_id
-from gradebook.database.services.students import create_student
+from gradebook.database.services.students import create_student, list_students
 from gradebook.database.models import Class, Student
 
 
@@ -28,3 +28,36 @@ def test_get_students_in_class_returns_list():
     students = get_students_in_class(c.id)
     assert isinstance(students, list)
     assert students[0].student_number == "SX"
+
+
+def _page_through(class_id, **kwargs):
+    pages, after = [], None
+    while True:
+        page = list_students(class_id, after=after, limit=2, **kwargs)
+        pages.append([s.student_number for s in page.items])
+        if page.next_token is None:
+            return pages
+        after = page.next_token
+
+
+def test_list_students_pages_a_class_in_keyset_order():
+    c = create_class("Physics", None, None)
+    other = create_class("Art", None, None)
+    # (number, first, last), two students share a full name
+    for number, first, last in [
+        ("S4", "Ann", "Young"),
+        ("S2", "Bob", "Adams"),
+        ("S3", "Ann", "Adams"),
+        ("S1", "Bob", "Adams"),
+        ("S5", "Cy", "Moss"),
+    ]:
+        enroll_student(c, create_student(number, first, last))
+    enroll_student(other, create_student("S9", "Al", "Adams"))
+
+    assert _page_through(c.id) == [["S3", "S2"], ["S1", "S5"], ["S4"]]
+    assert _page_through(c.id, sort="student_number", descending=True) == [
+        ["S5", "S4"],
+        ["S3", "S2"],
+        ["S1"],
+    ]
+    assert _page_through(c.id, search="Adams") == [["S3", "S2"], ["S1"]]
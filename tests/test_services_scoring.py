@@ -10,6 +10,15 @@ from gradebook.database.services.scoring import (
     update_student_assignment_time,
     get_student_assignment_time,
     get_student_scores_for_assignment,
+    bulk_upsert_question_scores,
+    save_assignment_grades,
+    get_assignment_score_grid,
+)
+from gradebook.database.models import (
+    ClassRoster,
+    Student,
+    StudentAssignmentScore,
+    StudentQuestionScore,
 )
 
 
@@ -50,3 +59,126 @@ def test_get_student_scores_for_assignment_attaches_sas_list():
     # function attaches sas_list attribute to each SQS
     if sqs_list:
         assert hasattr(sqs_list[0], "student_assignment_scores")
+
+
+def test_record_full_assignment_twice_updates_aggregate():
+    c = create_class("Redo", None, None)
+    s = create_student("S930", "R", "D")
+    roster = enroll_student(c, s)
+    a = create_assignment("Retake", "quiz", [5, 5])
+    ca = assign_to_class(c, a)
+    first = record_full_assignment(roster, ca, {q.id: 1 for q in a.questions}, total_time=10)
+    second = record_full_assignment(roster, ca, {q.id: 4 for q in a.questions}, total_time=20)
+    assert first.id == second.id
+    assert second.total_score == 8
+    assert get_student_assignment_time(s.id, a.id) == 20
+
+
+def test_bulk_upsert_question_scores_inserts_and_updates_across_chunks(monkeypatch):
+    monkeypatch.setattr("gradebook.database.services.scoring.UPSERT_CHUNK_SIZE", 2)
+    c = create_class("Bulk", None, None)
+    students = [create_student(f"S94{i}", "B", str(i)) for i in range(3)]
+    for s in students:
+        enroll_student(c, s)
+    a = create_assignment("Bulk", "quiz", [5, 5])
+    questions = list(a.questions)
+    rows = [(s.id, q.id, 1.0) for s in students for q in questions]
+    assert bulk_upsert_question_scores(rows) == 6
+    assert StudentQuestionScore.select().count() == 6
+
+    assert bulk_upsert_question_scores([(students[0].id, questions[0].id, 4.5)]) == 1
+    assert StudentQuestionScore.select().count() == 6
+    assert (
+        StudentQuestionScore.get(
+            student=students[0], assignment_question=questions[0]
+        ).points_scored
+        == 4.5
+    )
+
+
+def test_bulk_upsert_question_scores_empty():
+    assert bulk_upsert_question_scores([]) == 0
+
+
+def test_save_assignment_grades_writes_scores_and_times():
+    c = create_class("Batch", None, None)
+    s1 = create_student("S950", "B", "One")
+    s2 = create_student("S951", "B", "Two")
+    r1 = enroll_student(c, s1)
+    enroll_student(c, s2)
+    a = create_assignment("Batch", "quiz", [5, 5])
+    ca = assign_to_class(c, a)
+    q1, q2 = list(a.questions)
+    record_full_assignment(r1, ca, {q1.id: 1, q2.id: 1}, total_time=10)
+
+    written = save_assignment_grades(
+        c.id,
+        a.id,
+        [(s1.id, q1.id, 5.0), (s2.id, q2.id, 3.0)],
+        {s1.id: 99, s2.id: 42},
+    )
+    # two scores plus the one existing time record
+    assert written == 3
+    assert get_student_assignment_time(s1.id, a.id) == 99
+    assert get_student_assignment_time(s2.id, a.id) == 0
+    assert [x.points_scored for x in get_student_scores_for_assignment(a.id, s2.id)] == [3.0]
+
+
+def test_save_assignment_grades_stays_under_the_variable_limit(count_queries):
+    c = create_class("Large", None, None)
+    a = create_assignment("Large", "quiz", [5])
+    ca = assign_to_class(c, a)
+    n = 1000
+    Student.insert_many(
+        [(f"L{i}", "L", str(i)) for i in range(n)],
+        fields=[Student.student_number, Student.first_name, Student.last_name],
+    ).execute()
+    student_ids = [s.id for s in Student.select(Student.id).where(Student.first_name == "L")]
+    ClassRoster.insert_many(
+        [(c.id, sid) for sid in student_ids],
+        fields=[ClassRoster.class_ref, ClassRoster.student],
+    ).execute()
+    StudentAssignmentScore.insert_many(
+        [(r.id, ca.id, 0) for r in ClassRoster.select().where(ClassRoster.class_ref == c.id)],
+        fields=[
+            StudentAssignmentScore.roster_entry,
+            StudentAssignmentScore.class_assignment,
+            StudentAssignmentScore.total_score,
+        ],
+    ).execute()
+
+    count_queries.clear()
+    times = {sid: 60 + i for i, sid in enumerate(student_ids)}
+    assert save_assignment_grades(c.id, a.id, [], times) == n
+
+    assert max(sql.count("?") for sql in count_queries) <= 999
+    assert get_student_assignment_time(student_ids[-1], a.id) == 60 + n - 1
+
+
+def test_get_assignment_score_grid_aligns_scores_by_question():
+    c = create_class("Grid", None, None)
+    s1 = create_student("S960", "G", "One")
+    s2 = create_student("S961", "G", "Two")
+    r1 = enroll_student(c, s1)
+    enroll_student(c, s2)
+    a = create_assignment("Grid", "test", [2, 4, 6])
+    ca = assign_to_class(c, a)
+    q1, q2, q3 = list(a.questions)
+    record_full_assignment(r1, ca, {q1.id: 2, q3.id: 5}, total_time=30)
+    # only the last question is scored for the second student
+    update_student_question_score(s2.id, q3.id, 6)
+
+    grid = get_assignment_score_grid(c.id, a.id)
+    assert grid.question_ids == [q1.id, q2.id, q3.id]
+    assert [s.student_number for s in grid.students] == ["S960", "S961"]
+    assert grid.scores == [[2, None, 5], [None, None, 6]]
+    assert grid.times == [30, None]
+
+
+def test_get_assignment_score_grid_empty_roster():
+    c = create_class("Grid Empty", None, None)
+    a = create_assignment("Grid Empty", "quiz", [1])
+    assign_to_class(c, a)
+    grid = get_assignment_score_grid(c.id, a.id)
+    assert grid.students == [] and grid.scores == [] and grid.times == []
+    assert len(grid.questions) == 1
@@ -1,6 +1,6 @@
 import pytest
 from peewee import IntegrityError
-from gradebook.database.services.students import create_student, get_student_by_number
+from gradebook.database.services.students import create_student, get_student_by_number, get_students_dto_by_numbers
 from gradebook.database.models import Student
 
 
@@ -18,3 +18,14 @@ def test_duplicate_student_number_raises():
 def test_get_student_by_number_not_found_raises():
     with pytest.raises(Student.DoesNotExist):
         get_student_by_number("NO_SUCH")
+
+
+def test_get_students_by_numbers_single_lookup(count_queries):
+    create_student("N1", "A", "One")
+    create_student("N2", "B", "Two")
+    count_queries.clear()
+    found = get_students_dto_by_numbers(["N1", "N2", "N1", "missing"])
+    assert len(count_queries) == 1
+    assert count_queries[0].startswith("SELECT")
+    assert set(found) == {"N1", "N2"}
+    assert found["N2"].first_name == "B"
@@ -0,0 +1,34 @@
+import math
+import pytest
+from gradebook.views.table_view_window.typed_table_model import (
+    TypedTableModel,
+    format_integer,
+)
+
+
+@pytest.fixture
+def model():
+    m = TypedTableModel()
+    m.setHorizontalHeaderLabels(["Number", "Q1", "Time"])
+    m.load([["S1", 4.0, 60]], {1: str, 2: format_integer})
+    return m
+
+
+@pytest.mark.parametrize("text", ["inf", "-inf", "Infinity", "1e400", "nan", "abc"])
+@pytest.mark.parametrize("column", [1, 2])
+def test_non_finite_numbers_are_rejected(model, column, text):
+    before = model.text(0, column)
+    assert model.setData(model.index(0, column), text) is False
+    assert model.text(0, column) == before
+    assert model.changed_cells() == []
+
+
+def test_finite_numbers_and_empty_text_are_stored(model):
+    assert model.setData(model.index(0, 2), "1e3") is True
+    assert model.text(0, 2) == "1000"
+    assert model.setData(model.index(0, 1), "") is True
+    assert math.isnan(model.value(0, 1))
+    assert [(c.column, c.old, c.new) for c in model.changed_cells()] == [
+        (1, "4.0", ""),
+        (2, "60", "1000"),
+    ]